@@ -1,15 +1,41 @@
 import asyncio
 import datetime
-import hashlib
+import re
+from pathlib import Path
 from typing import Any, Callable, List, Optional
 
+import click
 import rich
 from pydantic_ai import Agent
 from pydantic_ai.models import Model
 from rich.markdown import Markdown
 
-from aww import retro, retro_gen
+from aww import database, retro, retro_gen
+from aww.config import Settings
 from aww.obsidian import Level, Vault
+from aww.prompts import get_prompt_template
+from aww.queries import QueryIndex
+from aww.rag import Index
+
+# Levels retrieved by default: the most detailed ones, that higher levels summarize.
+RETRIEVAL_LEVELS = (Level.daily, Level.weekly)
+
+# Cheap relevance checks run before the map phase of recursive questions.
+PREFILTERS = ("none", "fts", "embedding", "tags")
+
+# Words left out of the question terms of the prefilters: they match about every day.
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be by did do does for from had has have how i in is it me my
+    of on or so that the this these those to was were what when where which who why
+    with you your during about
+    """.split()
+)
+
+
+def question_part(prompt: str) -> str:
+    """The question, sent as the last part of the user prompt after the (cacheable) sources."""
+    return f"**Question:** {prompt}"
 
 
 def ask_question(
@@ -23,28 +49,67 @@ def ask_question(
     recursive: bool = False,
     cache_policies: Optional[List[retro.CachePolicy]] = None,
     gather: Callable = asyncio.gather,
+    retrieve: bool = False,
+    top_k: int = 8,
+    index: Optional[Index] = None,
+    prefilter: str = "none",
+    prefilter_k: int = 30,
+    queries: Optional[QueryIndex] = None,
+    similarity: Optional[float] = None,
 ) -> str:
     """
     Core logic for the ask command.
     """
     sel = retro.Selection(vault, date, level)
 
+    if retrieve:
+        if index is None:
+            index = Index.from_settings(Settings())
+            index.open_table()
+        return ask_retrieved(
+            index, llm_model, sel, prompt, context_levels, top_k, verbose
+        )
+
     if recursive:
-        # Generate a unique query ID based on the prompt/question
-        query_id = hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8]
+        # Respellings of a past question (or similar ones, with --similarity) reuse its query tree
+        if queries is None:
+            queries = QueryIndex.from_settings(Settings())
+        queries.adopt_legacy(vault)
+        embed, embedding_model, threshold = None, None, 0.9
+        if similarity is not None:
+            if index is None:
+                index = Index.from_settings(Settings())
+                index.open_table()
+            embed = lambda text: index.embed_queries([text])[0]
+            embedding_model = index.model_key()
+            threshold = similarity
+        resolution = queries.resolve(prompt, embed, embedding_model, threshold)
+        query_id = resolution.query_id
         if verbose:
-            rich.print(f"Recursive Query ID: {query_id}")
+            rich.print(f"Recursive Query ID: {query_id} ({resolution.match})")
 
-        # Save the query prompt to query.md in the query directory
+        # Save the query prompts to query.md in the query directory
         query_dir = vault.path / vault.queries_dir / query_id
         query_dir.mkdir(parents=True, exist_ok=True)
-        (query_dir / "query.md").write_text(prompt)
+        (query_dir / "query.md").write_text(
+            "\n\n".join(queries.entries[query_id].questions)
+        )
+
+        is_relevant = None
+        if prefilter != "none":
+            dates = relevant_dates(prefilter, sel, prompt, index, prefilter_k)
+            if verbose:
+                rich.print(f"Prefilter ({prefilter}): {len(dates)} relevant days")
+            is_relevant = lambda node: node.level != Level.daily or any(
+                d.isoformat() in dates for d in node.dates
+            )
 
         generator = retro_gen.RecursiveGenerator(
             model=llm_model,
             sel=sel,
             prompt_prefix="ask_",
-            extra_vars={"question": prompt},
+            prompt_suffix=question_part(prompt),
+            is_relevant=is_relevant,
             get_target_page=lambda node: vault.query_page(query_id, node.dates.copy().pop() if node.dates else date, node.level),
         )
         
@@ -52,6 +117,11 @@ def ask_question(
         final_cache_policies = cache_policies
         if final_cache_policies is None:
             final_cache_policies = [retro.NoRootCachePolicy(), retro.ModificationTimeCachePolicy()]
+            if resolution.match == "similar":
+                # Only the daily and weekly answers carry over to a similar question.
+                final_cache_policies.append(
+                    retro.NoLevelsCachePolicy([Level.monthly, Level.yearly])
+                )
 
         result = asyncio.run(
             generator.run(
@@ -62,7 +132,9 @@ def ask_question(
         )
         return result.output if result else "No Result"
 
-    ask_agent = Agent(model=llm_model, system_prompt=prompt)
+    ask_agent = Agent(
+        model=llm_model, system_prompt=get_prompt_template("ask.md").render()
+    )
 
     node = sel.root
     sources = [n for n in node.sources if n.level in context_levels]
@@ -75,5 +147,129 @@ def ask_question(
         
     retros = [n.retro_page.content() for n in sources]
 
-    result = ask_agent.run_sync(user_prompt=retros)
+    result = ask_agent.run_sync(user_prompt=retros + [question_part(prompt)])
     return result.output
+
+
+def retrieve_sources(
+    index: Index,
+    sel: retro.Selection,
+    prompt: str,
+    context_levels: List[Level],
+    top_k: int = 8,
+):
+    """
+    Return the top_k journal entries and retrospectives most relevant to the prompt,
+    among the daily and weekly ones (if in context_levels) within the selection's dates.
+    Previous versions of retrospectives are left out, so they don't crowd the top_k.
+    """
+    levels = [l for l in context_levels if l in RETRIEVAL_LEVELS] or context_levels
+    return index.search(
+        prompt,
+        rag=True,
+        start_date=sel.dates[0],
+        end_date=sel.dates[-1],
+        kind=["journal", "retrospective"],
+        level=levels,
+        latest=True,
+        limit=top_k,
+    )
+
+
+def ask_retrieved(
+    index: Index,
+    llm_model: Model,
+    sel: retro.Selection,
+    prompt: str,
+    context_levels: List[Level],
+    top_k: int = 8,
+    verbose: bool = False,
+    max_chars: int = 4000,
+) -> str:
+    """
+    Answer the prompt in a single call over the top_k retrieved pages, each cut to
+    max_chars, and append the list of cited sources.
+    """
+    results = retrieve_sources(index, sel, prompt, context_levels, top_k)
+    if results.empty:
+        return "No relevant content found."
+
+    names = [Path(page_id).stem for page_id in results["id"]]
+    if verbose:
+        rich.print("Sources", names)
+
+    excerpts = [
+        f"[{i}] [[{name}]]\n{text[:max_chars]}"
+        for i, (name, text) in enumerate(zip(names, results["text"]), start=1)
+    ]
+    ask_agent = Agent(
+        model=llm_model, system_prompt=get_prompt_template("ask_retrieve.md").render()
+    )
+    result = ask_agent.run_sync(user_prompt=excerpts + [question_part(prompt)])
+
+    citations = "\n".join(f"{i}. [[{name}]]" for i, name in enumerate(names, start=1))
+    return f"{result.output}\n\n**Sources**\n\n{citations}"
+
+
+def relevant_dates(
+    prefilter: str,
+    sel: retro.Selection,
+    prompt: str,
+    index: Optional[Index] = None,
+    limit: int = 30,
+) -> set[str]:
+    """
+    Return the ISO dates of the daily pages in the selection that may answer the prompt:
+    with "embedding" the `limit` most similar journal entries, with "fts" the `limit` best
+    scoring entries containing any of the question terms, with "tags" those with a tag
+    named in the question.
+    """
+    if prefilter not in PREFILTERS[1:]:
+        raise ValueError(f"Invalid prefilter '{prefilter}', must be one of {PREFILTERS}")
+    start_date, end_date = sel.dates[0], sel.dates[-1]
+
+    if prefilter == "tags":
+        db_path = database.get_db_path(Settings())
+        if not db_path.exists():
+            raise click.ClickException("Tags database not found. Run 'aww tags collect' first.")
+        references = database.get_tags_references(
+            db_path, start_date.isoformat(), end_date.isoformat(), Level.daily.value
+        )
+        terms = question_terms(prompt)
+        return {
+            source_date
+            for tag, source_date, *_ in references
+            if tag_matches(tag, terms)
+        }
+
+    embedding = prefilter == "embedding"
+    query = prompt
+    if not embedding:
+        # Only the content terms: a stop word alone would match every day.
+        terms = question_terms(prompt)
+        if not terms:
+            return set()
+        query = " ".join(sorted(terms))
+    if index is None:
+        index = Index.from_settings(Settings())
+        index.open_table()
+    return index.matching_dates(
+        query,
+        rag=embedding,
+        start_date=start_date,
+        end_date=end_date,
+        kind="journal",
+        level=Level.daily,
+        limit=limit,
+    )
+
+
+def question_terms(prompt: str) -> set[str]:
+    """Lowercase words of the prompt, without stop words; hashtags count as their name."""
+    return set(re.findall(r"[\w/-]+", prompt.lower())) - STOP_WORDS
+
+
+def tag_matches(tag: str, terms: set[str]) -> bool:
+    """Whether a tag, or any part of a nested or compound tag, is one of the terms."""
+    tag = tag.lower().lstrip("#")
+    return tag in terms or any(part in terms for part in re.split(r"[/_-]", tag))
@@ -1,8 +1,17 @@
 import datetime
 import os
+import time
 from pathlib import Path
+from typing import Callable
 
 from pydantic_ai import Agent, RunContext
+from pydantic_ai.messages import (
+    ModelMessage,
+    PartDeltaEvent,
+    PartStartEvent,
+    TextPart,
+    TextPartDelta,
+)
 from pydantic_ai.models import Model
 
 from aww.obsidian import Page, Vault
@@ -21,6 +30,7 @@ from aww.tools import (
     remember_tool,
     save_page_tool,
     search_tool,
+    search_many_tool,
     list_dates_tool,
 )
 
@@ -56,6 +66,7 @@ def get_chat_agent(model: Model, vault: Vault) -> Agent[ChatDeps]:
             remember_tool,
             save_page_tool,
             search_tool,
+            search_many_tool,
             list_dates_tool,
         ],
     )
@@ -71,3 +82,39 @@ def get_chat_agent(model: Model, vault: Vault) -> Agent[ChatDeps]:
         return render_chat_system_prompt(ctx.deps.vault, scratchpad)
 
     return agent
+
+
+async def stream_response(
+    agent: Agent,
+    prompt: str,
+    history: list[ModelMessage] | None,
+    deps,
+    on_text: Callable[[str], None],
+    debounce: float = 0.05,
+) -> list[ModelMessage]:
+    """
+    Run the agent through all its tool calls, calling on_text with the text of the
+    current model response as it streams in; returns the new messages. Unlike
+    run_stream, text sent alongside tool calls does not end the run.
+    """
+    async with agent.iter(prompt, message_history=history, deps=deps) as run:
+        async for node in run:
+            if not Agent.is_model_request_node(node):
+                continue
+            text, last_update = "", 0.0
+            async with node.stream(run.ctx) as stream:
+                async for event in stream:
+                    if isinstance(event, PartStartEvent) and isinstance(event.part, TextPart):
+                        text += event.part.content
+                    elif isinstance(event, PartDeltaEvent) and isinstance(
+                        event.delta, TextPartDelta
+                    ):
+                        text += event.delta.content_delta
+                    else:
+                        continue
+                    if time.monotonic() - last_update >= debounce:
+                        on_text(text)
+                        last_update = time.monotonic()
+            if text:
+                on_text(text)
+    return run.result.new_messages()
@@ -10,6 +10,8 @@ from aww import retro
 import aww.ask
 from aww.cli import main
 from aww.obsidian import Level
+from aww.queries import QueryIndex
+from aww.rag import Index
 
 
 @main.command(name="ask")
@@ -32,6 +34,41 @@ from aww.obsidian import Level
     default=False,
     help="Recursive map-reduce over journal entries.",
 )
+@click.option(
+    "--prefilter",
+    type=click.Choice(aww.ask.PREFILTERS),
+    default="none",
+    show_default=True,
+    help="With --recursive, skip days found irrelevant by this cheap check.",
+)
+@click.option(
+    "--prefilter-k",
+    type=int,
+    default=30,
+    show_default=True,
+    help="Number of days kept by the fts and embedding prefilters.",
+)
+@click.option(
+    "--similarity",
+    type=click.FloatRange(0, 1),
+    default=None,
+    help="With --recursive, reuse the results of a past question at least this "
+    "similar (embedding cosine similarity, e.g. 0.9).",
+)
+@click.option(
+    "--retrieve",
+    is_flag=True,
+    default=False,
+    help="Answer from the most relevant daily/weekly pages in the index, in one call.",
+)
+@click.option(
+    "-k",
+    "--top-k",
+    type=int,
+    default=8,
+    show_default=True,
+    help="Number of pages retrieved with --retrieve.",
+)
 @click.option(
     "-n",
     "--no-cache",
@@ -65,6 +102,11 @@ def ask(
     yesterday,
     context,
     recursive,
+    prefilter,
+    prefilter_k,
+    similarity,
+    retrieve,
+    top_k,
     no_cache,
     level,
     prompt,
@@ -78,6 +120,10 @@ def ask(
     llm_model = ctx.obj["llm_model"]
     if yesterday:
         date = date - datetime.timedelta(days=1)
+    if recursive and retrieve:
+        raise click.UsageError("--recursive and --retrieve are mutually exclusive")
+    if prefilter != "none" and not recursive:
+        raise click.UsageError("--prefilter requires --recursive")
 
     if prompt_file:
         prompt = prompt + "\n" + open(prompt_file, "r").read()
@@ -89,6 +135,13 @@ def ask(
     if no_cache:
         cache_policies = [retro.NoRootCachePolicy(), retro.NoLevelsCachePolicy(list(Level))]
 
+    index = None
+    if retrieve or prefilter in ("fts", "embedding") or similarity is not None:
+        index = Index.from_settings(ctx.obj["settings"])
+        index.open_table()
+        if index.tbl is None and (retrieve or prefilter in ("fts", "embedding")):
+            raise click.ClickException("Search index not found. Run 'aww index' first.")
+
     output_content = aww.ask.ask_question(
         vault=vault,
         llm_model=llm_model,
@@ -100,6 +153,13 @@ def ask(
         recursive=recursive,
         cache_policies=cache_policies,
         gather=tqdm.gather,
+        retrieve=retrieve,
+        top_k=top_k,
+        index=index,
+        prefilter=prefilter,
+        prefilter_k=prefilter_k,
+        queries=QueryIndex.from_settings(ctx.obj["settings"]),
+        similarity=similarity,
     )
 
     if output_file:
@@ -0,0 +1,77 @@
+import click
+from rich.console import Console
+from rich.table import Table
+
+from aww.cli import main
+from aww.embedding_benchmark import (
+    benchmark_backends,
+    make_queries,
+    sample_vault_texts,
+)
+from aww.huggingface import EMBEDDING_BACKENDS, load_sentence_transformer
+
+
+@main.group()
+def bench():
+    """Benchmarks for the local models."""
+
+
+@bench.command()
+@click.option(
+    "-b",
+    "--backend",
+    "backends",
+    type=click.Choice(EMBEDDING_BACKENDS),
+    multiple=True,
+    help="Backends to compare (default: all).",
+)
+@click.option("--sample", default=200, show_default=True, help="Number of vault pages to embed.")
+@click.option("--queries", default=20, show_default=True, help="Number of queries for recall@k.")
+@click.option("-k", default=10, show_default=True, help="Number of results per query.")
+@click.option("--batch-size", default=32, show_default=True)
+@click.pass_context
+def embeddings(ctx, backends, sample, queries, k, batch_size):
+    """Compare throughput and accuracy of the embedding backends."""
+    settings = ctx.obj["settings"]
+    vault = ctx.obj["vault"]
+
+    texts = sample_vault_texts(vault, limit=sample)
+    if not texts:
+        click.echo("No pages found in the vault.")
+        return
+
+    def load_model(backend):
+        return load_sentence_transformer(
+            settings.rag.model_name,
+            device="cpu",
+            local_files_only=settings.rag.local_files_only,
+            token=False,
+            cache_folder=settings.rag.cache_dir,
+            backend=backend,
+        )
+
+    reports = benchmark_backends(
+        texts,
+        make_queries(texts, queries),
+        load_model,
+        backends or EMBEDDING_BACKENDS,
+        k=k,
+        batch_size=batch_size,
+    )
+
+    table = Table(title=f"{settings.rag.model_name} on {len(texts)} pages")
+    table.add_column("Backend")
+    table.add_column("Docs/s", justify="right")
+    table.add_column(f"Recall@{k}", justify="right")
+    table.add_column("Mean cosine", justify="right")
+    for report in reports:
+        if report.error:
+            table.add_row(report.backend, "-", "-", f"[red]{report.error}[/red]")
+        else:
+            table.add_row(
+                report.backend,
+                f"{report.docs_per_second:.1f}",
+                f"{report.recall_at_k:.3f}",
+                f"{report.mean_cosine:.4f}",
+            )
+    Console().print(table)
@@ -37,6 +37,11 @@ def compare(ctx: click.Context, date: datetime.datetime, level: Level, yesterday
     if not alternative_retros:
         return
 
+    rich.print(Markdown(adjudicate(llm_model, alternatives_content)))
+
+
+def adjudicate(llm_model, alternatives_content: list[str]) -> str:
+    """Ask the model to compare alternative summaries and merge them."""
     agent = Agent(
         model=llm_model,
         system_prompt="Task: Compare and adjudicate multiple summaries.",
@@ -54,7 +59,7 @@ constraints:
         user_prompt=alternatives_content + [configuration],
         # output_type=AdjudicatorOutput,
     )
-    rich.print(Markdown(agent_result.output))
+    return agent_result.output
 
 
 def alternatives(page: Page) -> list[Page]:
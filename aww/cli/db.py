@@ -0,0 +1,55 @@
+import click
+
+from aww import database
+from aww.cli import main
+
+
+@main.group()
+def db():
+    """Inspect and maintain the SQLite database."""
+
+
+@db.command()
+@click.pass_context
+def migrate(ctx):
+    """Apply pending schema migrations."""
+    db_path = database.get_db_path(ctx.obj["settings"])
+    with database.connect(db_path) as conn:
+        before = database.schema_version(conn)
+        database.init_db(conn)
+        after = database.schema_version(conn)
+    if before == after:
+        click.echo(f"Schema is up to date (version {after}).")
+    else:
+        click.echo(f"Migrated {db_path} from version {before} to {after}.")
+
+
+@db.command()
+@click.option(
+    "--time",
+    "repeat",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Also run each query this many times and report the best time.",
+)
+@click.pass_context
+def explain(ctx, repeat):
+    """Show the query plans of the queries run by aww."""
+    db_path = database.get_db_path(ctx.obj["settings"])
+    if not db_path.exists():
+        click.echo("Database not found. Run 'aww tags collect' first.")
+        return
+
+    with database.connect(db_path) as conn:
+        version = database.schema_version(conn)
+        click.echo(f"{db_path} (schema version {version} of {database.SCHEMA_VERSION})")
+        if version < database.SCHEMA_VERSION:
+            click.echo("Run 'aww db migrate' to add the missing indexes.")
+        for name, (query, params) in database.shipped_queries().items():
+            title = name
+            if repeat:
+                elapsed = database.time_query(conn, query, params, repeat)
+                title = f"{name} [{elapsed * 1000:.2f} ms]"
+            click.echo(f"\n{title}")
+            for step in database.query_plan(conn, query, params):
+                click.echo(f"  {step}")
@@ -0,0 +1,122 @@
+from pathlib import Path
+
+import click
+
+from aww.cli import main
+from aww.stub_llm import LATENCY_DISTRIBUTIONS, StubConfig, StubLLMServer
+from aww.synthetic_vault import generate_vault
+
+
+@main.group()
+def dev():
+    """Developer tools for testing and load testing."""
+
+
+@dev.command(name="gen-vault")
+@click.argument("path", type=click.Path(file_okay=False, path_type=Path))
+@click.option("--years", type=click.IntRange(min=1), default=10, show_default=True)
+@click.option("--end-year", type=int, help="Last year to generate (default: last year).")
+@click.option(
+    "--notes-per-day",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Free-form notes per day, written under notes/.",
+)
+@click.option(
+    "--retro-versions",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Versions of each retrospective (r<date>.md, r<date>.1.md, ...).",
+)
+@click.option("--tags", type=click.IntRange(min=1), default=50, show_default=True, help="Number of distinct tags.")
+@click.option("--tasks", type=click.IntRange(min=0), default=2, show_default=True, help="Average tasks per day.")
+@click.option("--events", type=click.IntRange(min=0), default=4, show_default=True, help="Average events per day.")
+@click.option("--metrics/--no-metrics", default=True, show_default=True, help="Frontmatter metrics in daily notes.")
+@click.option(
+    "--periodic/--no-periodic",
+    default=True,
+    show_default=True,
+    help="Weekly, monthly and yearly notes and retrospectives.",
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--force", is_flag=True, default=False, help="Write into a non-empty directory.")
+def gen_vault(
+    path: Path,
+    years: int,
+    end_year: int | None,
+    notes_per_day: int,
+    retro_versions: int,
+    tags: int,
+    tasks: int,
+    events: int,
+    metrics: bool,
+    periodic: bool,
+    seed: int,
+    force: bool,
+):
+    """Write a synthetic vault at PATH for load testing."""
+    if path.exists() and any(path.iterdir()) and not force:
+        raise click.ClickException(f"{path} is not empty, use --force to write into it.")
+
+    vault = generate_vault(
+        path,
+        years=years,
+        end_year=end_year,
+        retro_versions=retro_versions,
+        tag_count=tags,
+        seed=seed,
+        notes_per_day=notes_per_day,
+        metrics=metrics,
+        tasks=tasks,
+        events=events,
+        periodic=periodic,
+    )
+    num_files = sum(1 for _ in vault.walk())
+    click.echo(f"Generated {num_files} files in {vault.path}")
+    click.echo(f"Try it with: AWW_VAULT_PATH={vault.path} aww ...")
+
+
+@dev.command(name="stub-llm")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8000, show_default=True)
+@click.option("--model", default="stub-model", show_default=True, help="Model id to report.")
+@click.option("--latency", type=click.FloatRange(min=0), default=0.5, show_default=True, help="Time to first token, in seconds.")
+@click.option(
+    "--latency-distribution",
+    type=click.Choice(LATENCY_DISTRIBUTIONS),
+    default="lognormal",
+    show_default=True,
+)
+@click.option(
+    "--latency-spread",
+    type=click.FloatRange(min=0),
+    default=0.5,
+    show_default=True,
+    help="Half-width for uniform latency, sigma for lognormal latency.",
+)
+@click.option("--tokens-per-second", type=click.FloatRange(min=0), default=50, show_default=True, help="0 for instant output.")
+@click.option("--output-tokens", type=click.IntRange(min=1), default=200, show_default=True)
+@click.option("--error-rate", type=click.FloatRange(0, 1), default=0.0, show_default=True, help="Fraction of requests failing with 500.")
+@click.option("--rate-limit", type=click.FloatRange(min=0), default=0, show_default=True, help="Requests per second before answering 429 (0: unlimited).")
+@click.option("--max-concurrency", type=click.IntRange(min=0), default=0, show_default=True, help="Concurrent requests before answering 429 (0: unlimited).")
+@click.option("--seed", type=int, help="Seed for latency and error sampling.")
+def stub_llm(host: str, port: int, seed: int | None, **kwargs):
+    """Serve an OpenAI-compatible stub LLM for offline load tests."""
+    server = StubLLMServer((host, port), StubConfig(seed=seed, **kwargs))
+    click.echo(f"Stub LLM listening on {server.base_url}")
+    click.echo("Use it from aww.toml with:")
+    click.echo(f'  [models.stub]\n  provider = "local"\n  model_name = "{kwargs["model"]}"\n  base_url = "{server.base_url}"')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stats = server.stats
+        click.echo(
+            f"Requests: {stats.requests}, completed: {stats.completed}, "
+            f"errors: {stats.errors}, rate limited: {stats.rate_limited}, "
+            f"max in flight: {stats.max_in_flight}"
+        )
@@ -1,7 +1,7 @@
 import click
 
 from aww.cli import main
-from aww.rag import Index
+from aww.rag import Index, unindexed_fraction
 
 
 @main.command()
@@ -17,18 +17,38 @@ from aww.rag import Index
     default=True,
     help="Incrementally update the index with new and modified pages.",
 )
+@click.option(
+    "--retrain-threshold",
+    type=click.FloatRange(min=0.0, max=1.0),
+    default=0.2,
+    show_default=True,
+    help="Retrain the RAG index when more than this fraction of rows is unindexed.",
+)
+@click.option(
+    "--stats",
+    is_flag=True,
+    default=False,
+    help="Show indexed and unindexed rows for each index, then exit.",
+)
 @click.pass_context
-def index(ctx, clean, incr):
+def index(ctx, clean, incr, retrain_threshold, stats):
     """Indexes the vault for RAG."""
     settings = ctx.obj["settings"]
     vault = ctx.obj["vault"]
 
     idx = Index.from_settings(settings)
 
+    if stats:
+        print_stats(idx)
+        return
+
     since_mtime_ns = None
     if incr and not clean:
         idx.open_table()
-        if idx.tbl is not None:
+        if idx.tbl is not None and idx.is_outdated():
+            print("Existing index uses an older schema, performing a full index.")
+            idx.create_table(clean=True)
+        elif idx.tbl is not None:
             since_mtime_ns = idx.get_max_mtime_ns()
             print(f"Scanning for files modified since {since_mtime_ns} ns...")
         else:
@@ -44,10 +64,25 @@ def index(ctx, clean, incr):
     num_pages = idx.add_pages(vault, since_mtime_ns=since_mtime_ns)
 
     if num_pages > 0:
-        # Re-create indices if we've added anything
-        idx.create_fts_index(replace=incr)
-        idx.create_scalar_index(replace=incr)
-        idx.create_vector_index(replace=incr)
+        idx.update_indices(retrain_threshold=retrain_threshold)
         print(f"Indexed {num_pages} pages")
     if not num_pages:
         print("No new or modified pages to index.")
+
+
+def print_stats(idx: Index):
+    idx.open_table()
+    if idx.tbl is None:
+        print("No existing index found.")
+        return
+
+    print(f"Rows: {idx.tbl.count_rows()}")
+    index_stats = idx.index_stats()
+    if not index_stats:
+        print("No indices found.")
+    for stats in index_stats:
+        print(
+            f"{stats['name']} ({stats['index_type']} on {', '.join(stats['columns'])}): "
+            f"{stats['indexed_rows']} indexed, {stats['unindexed_rows']} unindexed "
+            f"({unindexed_fraction(stats):.0%})"
+        )
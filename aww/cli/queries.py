@@ -0,0 +1,75 @@
+import datetime
+
+import click
+import rich
+from rich.table import Table
+
+from aww.cli import main
+from aww.queries import QueryIndex
+
+
+@main.group()
+def queries():
+    """Manage the cached results of recursive questions."""
+
+
+@queries.command(name="list")
+@click.pass_context
+def list_queries(ctx):
+    """List past recursive questions, most recently used first."""
+    vault = ctx.obj["vault"]
+    index = QueryIndex.from_settings(ctx.obj["settings"])
+    index.adopt_legacy(vault)
+
+    table = Table(title="Queries")
+    for column in ("ID", "Last used", "Created", "Pages", "Questions"):
+        table.add_column(column)
+    entries = sorted(index.entries.items(), key=lambda e: e[1].last_used, reverse=True)
+    for query_id, entry in entries:
+        query_dir = vault.path / vault.queries_dir / query_id
+        pages = sum(1 for _ in query_dir.rglob("r*.md")) if query_dir.is_dir() else 0
+        table.add_row(
+            query_id,
+            entry.last_used,
+            entry.created,
+            str(pages),
+            "\n".join(entry.questions),
+        )
+    rich.print(table)
+    if orphans := index.orphans(vault):
+        rich.print(f"{len(orphans)} query trees not in the index: {', '.join(orphans)}")
+
+
+@queries.command()
+@click.option(
+    "--days",
+    type=click.IntRange(min=0),
+    default=30,
+    show_default=True,
+    help="Remove queries not used in this many days.",
+)
+@click.option(
+    "--orphans",
+    is_flag=True,
+    default=False,
+    help="Also remove query trees that are not in the index (legacy trees are adopted).",
+)
+@click.option("--dry-run", is_flag=True, default=False, help="Only list what would be removed.")
+@click.pass_context
+def prune(ctx, days, orphans, dry_run):
+    """Remove stale query trees."""
+    vault = ctx.obj["vault"]
+    index = QueryIndex.from_settings(ctx.obj["settings"])
+    index.adopt_legacy(vault)
+
+    query_ids = index.stale(datetime.timedelta(days=days))
+    if orphans:
+        query_ids += index.orphans(vault)
+    if not query_ids:
+        click.echo("Nothing to prune.")
+        return
+    if dry_run:
+        click.echo(f"Would remove: {', '.join(query_ids)}")
+        return
+    removed = index.prune(vault, query_ids)
+    click.echo(f"Removed {len(query_ids)} queries ({removed} files).")
@@ -4,11 +4,16 @@ import enum
 
 import click
 import rich
+from rich.console import Console
 from rich.markdown import Markdown
+from rich.markup import escape
+from rich.table import Table
 from tqdm.asyncio import tqdm
 
-from aww import retro, retro_gen
+from aww import concurrency, retro, retro_gen, tracing
 from aww.cli import main
+from aww.cli.compare import adjudicate
+from aww.config import Settings, create_model, provider_key
 from aww.obsidian import Level
 from aww.retro import whole_month, whole_week, whole_year
 
@@ -57,6 +62,36 @@ class NoCachePolicyChoice(enum.Enum):
     default=False,
     help="Use yesterday's date (only for daily level).",
 )
+@click.option(
+    "-m",
+    "--models",
+    help="Comma separated models to generate with concurrently, e.g. 'openai,local:2'. "
+    "An optional ':N' sets the concurrency limit of the model's provider: models of "
+    "the same provider share one limit, the largest of those requested.",
+)
+@click.option(
+    "--compare",
+    is_flag=True,
+    default=False,
+    help="Adjudicate the outputs of --models with the compare agent.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Print per-level latency, token and cache-hit statistics and the critical path.",
+)
+@click.option(
+    "--trace-file",
+    type=click.Path(dir_okay=False),
+    help="Append a JSON line per generated or cached node to this file.",
+)
+@click.option(
+    "--otel",
+    is_flag=True,
+    default=False,
+    help="Export node spans to the configured OpenTelemetry tracer provider.",
+)
 @click.option("--output-file", type=click.Path(), help="File to write the output to.")
 @click.option(
     "--plain-text",
@@ -73,6 +108,11 @@ def retrospectives(
     context: list[Level],
     concurrency_limit: int | None,
     yesterday: bool,
+    models: str | None,
+    compare: bool,
+    profile: bool,
+    trace_file: str | None,
+    otel: bool,
     output_file: str | None,
     plain_text: bool,
 ):
@@ -81,13 +121,14 @@ def retrospectives(
     llm_model = ctx.obj["llm_model"]
     if yesterday:
         date = date - datetime.timedelta(days=1)
+    if compare and not models:
+        raise click.UsageError("--compare requires --models")
 
     sel = retro.Selection(vault, date, level)
 
     # Set defaults based on level
     final_no_cache = list(no_cache)
     final_context = list(context)
-    final_concurrency_limit = concurrency_limit or 10
 
     if not final_no_cache:
         final_no_cache = [NoCachePolicyChoice.ROOT, NoCachePolicyChoice.MTIME]
@@ -108,12 +149,62 @@ def retrospectives(
     )
     print("NoCache policy:", ",".join(c.value for c in final_no_cache))
     print("Context:", ",".join(c.value for c in final_context))
-    print("Concurrency Limit:", final_concurrency_limit)
 
     cache_policies = get_cache_policies(final_no_cache)
 
+    tracer = None
+    if profile or trace_file or otel:
+        exporters = []
+        if trace_file:
+            exporters.append(tracing.JsonlExporter(trace_file))
+        if otel:
+            exporters.append(tracing.OpenTelemetryExporter())
+        tracer = tracing.Tracer(exporters)
+
+    if models:
+        model_limits = parse_models(models, concurrency_limit)
+        limiters, max_retries = {}, {}
+        for name, limit in model_limits.items():
+            limiters[name], max_retries[name] = model_limiter(name, limit)
+        # Models of the same provider share a limiter, hence the same limit.
+        print(
+            "Models:",
+            ",".join(f"{m}:{l.max_limit}" for m, l in limiters.items()),
+        )
+        failures = {}
+        results = asyncio.run(
+            retro_gen.run_models(
+                {name: create_model(name) for name in model_limits},
+                sel,
+                context_levels=final_context,
+                cache_policies=cache_policies,
+                gather=tqdm.gather,
+                tracer=tracer,
+                limiters=limiters,
+                max_retries=max_retries,
+                failures=failures,
+            )
+        )
+        if profile:
+            print_profile(tracer, sel.root.retro_page.name)
+        for name, model_failures in failures.items():
+            print_failures(model_failures, name)
+        outputs = {name: r.output for name, r in results.items() if r}
+        if not outputs:
+            return
+        if compare:
+            output_content = adjudicate(llm_model, list(outputs.values()))
+        else:
+            output_content = "\n\n".join(
+                f"## {name}\n\n{output}" for name, output in outputs.items()
+            )
+        show_output(output_content, output_file, plain_text)
+        return
+
+    limiter, max_retries = model_limiter(ctx.obj["model_name"], concurrency_limit)
+    print("Concurrency Limit:", limiter.max_limit)
     generator = retro_gen.RecursiveGenerator(
-        llm_model, sel, final_concurrency_limit
+        llm_model, sel, tracer=tracer, limiter=limiter, max_retries=max_retries
     )
     result = asyncio.run(
         generator.run(
@@ -122,16 +213,106 @@ def retrospectives(
             gather=tqdm.gather,
         )
     )
+    if profile:
+        print_profile(tracer, sel.root.retro_page.name)
+    print_failures(generator.failures)
     if result:
-        output_content = result.output
-        if output_file:
-            with open(output_file, "w") as f:
-                f.write(output_content)
-            print(f"Output written to {output_file}")
-        if plain_text:
-            print(output_content)
-        else:
-            rich.print(Markdown(output_content))
+        show_output(result.output, output_file, plain_text)
+
+
+def model_limiter(
+    model_name: str, limit: int | None
+) -> tuple[concurrency.AdaptiveLimiter, int]:
+    """
+    Return the limiter shared by the models of the same provider, and the model's
+    max retries. Without an explicit limit, the model's configured one is used.
+    """
+    settings = Settings()
+    if model_name not in settings.models:
+        raise click.ClickException(f"Model '{model_name}' not found in settings.")
+    model_config = settings.models[model_name]
+    limiter = concurrency.get_limiter(
+        provider_key(model_config), limit or model_config.concurrency_limit
+    )
+    return limiter, model_config.max_retries
+
+
+def print_failures(failures: list, model_name: str | None = None):
+    prefix = f"{escape(model_name)} " if model_name else ""
+    for node, exc in failures:
+        rich.print(
+            f"[red]Failed:[/red] {prefix}{node.retro_page.name}: {escape(str(exc))}"
+        )
+
+
+def print_profile(tracer: tracing.Tracer, root: str):
+    console = Console()
+    table = Table(title="Retrospective profile")
+    columns = (
+        "Model",
+        "Level",
+        "Nodes",
+        "Cached",
+        "Queue wait",
+        "LLM latency",
+        "Tokens",
+        "Cached tokens",
+    )
+    for column in columns:
+        table.add_column(column, justify="left" if column in ("Model", "Level") else "right")
+    for row in tracing.summarize(tracer.spans):
+        table.add_row(
+            row["model_name"],
+            row["level"],
+            str(row["nodes"]),
+            str(row["cached"]),
+            f"{row['mean_queue_wait']:.2f}s",
+            f"{row['mean_llm_latency']:.2f}s",
+            str(row["total_tokens"]),
+            str(row["cached_tokens"]),
+        )
+    console.print(table)
+
+    for model_name in dict.fromkeys(span.model_name for span in tracer.spans):
+        path = tracing.critical_path(tracer.spans, root, model_name)
+        console.print(f"Critical path ({model_name}):")
+        for span in path:
+            status = "cached" if span.cached else (
+                f"wait {span.queue_wait:.2f}s, llm {span.llm_latency:.2f}s"
+            )
+            console.print(f"  {span.name} ({span.level}): {span.duration:.2f}s, {status}")
+
+
+def show_output(output_content: str, output_file: str | None, plain_text: bool):
+    if output_file:
+        with open(output_file, "w") as f:
+            f.write(output_content)
+        print(f"Output written to {output_file}")
+    if plain_text:
+        print(output_content)
+    else:
+        rich.print(Markdown(output_content))
+
+
+def parse_models(spec: str, default_limit: int | None) -> dict[str, int | None]:
+    """
+    Parses 'a,b:4' into model names mapped to their concurrency limits; None (without
+    a default_limit) means the model's configured limit.
+    """
+    limits = {}
+    for item in spec.split(","):
+        name, _, limit = item.strip().partition(":")
+        if not name:
+            continue
+        try:
+            limits[name] = int(limit) if limit else default_limit
+        except ValueError:
+            raise click.BadParameter(f"Invalid concurrency limit in '{item}'")
+        if limits[name] is not None and limits[name] < 1:
+            raise click.BadParameter(f"Invalid concurrency limit in '{item}'")
+    if not limits:
+        raise click.BadParameter("No models given")
+    return limits
 
 
 def get_cache_policies(
@@ -6,12 +6,29 @@ from pydantic_ai import Agent
 from rich.markdown import Markdown
 
 from aww.cli import main
+from aww.obsidian import PAGE_KINDS, Level
 from aww.rag import Index
 
 
 @main.command()
 @click.argument("query")
 @click.option("--rag", is_flag=True, default=False, help="Use RAG for searching.")
+@click.option(
+    "-s", "--start-date", type=click.DateTime(), help="Only pages dated on or after this date."
+)
+@click.option(
+    "-e", "--end-date", type=click.DateTime(), help="Only pages dated on or before this date."
+)
+@click.option(
+    "-k", "--kind", type=click.Choice(PAGE_KINDS), multiple=True, help="Only pages of this kind."
+)
+@click.option(
+    "-l",
+    "--level",
+    type=click.Choice(Level, case_sensitive=False),
+    multiple=True,
+    help="Only pages of this level.",
+)
 @click.option(
     "-a", "--ask", default=None, help="Ask LLM to compose the output.",
     type=str,
@@ -28,6 +45,10 @@ def search(
     ctx,
     query,
     rag,
+    start_date,
+    end_date,
+    kind,
+    level,
     ask,
     output_file,
     plain_text,
@@ -38,7 +59,14 @@ def search(
 
     idx = Index.from_settings(settings)
     idx.open_table()
-    results = idx.search(query, rag=rag)
+    results = idx.search(
+        query,
+        rag=rag,
+        start_date=start_date,
+        end_date=end_date,
+        kind=kind,
+        level=level,
+    )
 
     rich.print(results[["id"]])
 
@@ -1,10 +1,10 @@
 import datetime
-import difflib
 import re
+from pathlib import Path
 
 import click
 
-from aww import database, retro
+from aww import database, retro, tag_mapping
 from aww.cli import main
 from aww.obsidian import Level
 
@@ -134,6 +134,120 @@ def list_tags(ctx, period, level, output):
             click.echo(f"  - {s_date} [{kind}/{lvl}] {path}")
 
 
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values) -> str:
+    top = max(values, default=0)
+    if top <= 0:
+        return SPARK_CHARS[0] * len(values)
+    return "".join(
+        SPARK_CHARS[round(v / top * (len(SPARK_CHARS) - 1))] for v in values
+    )
+
+
+@tags.command()
+@click.argument("period", type=click.DateTime(), nargs=2, required=False)
+@click.option(
+    "-l",
+    "--level",
+    type=click.Choice(Level, case_sensitive=False),
+    default="daily",
+    help="Filter by level.",
+)
+@click.option(
+    "--kind",
+    type=click.Choice(["journal", "retrospective"]),
+    help="Filter by page kind.",
+)
+@click.option(
+    "-w",
+    "--window",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Weeks in the rolling mean, and in each side of the change.",
+)
+@click.option(
+    "-n",
+    "--top",
+    type=click.IntRange(min=1),
+    default=20,
+    show_default=True,
+    help="Number of tags to show.",
+)
+@click.option(
+    "--sort",
+    type=click.Choice(["total", "change"]),
+    default="total",
+    show_default=True,
+    help="Show the most frequent tags, or those rising the most.",
+)
+@click.option(
+    "--pairs",
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+    help="Number of co-occurring tag pairs to show, by PMI.",
+)
+@click.option(
+    "--min-count",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="Minimum pages shared by a tag pair.",
+)
+@click.pass_context
+def trends(ctx, period, level, kind, window, top, sort, pairs, min_count):
+    """Show weekly tag trends and co-occurring tags in a given period (two dates)."""
+    settings = ctx.obj["settings"]
+    db_path = database.get_db_path(settings)
+    if not db_path.exists():
+        click.echo("Database not found. Run 'collect' first.")
+        return
+
+    start_date = None
+    end_date = None
+    if period:
+        start_date = period[0].date().isoformat()
+        end_date = period[1].date().isoformat()
+    level = Level(level).value
+
+    weeks = database.get_tag_weeks(db_path, start_date, end_date, level, kind)
+    if not weeks.tags:
+        click.echo("No tags found for the given criteria.")
+        return
+
+    totals = weeks.counts.sum(axis=1)
+    recent, previous = weeks.change(window)
+    rolling = weeks.rolling_mean(window)
+    order = range(len(weeks.tags))
+    if sort == "change":
+        order = sorted(order, key=lambda i: (previous[i] - recent[i], -totals[i]))
+
+    click.echo(
+        f"Weeks {weeks.weeks[0]} to {weeks.weeks[-1]},"
+        f" change over the last {window} week(s):"
+    )
+    for i in list(order)[:top]:
+        click.echo(
+            f"{totals[i]:5d} {recent[i] - previous[i]:+6.2f}/wk"
+            f"  {sparkline(rolling[i])}  {weeks.tags[i]}"
+        )
+
+    if not pairs:
+        return
+    cooccurrence = database.get_tag_cooccurrence(
+        db_path, start_date, end_date, level, kind
+    )
+    click.echo(f"\nCo-occurring tags over {cooccurrence.n_pages} pages:")
+    results = cooccurrence.pairs(min_count)[:pairs]
+    if not results:
+        click.echo("  (none)")
+    for tag_a, tag_b, count, lift, pmi in results:
+        click.echo(f"  {count:4d} lift {lift:5.2f} pmi {pmi:+5.2f}  {tag_a} + {tag_b}")
+
+
 def normalize_tag(tag: str) -> str:
     tag = tag.strip()
     tag = re.sub(r"([A-Z]+)([A-Z][a-z])", r"\1_\2", tag)
@@ -160,14 +274,28 @@ def suggest_canonical_tag(tag: str, canonical_tags: set[str]) -> str | None:
     show_default=True,
     help="Skip consolidation for tags with frequency >= min-count.",
 )
+@click.option(
+    "--cutoff",
+    type=click.FloatRange(0, 1),
+    default=0.6,
+    show_default=True,
+    help="Minimum similarity of the close canonical tags listed for review.",
+)
 @click.option(
     "--dry-run/--apply",
     default=True,
     show_default=True,
-    help="Report-only mode; apply is currently a no-op.",
+    help="Report-only mode, or rename the suggested tags in the vault and database.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Pages rewritten in parallel with --apply.",
 )
 @click.pass_context
-def map(ctx, min_count, dry_run):
+def map(ctx, min_count, cutoff, dry_run, workers):
     """Suggest canonical tag mappings based on existing tags."""
     settings = ctx.obj["settings"]
     db_path = database.get_db_path(settings)
@@ -207,10 +335,15 @@ def map(ctx, min_count, dry_run):
         if canonical := suggest_canonical_tag(tag_name, canonical_tags):
             suggested.append((tag_name, canonical, freq))
         else:
-            close = difflib.get_close_matches(
-                normalized, sorted(canonical_tags), n=3, cutoff=0.8
-            )
-            unmapped.append((tag_name, normalized, freq, close))
+            unmapped.append((tag_name, normalized, freq))
+
+    # Match all the unmapped tags in one batch.
+    matcher = tag_mapping.TagMatcher(canonical_tags)
+    matches = matcher.match([normalized for _, normalized, _ in unmapped], cutoff=cutoff)
+    unmapped = [
+        (tag_name, normalized, freq, [name for name, _ in close])
+        for (tag_name, normalized, freq), close in zip(unmapped, matches)
+    ]
 
     click.echo("Suggested canonical mappings (auto):")
     if suggested:
@@ -247,4 +380,19 @@ def map(ctx, min_count, dry_run):
         click.echo("  (none)")
 
     if not dry_run:
-        click.echo("\nApply mode is not implemented; no changes were made.")
+        apply_mapping(db_path, {tag_name: canonical for tag_name, canonical, _ in suggested}, workers)
+
+
+def apply_mapping(db_path, mapping: dict[str, str], workers: int = 8):
+    """Rename the tags in the pages that mention them, then in the database."""
+    if not mapping:
+        click.echo("\nNo suggested mappings to apply.")
+        return
+    paths = [
+        Path(path)
+        for tag_name, _, _, _, path in database.get_tags_references(db_path)
+        if tag_name in mapping
+    ]
+    changed = tag_mapping.rewrite_pages(paths, mapping, max_workers=workers)
+    database.rename_tags(db_path, mapping)
+    click.echo(f"\nRenamed {len(mapping)} tag(s) in {len(changed)} page(s).")
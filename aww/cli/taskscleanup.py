@@ -3,7 +3,8 @@ import datetime
 import click
 
 from aww.cli import main
-from aww.obsidian import Level, Page
+from aww.obsidian import Page
+from aww.tasks_cleanup import cleanup, template_tasks
 
 one_week_ago = datetime.datetime.now() - datetime.timedelta(weeks=1)
 yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
@@ -25,8 +26,18 @@ yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
     type=click.DateTime(),
 )
 @click.option("-t", "--template", metavar="FILE", default="templates/daily.md")
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Days processed in parallel.",
+)
+@click.option("--dry-run", is_flag=True, help="Report the changes without writing them.")
+@click.option("-v", "--verbose", is_flag=True, help="List the cancelled tasks of each page.")
 @click.pass_context
-def tasks_cleanup(ctx, start_date, end_date, template):
+def tasks_cleanup(ctx, start_date, end_date, template, workers, dry_run, verbose):
     """Cleanup AWW tasks."""
     vault = ctx.obj["vault"]
 
@@ -35,28 +46,27 @@ def tasks_cleanup(ctx, start_date, end_date, template):
         click.secho("Template file not found", fg="red")
         return
 
-    template_tasks = template_page.tasks().description.to_list()
-
-    date = start_date
-    while date < end_date:
-        click.secho(f"Cleaning {date}...", fg="green")
-        page = vault.page(date, Level.daily)
-        if not page:
-            click.secho("Page not found", fg="red")
-
-        try:
-            page_lines = page.path.open().readlines()
-        except FileNotFoundError:
-            click.secho("Page not found", fg="red")
-            date = date + datetime.timedelta(days=1)
-            continue
-
-        page_tasks = page.tasks()
-        for index, row in page_tasks.iterrows():
-            if row["status"] == " " and row["description"] in template_tasks:
-                page_lines[index] = page_lines[index].replace("[ ]", "[-]")
+    report = cleanup(
+        vault,
+        start_date.date(),
+        end_date.date(),
+        template_tasks(template_page),
+        max_workers=workers,
+        dry_run=dry_run,
+    )
 
-        with page.path.open("w") as f:
-            f.writelines(page_lines)
+    for result in report.changed:
+        click.secho(
+            f"{result.date}: {len(result.cancelled)} task(s) cancelled", fg="green"
+        )
+        if verbose:
+            for description in result.cancelled:
+                click.echo(f"  - [-] {description}")
+    for date in report.missing:
+        click.secho(f"{date}: page not found", fg="red")
 
-        date = date + datetime.timedelta(days=1)
+    action = "would be cancelled" if dry_run else "cancelled"
+    click.echo(
+        f"{report.cancelled} task(s) {action} in {len(report.changed)} page(s),"
+        f" {report.unchanged} unchanged, {len(report.missing)} missing."
+    )
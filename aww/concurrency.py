@@ -0,0 +1,188 @@
+"""
+Adaptive concurrency and retries for LLM calls.
+AdaptiveLimiter grows the number of concurrent requests while the model server
+keeps up, and backs off on errors (429, 5xx, timeouts) and latency spikes.
+"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+import httpx
+from pydantic_ai.exceptions import ModelHTTPError
+
+logger = logging.getLogger(__name__)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether an LLM call failed because the server was overloaded or unreachable."""
+    if isinstance(exc, ModelHTTPError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    if isinstance(exc, (TimeoutError, httpx.TransportError)):
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(exc, openai.APIConnectionError)
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """
+    Seconds to wait before retrying, from the Retry-After header of the failed
+    response, if any. pydantic-ai raises ModelHTTPError from the SDK error, which
+    keeps the response.
+    """
+    for error in (exc, exc.__cause__):
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            continue
+        # OpenAI-compatible servers may also send milliseconds.
+        if value := headers.get("retry-after-ms"):
+            try:
+                return max(0.0, float(value) / 1000)
+            except ValueError:
+                pass
+        if value := headers.get("retry-after"):
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                pass
+            try:
+                until = email.utils.parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            return max(0.0, until.timestamp() - time.time())
+    return None
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: +1 slot per window of successful calls, multiplicative
+    decrease on errors and, more gently, on calls much slower than the fastest seen.
+    """
+
+    def __init__(
+        self,
+        max_limit: int = 10,
+        initial: int | None = None,
+        min_limit: int = 1,
+        error_decrease: float = 0.5,
+        latency_decrease: float = 0.9,
+        latency_tolerance: float = 4.0,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.limit = float(initial or max_limit)
+        self.error_decrease = error_decrease
+        self.latency_decrease = latency_decrease
+        self.latency_tolerance = latency_tolerance
+        self.min_latency: float | None = None
+        self.in_flight = 0
+        self._condition: asyncio.Condition | None = None
+        self._loop = None
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        # Limiters are shared across runs, each asyncio.run has its own loop.
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+
+    async def acquire(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency: float | None = None, error: bool = False):
+        async with self.condition:
+            self.in_flight -= 1
+            if error:
+                self.limit = max(self.min_limit, self.limit * self.error_decrease)
+            elif latency is not None:
+                if self.min_latency is None or latency < self.min_latency:
+                    self.min_latency = latency
+                if latency > self.min_latency * self.latency_tolerance:
+                    self.limit = max(self.min_limit, self.limit * self.latency_decrease)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(key: str, max_limit: int) -> AdaptiveLimiter:
+    """
+    Return the limiter shared by all models served by the same provider. If models of
+    the provider ask for different limits, the largest one applies to all of them.
+    """
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters[key] = AdaptiveLimiter(max_limit)
+    elif max_limit != limiter.max_limit:
+        if max_limit > limiter.max_limit:
+            limiter.max_limit = max_limit
+        logger.warning(
+            "Concurrency limit %d requested for %s, which shares a limit of %d",
+            max_limit,
+            key,
+            limiter.max_limit,
+        )
+    return limiter
+
+
+@dataclass
+class CallStats:
+    retries: int = 0
+    queue_wait: float = 0.0
+    latency: float = 0.0
+
+
+async def call_with_retries(
+    fn,
+    limiter: AdaptiveLimiter,
+    max_retries: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    stats: CallStats | None = None,
+):
+    """
+    Await fn() inside a limiter slot, retrying retryable failures with
+    exponential backoff and full jitter, waiting at least as long as the server's
+    Retry-After asks. Fills in `stats` if given.
+    """
+    stats = stats or CallStats()
+    for attempt in range(max_retries + 1):
+        queued = time.time()
+        await limiter.acquire()
+        started = time.time()
+        stats.queue_wait += started - queued
+        try:
+            result = await fn()
+        except Exception as exc:
+            retryable = is_retryable(exc)
+            await limiter.release(error=retryable)
+            if not retryable or attempt == max_retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+            delay = max(delay, retry_after(exc) or 0.0)
+            logger.warning(
+                "LLM call failed (%s), retrying in %.1fs (%d/%d)",
+                exc,
+                delay,
+                attempt + 1,
+                max_retries,
+            )
+            stats.retries += 1
+            await asyncio.sleep(delay)
+        else:
+            stats.latency = time.time() - started
+            await limiter.release(latency=stats.latency)
+            return result
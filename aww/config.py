@@ -6,7 +6,8 @@ from typing import Any, Dict, Literal, Union
 
 import click
 from pydantic import BaseModel, Field
-from pydantic_ai.models import Model
+from openai import AsyncOpenAI
+from pydantic_ai.models import Model, cached_async_http_client
 from pydantic_ai.models.gemini import GeminiModel
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.providers.openai import OpenAIProvider
@@ -21,12 +22,16 @@ from pydantic_settings import (
 class OpenAIConfig(BaseModel):
     provider: Literal["openai"] = "openai"
     model_name: str = "gpt-4.1"
+    concurrency_limit: int = 10
+    max_retries: int = 3
     model_settings: Dict[str, Any] = Field(default_factory=dict)
 
 
 class GeminiConfig(BaseModel):
     provider: Literal["gemini"] = "gemini"
     model_name: str = "gemini-2.5-flash"
+    concurrency_limit: int = 10
+    max_retries: int = 3
     model_settings: Dict[str, Any] = Field(default_factory=dict)
 
 
@@ -34,17 +39,32 @@ class LocalAIConfig(BaseModel):
     provider: Literal["local"] = "local"
     model_name: str
     base_url: str = "http://localhost:1234/v1"
+    concurrency_limit: int = 10
+    max_retries: int = 3
     model_settings: Dict[str, Any] = Field(default_factory=dict)
 
 
 ModelConfig = Union[OpenAIConfig, GeminiConfig, LocalAIConfig]
 
 
+def provider_key(model_config: ModelConfig) -> str:
+    """Identifies the server behind a model, so models sharing it share its limits."""
+    if isinstance(model_config, LocalAIConfig):
+        return f"local:{model_config.base_url}"
+    return model_config.provider
+
+
 class RagConfig(BaseModel):
     provider: str = "sentence-transformers"
     model_name: str = "all-mpnet-base-v2"
+    backend: Literal["torch", "torch-int8", "onnx", "openvino"] = "torch"
+    truncate_dim: int | None = None
+    vector_dtype: Literal["float32", "float16"] = "float32"
+    refine_factor: int | None = None
     local_files_only: bool = True
     cache_dir: str | None = None
+    query_cache_size: int = 256
+    persist_query_cache: bool = False
 
 
 class Settings(BaseSettings):
@@ -103,6 +123,7 @@ def create_model(model_name: str) -> Model:
             )
         return OpenAIModel(
             model_name=model_config.model_name,
+            provider=openai_provider(),
             settings=model_config.model_settings,
         )
     elif isinstance(model_config, GeminiConfig):
@@ -117,7 +138,7 @@ def create_model(model_name: str) -> Model:
     elif isinstance(model_config, LocalAIConfig):
         return OpenAIModel(
             model_name=model_config.model_name,
-            provider=OpenAIProvider(base_url=model_config.base_url),
+            provider=openai_provider(model_config.base_url),
             settings=model_config.model_settings,
         )
     else:
@@ -125,3 +146,22 @@ def create_model(model_name: str) -> Model:
         raise click.ClickException(
             f"Unknown provider for model '{model_name}' with config {model_config}"
         )
+
+
+def openai_provider(base_url: str | None = None) -> OpenAIProvider:
+    """
+    OpenAI provider whose client does not retry: calls are already retried by
+    concurrency.call_with_retries, and the SDK's own retries would multiply the
+    attempts behind the back of the adaptive limiter.
+    """
+    api_key = None
+    if base_url is not None and not os.environ.get("OPENAI_API_KEY"):
+        # Local servers may not need a key, but the client requires one.
+        api_key = "api-key-not-set"
+    client = AsyncOpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        max_retries=0,
+        http_client=cached_async_http_client(provider="openai"),
+    )
+    return OpenAIProvider(openai_client=client)
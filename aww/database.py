@@ -1,6 +1,11 @@
+import datetime
 import sqlite3
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
+import numpy as np
+
 
 def get_db_path(settings):
     """Return the path to the SQLite database, creating the directory if needed."""
@@ -9,17 +14,26 @@ def get_db_path(settings):
     return data_path / "aww.db"
 
 
+def connect(db_path) -> sqlite3.Connection:
+    """Open the database with WAL journaling, so readers do not block the writer."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Durable at checkpoints, which is enough for a cache of the vault.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
 def init_db(db_path_or_conn):
-    """Initialize the database schema."""
+    """Initialize the database schema, applying any pending migrations."""
     if isinstance(db_path_or_conn, sqlite3.Connection):
         conn = db_path_or_conn
         _init_db(conn)
     else:
-        with sqlite3.connect(db_path_or_conn) as conn:
+        with connect(db_path_or_conn) as conn:
             _init_db(conn)
 
 
-def _init_db(conn):
+def _create_tables(conn):
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS tags (
@@ -74,6 +88,38 @@ def _init_db(conn):
     )
 
 
+def _add_tag_indexes(conn):
+    # Covering indexes for the tag queries: filter pages by date or level, then
+    # reach their tags by page (the primary key already covers tag -> pages).
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pages_date_level ON pages (source_date, level, kind)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pages_level_date ON pages (level, source_date)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tag_occurrences_page ON tag_occurrences (page_id, tag_id)"
+    )
+
+
+# Schema migrations, in order. PRAGMA user_version records how many were applied;
+# each one must also be safe to re-run on databases created before versioning.
+MIGRATIONS = [_create_tables, _add_tag_indexes]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _init_db(conn):
+    version = schema_version(conn)
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+
+
 def save_page_tags(
     db_path_or_conn, source_date, kind, level, path, sys_hash, user_hash, tags
 ):
@@ -90,7 +136,7 @@ def save_page_tags(
             tags,
         )
     else:
-        with sqlite3.connect(db_path_or_conn) as conn:
+        with connect(db_path_or_conn) as conn:
             _save_page_tags(
                 conn, source_date, kind, level, path, sys_hash, user_hash, tags
             )
@@ -131,6 +177,38 @@ def _save_page_tags(conn, source_date, kind, level, path, sys_hash, user_hash, t
         )
 
 
+def rename_tags(db_path_or_conn, mapping):
+    """Rename tags in place, merging their occurrences into the new tag if it exists."""
+    if isinstance(db_path_or_conn, sqlite3.Connection):
+        _rename_tags(db_path_or_conn, mapping)
+    else:
+        with connect(db_path_or_conn) as conn:
+            _rename_tags(conn, mapping)
+
+
+def _rename_tags(conn, mapping):
+    for old_name, new_name in mapping.items():
+        if old_name == new_name:
+            continue
+        row = conn.execute("SELECT id FROM tags WHERE name = ?", (old_name,)).fetchone()
+        if row is None:
+            continue
+        old_id = row[0]
+        conn.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (new_name,))
+        new_id = conn.execute(
+            "SELECT id FROM tags WHERE name = ?", (new_name,)
+        ).fetchone()[0]
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO tag_occurrences (tag_id, page_id)
+            SELECT ?, page_id FROM tag_occurrences WHERE tag_id = ?
+        """,
+            (new_id, old_id),
+        )
+        conn.execute("DELETE FROM tag_occurrences WHERE tag_id = ?", (old_id,))
+        conn.execute("DELETE FROM tags WHERE id = ?", (old_id,))
+
+
 def get_tags_frequency(db_path_or_conn, start_date=None, end_date=None, level=None):
     """Query tag counts in a given period and level."""
     if isinstance(db_path_or_conn, sqlite3.Connection):
@@ -138,26 +216,17 @@ def get_tags_frequency(db_path_or_conn, start_date=None, end_date=None, level=No
             db_path_or_conn, start_date, end_date, level
         )
     else:
-        with sqlite3.connect(db_path_or_conn) as conn:
+        with connect(db_path_or_conn) as conn:
             return _get_tags_frequency(conn, start_date, end_date, level)
 
 
 def _get_tags_frequency(conn, start_date=None, end_date=None, level=None):
-    params = []
-    where_clauses = ["1=1"]
-
-    if start_date:
-        where_clauses.append("p.source_date >= ?")
-        params.append(start_date)
-    if end_date:
-        where_clauses.append("p.source_date <= ?")
-        params.append(end_date)
-    if level:
-        where_clauses.append("p.level = ?")
-        params.append(level.lower())
+    query, params = _tags_frequency_query(start_date, end_date, level)
+    return conn.execute(query, params).fetchall()
 
-    where_sql = " AND ".join(where_clauses)
 
+def _tags_frequency_query(start_date=None, end_date=None, level=None):
+    where_sql, params = _page_filters(start_date, end_date, level)
     query = f"""
         SELECT t.name, COUNT(toc.page_id) as freq
         FROM tags t
@@ -167,8 +236,7 @@ def _get_tags_frequency(conn, start_date=None, end_date=None, level=None):
         GROUP BY t.name
         ORDER BY freq DESC, t.name ASC
     """
-
-    return conn.execute(query, params).fetchall()
+    return query, params
 
 
 def get_tags_references(db_path_or_conn, start_date=None, end_date=None, level=None):
@@ -178,11 +246,29 @@ def get_tags_references(db_path_or_conn, start_date=None, end_date=None, level=N
             db_path_or_conn, start_date, end_date, level
         )
     else:
-        with sqlite3.connect(db_path_or_conn) as conn:
+        with connect(db_path_or_conn) as conn:
             return _get_tags_references(conn, start_date, end_date, level)
 
 
 def _get_tags_references(conn, start_date=None, end_date=None, level=None):
+    query, params = _tags_references_query(start_date, end_date, level)
+    return conn.execute(query, params).fetchall()
+
+
+def _tags_references_query(start_date=None, end_date=None, level=None):
+    where_sql, params = _page_filters(start_date, end_date, level)
+    query = f"""
+        SELECT t.name, p.source_date, p.kind, p.level, p.path
+        FROM tags t
+        JOIN tag_occurrences toc ON t.id = toc.tag_id
+        JOIN pages p ON toc.page_id = p.id
+        WHERE {where_sql}
+        ORDER BY t.name ASC, p.source_date DESC
+    """
+    return query, params
+
+
+def _page_filters(start_date=None, end_date=None, level=None, kind=None):
     params = []
     where_clauses = ["1=1"]
 
@@ -195,16 +281,217 @@ def _get_tags_references(conn, start_date=None, end_date=None, level=None):
     if level:
         where_clauses.append("p.level = ?")
         params.append(level.lower())
+    if kind:
+        where_clauses.append("p.kind = ?")
+        params.append(kind)
+
+    return " AND ".join(where_clauses), params
+
+
+def _monday(iso_date: str) -> np.datetime64:
+    date = datetime.date.fromisoformat(iso_date)
+    return np.datetime64(date - datetime.timedelta(days=date.weekday()), "D")
+
+
+@dataclass
+class TagWeeks:
+    """Pages mentioning each tag (rows) per week (columns, starting on Monday)."""
+
+    tags: list[str]
+    weeks: list[str]
+    counts: np.ndarray
+
+    def rolling_mean(self, window: int = 4) -> np.ndarray:
+        """Trailing mean over `window` weeks; the first weeks average what is available."""
+        totals = np.cumsum(self.counts, axis=1, dtype=np.float64)
+        totals[:, window:] = totals[:, window:] - totals[:, :-window]
+        sizes = np.minimum(np.arange(1, len(self.weeks) + 1), window)
+        return totals / sizes
+
+    def change(self, window: int = 4) -> tuple[np.ndarray, np.ndarray]:
+        """Mean weekly counts in the last `window` weeks and in the `window` before."""
+        recent = self.counts[:, -window:].mean(axis=1) if self.weeks else np.zeros(len(self.tags))
+        previous = self.counts[:, -2 * window : -window]
+        if previous.shape[1] == 0:
+            return recent, np.zeros(len(self.tags))
+        return recent, previous.mean(axis=1)
+
+
+@dataclass
+class TagCooccurrence:
+    """
+    Pages mentioning both tags of each pair, out of n_pages; the diagonal holds the
+    pages mentioning each tag.
+    """
 
-    where_sql = " AND ".join(where_clauses)
+    tags: list[str]
+    counts: np.ndarray
+    n_pages: int
 
+    def lift(self) -> np.ndarray:
+        """P(a, b) / (P(a) P(b)): above 1 when tags appear together more than by chance."""
+        freq = np.diag(self.counts).astype(np.float64)
+        expected = np.outer(freq, freq) / max(self.n_pages, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(expected > 0, self.counts / expected, 0.0)
+
+    def pmi(self) -> np.ndarray:
+        """Pointwise mutual information in bits; -inf for tags never seen together."""
+        with np.errstate(divide="ignore"):
+            return np.log2(self.lift())
+
+    def pairs(self, min_count: int = 2) -> list[tuple[str, str, int, float, float]]:
+        """(tag, tag, count, lift, pmi) of the pairs seen together at least min_count times, by PMI."""
+        lift, pmi = self.lift(), self.pmi()
+        rows, cols = np.triu_indices(len(self.tags), k=1)
+        keep = self.counts[rows, cols] >= max(min_count, 1)
+        rows, cols = rows[keep], cols[keep]
+        order = np.lexsort((-self.counts[rows, cols], -pmi[rows, cols]))
+        return [
+            (
+                self.tags[i],
+                self.tags[j],
+                int(self.counts[i, j]),
+                float(lift[i, j]),
+                float(pmi[i, j]),
+            )
+            for i, j in zip(rows[order], cols[order])
+        ]
+
+
+def get_tag_weeks(
+    db_path_or_conn, start_date=None, end_date=None, level=None, kind=None
+) -> TagWeeks:
+    """Weekly tag counts in a given period, level and kind, most frequent tags first."""
+    if isinstance(db_path_or_conn, sqlite3.Connection):
+        return _get_tag_weeks(db_path_or_conn, start_date, end_date, level, kind)
+    else:
+        with connect(db_path_or_conn) as conn:
+            return _get_tag_weeks(conn, start_date, end_date, level, kind)
+
+
+def _get_tag_weeks(conn, start_date=None, end_date=None, level=None, kind=None):
+    query, params = _tag_weeks_query(start_date, end_date, level, kind)
+    rows = conn.execute(query, params).fetchall()
+    if not rows:
+        return TagWeeks([], [], np.zeros((0, 0), dtype=np.int64))
+
+    names, weeks, counts = zip(*rows)
+    weeks = np.array(weeks, dtype="datetime64[D]")
+    first = _monday(start_date) if start_date else weeks.min()
+    last = _monday(end_date) if end_date else weeks.max()
+    columns = np.arange(first, last + 1, 7)
+
+    tags, tag_idx = np.unique(np.array(names, dtype=object), return_inverse=True)
+    matrix = np.zeros((len(tags), len(columns)), dtype=np.int64)
+    matrix[tag_idx, (weeks - first).astype(np.int64) // 7] = counts
+
+    order = np.lexsort((tags, -matrix.sum(axis=1)))
+    return TagWeeks(
+        tags=[str(t) for t in tags[order]],
+        weeks=[str(w) for w in columns],
+        counts=matrix[order],
+    )
+
+
+def get_tag_cooccurrence(
+    db_path_or_conn, start_date=None, end_date=None, level=None, kind=None
+) -> TagCooccurrence:
+    """Tag co-occurrence counts over the pages of a given period, level and kind."""
+    if isinstance(db_path_or_conn, sqlite3.Connection):
+        return _get_tag_cooccurrence(db_path_or_conn, start_date, end_date, level, kind)
+    else:
+        with connect(db_path_or_conn) as conn:
+            return _get_tag_cooccurrence(conn, start_date, end_date, level, kind)
+
+
+def _get_tag_cooccurrence(conn, start_date=None, end_date=None, level=None, kind=None):
+    where_sql, params = _page_filters(start_date, end_date, level, kind)
+    n_pages = conn.execute(
+        f"SELECT COUNT(*) FROM pages p WHERE {where_sql}", params
+    ).fetchone()[0]
+    query, params = _tag_cooccurrence_query(start_date, end_date, level, kind)
+    rows = conn.execute(query, params).fetchall()
+    if not rows:
+        return TagCooccurrence([], np.zeros((0, 0), dtype=np.int64), n_pages)
+
+    page_ids, names = zip(*rows)
+    _, page_idx = np.unique(np.array(page_ids), return_inverse=True)
+    tags, tag_idx = np.unique(np.array(names, dtype=object), return_inverse=True)
+    # Page x tag incidence matrix; its Gram matrix counts the pages shared by each pair.
+    incidence = np.zeros((page_idx.max() + 1, len(tags)), dtype=np.float32)
+    incidence[page_idx, tag_idx] = 1
+    counts = np.rint(incidence.T @ incidence).astype(np.int64)
+    return TagCooccurrence([str(t) for t in tags], counts, n_pages)
+
+
+def _tag_weeks_query(start_date=None, end_date=None, level=None, kind=None):
+    where_sql, params = _page_filters(start_date, end_date, level, kind)
     query = f"""
-        SELECT t.name, p.source_date, p.kind, p.level, p.path
-        FROM tags t
-        JOIN tag_occurrences toc ON t.id = toc.tag_id
-        JOIN pages p ON toc.page_id = p.id
+        SELECT t.name, date(p.source_date, 'weekday 0', '-6 days') AS week, COUNT(*)
+        FROM pages p
+        JOIN tag_occurrences toc ON toc.page_id = p.id
+        JOIN tags t ON t.id = toc.tag_id
         WHERE {where_sql}
-        ORDER BY t.name ASC, p.source_date DESC
+        GROUP BY t.name, week
     """
+    return query, params
 
-    return conn.execute(query, params).fetchall()
+
+def _tag_cooccurrence_query(start_date=None, end_date=None, level=None, kind=None):
+    where_sql, params = _page_filters(start_date, end_date, level, kind)
+    query = f"""
+        SELECT toc.page_id, t.name
+        FROM pages p
+        JOIN tag_occurrences toc ON toc.page_id = p.id
+        JOIN tags t ON t.id = toc.tag_id
+        WHERE {where_sql}
+    """
+    return query, params
+
+
+def shipped_queries() -> dict[str, tuple[str, list]]:
+    """The queries run by aww, with typical parameters, for `aww db explain`."""
+    today = datetime.date.today()
+    start, end = (today - datetime.timedelta(days=365)).isoformat(), today.isoformat()
+    return {
+        "tags frequency": _tags_frequency_query(),
+        "tags frequency (period, level)": _tags_frequency_query(start, end, "daily"),
+        "tags frequency (level)": _tags_frequency_query(level="daily"),
+        "tags references (period, level)": _tags_references_query(start, end, "daily"),
+        "tag weeks (level)": _tag_weeks_query(level="daily"),
+        "tag co-occurrence (period, level)": _tag_cooccurrence_query(start, end, "daily"),
+        "save page: find page": (
+            "SELECT id FROM pages WHERE source_date=? AND kind=? AND level=? AND path=?",
+            [end, "journal", "daily", "page.md"],
+        ),
+        "save page: clear tags": (
+            "DELETE FROM tag_occurrences WHERE page_id = ?",
+            [1],
+        ),
+    }
+
+
+def query_plan(conn, query: str, params=()) -> list[str]:
+    """The EXPLAIN QUERY PLAN steps of a query, indented by nesting."""
+    depths = {0: -1}
+    plan = []
+    for node_id, parent, _, detail in conn.execute(f"EXPLAIN QUERY PLAN {query}", params):
+        depths[node_id] = depths.get(parent, -1) + 1
+        plan.append("  " * depths[node_id] + detail)
+    return plan
+
+
+def time_query(conn, query: str, params=(), repeat: int = 5) -> float:
+    """Best wall time of a query in seconds, over `repeat` runs (in a rolled back transaction)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute("SAVEPOINT time_query")
+        try:
+            conn.execute(query, params).fetchall()
+        finally:
+            conn.execute("ROLLBACK TO time_query")
+            conn.execute("RELEASE time_query")
+        best = min(best, time.perf_counter() - start)
+    return best
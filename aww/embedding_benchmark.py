@@ -0,0 +1,120 @@
+"""Compare sentence-transformers inference backends on vault pages.
+
+Every backend is measured against the full precision PyTorch model: throughput
+in documents per second, recall@k of query results, and the mean cosine
+similarity between the document embeddings.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, List
+
+import numpy as np
+
+from aww.obsidian import Vault
+
+REFERENCE_BACKEND = "torch"
+
+
+@dataclass
+class BackendReport:
+    backend: str
+    docs_per_second: float = 0.0
+    recall_at_k: float = 0.0
+    mean_cosine: float = 0.0
+    error: str | None = None
+
+
+def sample_vault_texts(vault: Vault, limit: int = 200, seed: int = 0) -> List[str]:
+    """Return up to `limit` non-empty page texts, sampled reproducibly."""
+    texts = []
+    for page in vault.walk():
+        try:
+            content = page.content().strip()
+        except UnicodeDecodeError:
+            continue
+        if content:
+            texts.append(content)
+    if len(texts) > limit:
+        texts = random.Random(seed).sample(texts, limit)
+    return texts
+
+
+def make_queries(texts: List[str], count: int = 20, seed: int = 0) -> List[str]:
+    """Use the opening words of some documents as queries."""
+    sample = random.Random(seed).sample(texts, min(count, len(texts)))
+    return [" ".join(text.split()[:20]) for text in sample]
+
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall_at_k(reference: np.ndarray, candidate: np.ndarray) -> float:
+    hits = [
+        len(set(ref) & set(cand)) / len(ref) for ref, cand in zip(reference, candidate)
+    ]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def _encode(model, texts: List[str], batch_size: int) -> np.ndarray:
+    return np.asarray(
+        model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        ),
+        dtype=np.float32,
+    )
+
+
+def benchmark_backends(
+    texts: List[str],
+    queries: List[str],
+    load_model: Callable[[str], object],
+    backends: Iterable[str],
+    k: int = 10,
+    batch_size: int = 32,
+) -> List[BackendReport]:
+    """Benchmark each backend, using the full precision model as reference.
+
+    Backends that fail to load are reported with their error instead of
+    aborting the whole run.
+    """
+    k = min(k, len(texts))
+    reference_model = load_model(REFERENCE_BACKEND)
+    start = time.perf_counter()
+    reference_docs = _encode(reference_model, texts, batch_size)
+    reference_elapsed = time.perf_counter() - start
+    reference_top = top_k(reference_docs, _encode(reference_model, queries, batch_size), k)
+
+    reports = []
+    for backend in backends:
+        if backend == REFERENCE_BACKEND:
+            reports.append(
+                BackendReport(backend, len(texts) / reference_elapsed, 1.0, 1.0)
+            )
+            continue
+        try:
+            model = load_model(backend)
+        except Exception as exc:
+            reports.append(BackendReport(backend, error=str(exc)))
+            continue
+        start = time.perf_counter()
+        docs = _encode(model, texts, batch_size)
+        elapsed = time.perf_counter() - start
+        candidate_top = top_k(docs, _encode(model, queries, batch_size), k)
+        reports.append(
+            BackendReport(
+                backend,
+                docs_per_second=len(texts) / elapsed,
+                recall_at_k=recall_at_k(reference_top, candidate_top),
+                mean_cosine=float(np.mean(np.sum(reference_docs * docs, axis=1))),
+            )
+        )
+    return reports
@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import importlib.util
+import json
+from pathlib import Path
+
+from huggingface_hub import hf_hub_download
 from sentence_transformers import CrossEncoder
 from sentence_transformers import SentenceTransformer
 
+# Inference backends for sentence-transformers models: full precision PyTorch,
+# PyTorch with dynamic int8 quantization of the linear layers, and the ONNX
+# Runtime and OpenVINO backends (which need the matching optional extras).
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "openvino")
+
 
 def local_model_error_message(model_name: str) -> str:
     return (
@@ -20,21 +30,102 @@ def load_sentence_transformer(
     local_files_only: bool = True,
     token: bool | str | None = False,
     cache_folder: str | None = None,
+    backend: str = "torch",
+    truncate_dim: int | None = None,
 ) -> SentenceTransformer:
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend '{backend}', must be one of {EMBEDDING_BACKENDS}"
+        )
+    if backend in ("onnx", "openvino") and importlib.util.find_spec("optimum") is None:
+        raise RuntimeError(
+            f"The {backend} embedding backend requires extra packages: "
+            f"pip install 'sentence-transformers[{backend}]'"
+        )
+
     try:
-        return SentenceTransformer(
+        model = SentenceTransformer(
             model_name,
             device=device,
             trust_remote_code=trust_remote_code,
             local_files_only=local_files_only,
             token=token,
             cache_folder=cache_folder,
+            backend="torch" if backend == "torch-int8" else backend,
+            truncate_dim=truncate_dim,
         )
     except Exception as exc:
         if local_files_only:
             raise RuntimeError(local_model_error_message(model_name)) from exc
         raise
 
+    if backend == "torch-int8":
+        import torch
+
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return model
+
+
+# Pooling modes whose outputs sentence-transformers concatenates.
+POOLING_MODES = (
+    "pooling_mode_cls_token",
+    "pooling_mode_mean_tokens",
+    "pooling_mode_max_tokens",
+    "pooling_mode_mean_sqrt_len_tokens",
+    "pooling_mode_weightedmean_tokens",
+    "pooling_mode_lasttoken",
+)
+
+
+def resolve_embedding_dim(
+    model_name: str,
+    *,
+    local_files_only: bool = True,
+    token: bool | str | None = False,
+    cache_folder: str | None = None,
+) -> int | None:
+    """Reads the embedding dimension of a sentence-transformers model from its
+    config files, without loading the weights. Returns None if unknown."""
+    candidates = [model_name]
+    if "/" not in model_name:
+        # sentence-transformers resolves bare names in its own namespace.
+        candidates.append(f"sentence-transformers/{model_name}")
+
+    for repo_id in candidates:
+
+        def read_json(filename):
+            try:
+                if Path(repo_id).is_dir():
+                    path = Path(repo_id) / filename
+                else:
+                    path = hf_hub_download(
+                        repo_id,
+                        filename,
+                        local_files_only=local_files_only,
+                        token=token,
+                        cache_dir=cache_folder,
+                    )
+                return json.loads(Path(path).read_text())
+            except Exception:
+                return None
+
+        # The last Dense or Pooling module determines the output size.
+        for module in reversed(read_json("modules.json") or []):
+            config = read_json(f"{module['path']}/config.json") or {}
+            if module["type"].endswith("Dense") and "out_features" in config:
+                return config["out_features"]
+            if module["type"].endswith("Pooling") and "word_embedding_dimension" in config:
+                modes = sum(bool(config.get(mode)) for mode in POOLING_MODES)
+                return config["word_embedding_dimension"] * max(modes, 1)
+
+        config = read_json("config.json") or {}
+        for key in ("hidden_size", "d_model", "dim"):
+            if key in config:
+                return config[key]
+    return None
+
 
 def load_cross_encoder(
     model_name: str,
@@ -6,6 +6,8 @@ Provides classes and functions for working with Obsidian-style markdown vaults,
 import enum
 import os
 import re
+import tempfile
+import threading
 from dataclasses import dataclass
 from datetime import date, time
 from pathlib import Path
@@ -29,6 +31,21 @@ class Level(enum.Enum):
     yearly = "yearly"
 
 
+@dataclass(frozen=True)
+class PageInfo:
+    """Structured metadata derived from where a page lives in the vault."""
+
+    kind: str
+    level: Level | None = None
+    source_date: date | None = None
+    # Number of a previous version kept by VersionedPageWriter (r2025-03-30.1.md),
+    # None for the current page.
+    version: int | None = None
+
+
+PAGE_KINDS = ("journal", "retrospective", "query", "other")
+
+
 @dataclass(frozen=True)
 class Skill:
     """Metadata for a vault skill file."""
@@ -102,6 +119,41 @@ class Vault:
             d, level, f"{self.queries_dir}/{query_id}", self._RETRO_TEMPLATES
         )
 
+    def page_info(self, page: "Page") -> PageInfo:
+        """Classify a page by kind, and parse its level and date from its name."""
+        try:
+            rel_path = page.path.relative_to(self.path).as_posix()
+        except ValueError:
+            return PageInfo("other")
+
+        for kind, base_folder in (
+            ("query", self.queries_dir),
+            ("retrospective", self.retrospectives_dir),
+            ("journal", self.journal_dir),
+        ):
+            if rel_path.startswith(base_folder.rstrip("/") + "/"):
+                break
+        else:
+            return PageInfo("other")
+
+        m = PAGE_NAME_RE.match(page.name)
+        if not m:
+            return PageInfo(kind)
+        year, week, month, day, version = m.groups()
+        version = int(version) if version else None
+        try:
+            if week:
+                source_date = date.fromisocalendar(int(year), int(week), 1)
+                return PageInfo(kind, Level.weekly, source_date, version)
+            if day:
+                source_date = date(int(year), int(month), int(day))
+                return PageInfo(kind, Level.daily, source_date, version)
+            if month:
+                return PageInfo(kind, Level.monthly, date(int(year), int(month), 1), version)
+            return PageInfo(kind, Level.yearly, date(int(year), 1, 1), version)
+        except ValueError:
+            return PageInfo(kind)
+
     def skills_dir(self) -> Path:
         """Return the vault's conventional skills directory."""
         return self.path / "skills"
@@ -389,7 +441,77 @@ class Page:
         return tags
 
 
+# Matches the names produced by Vault._PAGE_TEMPLATES and Vault._RETRO_TEMPLATES,
+# including the numbered versions of regenerated retrospectives (e.g. r2025-04-01.1).
+PAGE_NAME_RE = re.compile(
+    r"^[rY]?(\d{4})(?:-W(\d{2})|-(\d{2})(?:-(\d{2}))?)?(?:\.(\d+))?$"
+)
 EVENT_RE = re.compile(r"^(\d\d):(\d\d)(?:\s*-\s*(\d\d):(\d\d))?\s+(.*)$")
 TASK_RE = re.compile(r"\s*- \[(.)] (.*)$")
 FEEDBACK_RE = re.compile(r"^#feedback\s+(.*)$")
+VERSION_RE = re.compile(r"^(.+)\.(\d+)\.md$")
 TAG_RE = re.compile(r"(?:^|\s)#([a-zA-Z_/-][a-zA-Z0-9_/-]*)")
+
+
+def atomic_write_text(path: Path, text: str):
+    """Write text to a file atomically: readers see either the old or the new content."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+class VersionedPageWriter:
+    """
+    Writes pages atomically, keeping previous versions as numbered siblings
+    (page.md -> page.1.md, page.2.md, ...).
+    The highest version of each page is found with one scan per directory and
+    then tracked in memory, so saving does not probe every existing version.
+    """
+
+    def __init__(self):
+        self._versions: dict[Path, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _directory_versions(self, directory: Path) -> dict[str, int]:
+        if directory not in self._versions:
+            versions = {}
+            if directory.exists():
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        m = VERSION_RE.match(entry.name)
+                        if m:
+                            stem, version = m.group(1), int(m.group(2))
+                            versions[stem] = max(versions.get(stem, 0), version)
+            self._versions[directory] = versions
+        return self._versions[directory]
+
+    def write(self, path: Path, text: str) -> Path | None:
+        """
+        Write text to path. An existing file is first moved to the next free version.
+        Returns the path of the previous version, if any.
+        """
+        with self._lock:
+            versions = self._directory_versions(path.parent)
+            previous = None
+            if path.exists():
+                version = versions.get(path.stem, 0) + 1
+                # Another process may have added versions since the scan.
+                while (
+                    previous := path.with_suffix(f".{version}{path.suffix}")
+                ).exists():
+                    version += 1
+                os.rename(path, previous)
+                versions[path.stem] = version
+            atomic_write_text(path, text)
+            return previous
@@ -0,0 +1,193 @@
+"""
+Page embeddings and 2D projections for the tags analysis page.
+Vectors are taken from the LanceDB index when it has an up-to-date row for the
+page, otherwise from a cache keyed by content hash, so each page is encoded once.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from aww.obsidian import Page, Vault
+from aww.rag import Index, build_filter
+
+# 2D projections, from fastest to slowest. opentsne and umap need the
+# `projections` extra.
+PROJECTIONS = ("pca", "tsne", "opentsne", "umap")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Vectors keyed by content hash, stored in one .npz file per embedding model."""
+
+    def __init__(self, cache_dir: Path | str, model_key: str):
+        name = re.sub(r"[^\w.-]+", "_", model_key).strip("_")
+        self.path = Path(cache_dir) / f"{name}.npz"
+        self.vectors: dict[str, np.ndarray] = {}
+        self.dirty = False
+        if self.path.exists():
+            with np.load(self.path) as data:
+                self.vectors = dict(zip(data["keys"].tolist(), data["vectors"]))
+
+    def get(self, key: str) -> np.ndarray | None:
+        return self.vectors.get(key)
+
+    def put(self, key: str, vector):
+        self.vectors[key] = np.asarray(vector, dtype=np.float32)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        keys = list(self.vectors)
+        with self.path.open("wb") as f:
+            np.savez(
+                f,
+                keys=np.array(keys),
+                vectors=np.stack([self.vectors[k] for k in keys]),
+            )
+        self.dirty = False
+
+
+def index_vectors(
+    index: Index,
+    vault: Vault,
+    pages: list[Page],
+    *,
+    start_date=None,
+    end_date=None,
+    kind=None,
+    level=None,
+) -> dict[Path, np.ndarray]:
+    """
+    Vectors stored in the index for the pages, if their rows are up to date. The
+    filters, as in ``Index.search``, restrict the rows read to those of the pages.
+    """
+    if index.tbl is None:
+        return {}
+    ids = {page.path.relative_to(vault.path).as_posix(): page for page in pages}
+    if not ids:
+        return {}
+    where = build_filter(start_date, end_date, kind, level)
+    row_count = index.tbl.count_rows(where)
+    if not row_count:
+        return {}
+    # Read the three columns of the matching rows and join on id here, rather than
+    # filtering by id in SQL.
+    rows = index.tbl.search()
+    if where:
+        rows = rows.where(where, prefilter=True)
+    rows = rows.select(["id", "mtime_ns", "vector"]).limit(row_count).to_arrow()
+    vectors = {}
+    for row_id, mtime_ns, vector in zip(
+        rows["id"].to_pylist(), rows["mtime_ns"].to_pylist(), rows["vector"]
+    ):
+        page = ids.get(row_id)
+        if page is not None and mtime_ns == page.mtime_ns():
+            vectors[page.path] = np.asarray(vector.values, dtype=np.float32)
+    return vectors
+
+
+def page_embeddings(
+    pages: list[Page],
+    contents: list[str],
+    encode: Callable[[list[str]], list],
+    cache: EmbeddingCache,
+    stored: dict[Path, np.ndarray] | None = None,
+) -> np.ndarray:
+    """
+    Return one normalized vector per page: the `stored` (index) vector if any, else
+    the cached one for its content, else a new one from `encode`, in a single batch.
+    """
+    stored = stored or {}
+    vectors: list[np.ndarray | None] = []
+    missing = {}
+    for page, content in zip(pages, contents):
+        vector = stored.get(page.path)
+        if vector is None:
+            key = content_hash(content)
+            vector = cache.get(key)
+            if vector is None:
+                missing.setdefault(key, content)
+        vectors.append(vector)
+
+    if missing:
+        for key, vector in zip(missing, encode(list(missing.values()))):
+            cache.put(key, vector)
+        cache.save()
+        vectors = [
+            v if v is not None else cache.get(content_hash(c))
+            for v, c in zip(vectors, contents)
+        ]
+
+    matrix = np.stack(vectors).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def available_projections() -> list[str]:
+    """The projections usable with the installed packages."""
+    available = ["pca", "tsne"]
+    for method, module in (("opentsne", "openTSNE"), ("umap", "umap")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        available.append(method)
+    return available
+
+
+def pca(vectors: np.ndarray, n_components: int = 2) -> np.ndarray:
+    centered = vectors - vectors.mean(axis=0)
+    u, s, _ = np.linalg.svd(centered, full_matrices=False)
+    return u[:, :n_components] * s[:n_components]
+
+
+def project(
+    vectors: np.ndarray, method: str = "tsne", perplexity: float = 30, seed: int = 42
+) -> np.ndarray:
+    """
+    Project vectors to 2D. t-SNE variants start from the PCA layout, which converges
+    in fewer iterations and keeps the layout stable between runs.
+    """
+    if method not in PROJECTIONS:
+        raise ValueError(f"Invalid projection '{method}', must be one of {PROJECTIONS}")
+    if method == "pca" or len(vectors) < 4:
+        return pca(vectors)
+    perplexity = min(perplexity, len(vectors) - 1)
+
+    match method:
+        case "tsne":
+            from sklearn.manifold import TSNE
+
+            return TSNE(
+                n_components=2,
+                perplexity=perplexity,
+                random_state=seed,
+                init="pca",
+                learning_rate="auto",
+            ).fit_transform(vectors)
+        case "opentsne":
+            from openTSNE import TSNE
+
+            return np.asarray(
+                TSNE(
+                    perplexity=perplexity,
+                    initialization="pca",
+                    metric="cosine",
+                    random_state=seed,
+                ).fit(vectors)
+            )
+        case "umap":
+            import umap
+
+            return umap.UMAP(
+                n_neighbors=min(15, len(vectors) - 1), metric="cosine", random_state=seed
+            ).fit_transform(vectors)
@@ -0,0 +1,188 @@
+"""
+Index of the questions asked with `ask --recursive`, kept in queries.json under
+data_path. Questions are identified by a fingerprint of their normalized text, so
+questions differing only in case, spacing or punctuation share the cached map
+results under retrospectives/queries/<id>. Rewordings only share them with --similarity.
+Query trees from before the index, named after a hash of the raw question, are
+adopted into it on first use.
+"""
+
+import datetime
+import hashlib
+import json
+import math
+import re
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+from aww.config import Settings
+from aww.obsidian import Vault, atomic_write_text
+
+
+def normalize_question(prompt: str) -> str:
+    """Lowercase words of the question, without punctuation and extra whitespace."""
+    return " ".join(re.findall(r"[\w/-]+", prompt.lower()))
+
+
+def fingerprint(prompt: str) -> str:
+    """Query id of a question: equal for questions that normalize to the same text."""
+    normalized = normalize_question(prompt) or prompt.strip().lower()
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()[:8]
+
+
+def legacy_id(prompt: str) -> str:
+    """Query id of a question before the index: a hash of its raw text."""
+    return hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8]
+
+
+def cosine_similarity(a: list[float], b: list[float]) -> float:
+    if len(a) != len(b):
+        return 0.0
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    if not norm:
+        return 0.0
+    return sum(x * y for x, y in zip(a, b)) / norm
+
+
+@dataclass
+class QueryEntry:
+    """A query tree and the questions that were answered from it."""
+
+    questions: list[str]
+    created: str
+    last_used: str
+    embedding: list[float] | None = None
+    embedding_model: str | None = None
+
+
+@dataclass
+class Resolution:
+    query_id: str
+    # How the question was matched: "new", "fingerprint" or "similar".
+    match: str
+
+    @property
+    def reused(self) -> bool:
+        return self.match != "new"
+
+
+class QueryIndex:
+    """The queries.json index of past recursive questions."""
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.entries: dict[str, QueryEntry] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+            except json.JSONDecodeError:
+                data = {}
+            self.entries = {qid: QueryEntry(**e) for qid, e in data.items()}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "QueryIndex":
+        return cls(Path(settings.data_path).expanduser() / "queries.json")
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(
+            self.path,
+            json.dumps({qid: asdict(e) for qid, e in self.entries.items()}, indent=2),
+        )
+
+    def resolve(
+        self,
+        prompt: str,
+        embed: Callable[[str], list[float]] | None = None,
+        embedding_model: str | None = None,
+        threshold: float = 0.9,
+    ) -> Resolution:
+        """
+        Return the query id to answer the prompt with, and record its use.
+        Questions with the same fingerprint as a past one share its id; with
+        `embed`, so do questions at least `threshold` similar to a past one.
+        """
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        query_id, match = fingerprint(prompt), "new"
+        for qid, entry in self.entries.items():
+            if qid == query_id or any(fingerprint(q) == query_id for q in entry.questions):
+                query_id, match = qid, "fingerprint"
+                break
+
+        embedding = None
+        if embed is not None:
+            embedding = [float(x) for x in embed(normalize_question(prompt))]
+            if match == "new":
+                best, best_score = None, threshold
+                for qid, entry in self.entries.items():
+                    if entry.embedding is None or entry.embedding_model != embedding_model:
+                        continue
+                    score = cosine_similarity(embedding, entry.embedding)
+                    if score >= best_score:
+                        best, best_score = qid, score
+                if best is not None:
+                    query_id, match = best, "similar"
+
+        entry = self.entries.get(query_id)
+        if entry is None:
+            entry = self.entries[query_id] = QueryEntry(
+                questions=[], created=now, last_used=now
+            )
+        if prompt not in entry.questions:
+            entry.questions.append(prompt)
+        if entry.embedding is None and embedding is not None:
+            entry.embedding, entry.embedding_model = embedding, embedding_model
+        entry.last_used = now
+        self.save()
+        return Resolution(query_id, match)
+
+    def stale(self, older_than: datetime.timedelta) -> list[str]:
+        """Ids of the queries last used before `older_than` ago."""
+        cutoff = (datetime.datetime.now() - older_than).isoformat(timespec="seconds")
+        return [qid for qid, e in self.entries.items() if e.last_used < cutoff]
+
+    def adopt_legacy(self, vault: Vault) -> list[str]:
+        """
+        Add the legacy query trees on disk to the index, so that they are reused and
+        pruned like the others: those whose query.md holds the question their name is
+        the legacy id of. Returns the adopted ids.
+        """
+        adopted = []
+        for qid in self.orphans(vault):
+            query_file = vault.path / vault.queries_dir / qid / "query.md"
+            try:
+                prompt = query_file.read_text()
+            except (FileNotFoundError, UnicodeDecodeError):
+                continue
+            if legacy_id(prompt) != qid:
+                continue
+            mtime = datetime.datetime.fromtimestamp(query_file.stat().st_mtime)
+            used = mtime.isoformat(timespec="seconds")
+            self.entries[qid] = QueryEntry(questions=[prompt], created=used, last_used=used)
+            adopted.append(qid)
+        if adopted:
+            self.save()
+        return adopted
+
+    def orphans(self, vault: Vault) -> list[str]:
+        """Ids of the query trees on disk that are not in the index."""
+        queries_dir = vault.path / vault.queries_dir
+        if not queries_dir.is_dir():
+            return []
+        return sorted(
+            p.name for p in queries_dir.iterdir() if p.is_dir() and p.name not in self.entries
+        )
+
+    def prune(self, vault: Vault, query_ids: list[str]) -> int:
+        """Delete the query trees and their entries; returns the number of files removed."""
+        removed = 0
+        for qid in query_ids:
+            query_dir = vault.path / vault.queries_dir / qid
+            if query_dir.is_dir():
+                removed += sum(1 for p in query_dir.rglob("*") if p.is_file())
+                shutil.rmtree(query_dir)
+            self.entries.pop(qid, None)
+        self.save()
+        return removed
@@ -1,7 +1,10 @@
+import datetime
 import json
 import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Union
+from typing import Iterable, List, Optional, Union
 
 from pydantic import ConfigDict
 import lancedb
@@ -23,19 +26,43 @@ import pyarrow as pa
 from lancedb.table import Table
 
 from aww.config import Settings
-from aww.huggingface import load_cross_encoder, load_sentence_transformer
+from aww.huggingface import (
+    load_cross_encoder,
+    load_sentence_transformer,
+    resolve_embedding_dim,
+)
+from aww.obsidian import PAGE_KINDS, Level, atomic_write_text
+
+# Scalar columns used for pre-filtering, with the index type that suits them.
+SCALAR_INDEXES = {
+    "mtime_ns": "BTREE",
+    "source_date": "BTREE",
+    "kind": "BITMAP",
+    "level": "BITMAP",
+}
+
+# Storage types for the vector column. float16 halves the table and index
+# size; the IVF_HNSW_SQ index already keeps scalar-quantized int8 codes.
+VECTOR_DTYPES = {
+    "float32": pa.float32(),
+    "float16": pa.float16(),
+}
 
 
-def get_page_schema(model) -> LanceModel:
-    """Creates a Pydantic model for a Page with a vector of the correct dimension."""
+def get_page_schema(ndims: int, vector_dtype: str = "float32") -> LanceModel:
+    """Creates a Pydantic model for a Page with a vector of the given dimension."""
 
     class Page(LanceModel):
         id: str
         path: str
         mtime_ns: int
+        source_date: Optional[str]
+        kind: str
+        level: Optional[str]
+        version: Optional[int]
         frontmatter: str
         text: str
-        vector: Vector(model.ndims())
+        vector: Vector(ndims, value_type=VECTOR_DTYPES[vector_dtype])
 
         model_config = ConfigDict(
             text_key="text",
@@ -51,11 +78,19 @@ class Index:
     db_path: Path
     embedding_model_provider: str
     embedding_model_name: str
+    embedding_backend: str
+    truncate_dim: int | None
+    vector_dtype: str
+    refine_factor: int | None
     local_files_only: bool
     cache_dir: str | None
     reranker_model_name: str
+    query_cache_size: int
+    query_cache_path: Path | None
+    models_path: Path
     db: DBConnection
     model: EmbeddingFunction | None
+    reranker: "LocalCrossEncoderReranker | None"
     tbl: Table | None
 
     @classmethod
@@ -64,8 +99,14 @@ class Index:
             settings.data_path,
             settings.rag.provider,
             settings.rag.model_name,
+            embedding_backend=settings.rag.backend,
+            truncate_dim=settings.rag.truncate_dim,
+            vector_dtype=settings.rag.vector_dtype,
+            refine_factor=settings.rag.refine_factor,
             local_files_only=settings.rag.local_files_only,
             cache_dir=settings.rag.cache_dir,
+            query_cache_size=settings.rag.query_cache_size,
+            persist_query_cache=settings.rag.persist_query_cache,
         )
 
     def __init__(
@@ -73,18 +114,39 @@ class Index:
         data_path: Path | str,
         embedding_model_provider: str = "sentence-transformers",
         embedding_model_name: str = "all-mpnet-base-v2",
+        embedding_backend: str = "torch",
+        truncate_dim: int | None = None,
+        vector_dtype: str = "float32",
+        refine_factor: int | None = None,
         local_files_only: bool = True,
         cache_dir: str | None = None,
         reranker_model_name: str = "cross-encoder/ms-marco-TinyBERT-L-6",
+        query_cache_size: int = 256,
+        persist_query_cache: bool = False,
     ):
         self.db_path = Path(data_path) / "index"
         self.embedding_model_provider = embedding_model_provider
         self.embedding_model_name = embedding_model_name
+        self.embedding_backend = embedding_backend
+        self.truncate_dim = truncate_dim
+        if vector_dtype not in VECTOR_DTYPES:
+            raise ValueError(
+                f"Invalid vector_dtype '{vector_dtype}', must be one of {sorted(VECTOR_DTYPES)}"
+            )
+        self.vector_dtype = vector_dtype
+        self.refine_factor = refine_factor
         self.local_files_only = local_files_only
         self.cache_dir = cache_dir
         self.reranker_model_name = reranker_model_name
+        self.query_cache_size = query_cache_size
+        self.query_cache_path = (
+            Path(data_path) / "query_cache.json" if persist_query_cache else None
+        )
+        self.query_cache = None
+        self.models_path = Path(data_path) / "models.json"
         self.db = lancedb.connect(self.db_path)
         self.model = None
+        self.reranker = None
         self.Page = None
         self.tbl = None
 
@@ -92,6 +154,8 @@ class Index:
         if self.embedding_model_provider == "sentence-transformers":
             return LocalSentenceTransformerEmbeddings.create(
                 name=self.embedding_model_name,
+                backend=self.embedding_backend,
+                truncate_dim=self.truncate_dim,
                 local_files_only=self.local_files_only,
                 cache_folder=self.cache_dir,
                 token=False,
@@ -107,9 +171,103 @@ class Index:
             self.model = self._build_embedding_model()
         return self.model
 
+    def _build_reranker(self) -> "LocalCrossEncoderReranker":
+        return LocalCrossEncoderReranker(
+            model_name=self.reranker_model_name,
+            local_files_only=self.local_files_only,
+            cache_folder=self.cache_dir,
+            token=False,
+        )
+
+    def get_reranker(self) -> "LocalCrossEncoderReranker":
+        if self.reranker is None:
+            self.reranker = self._build_reranker()
+        return self.reranker
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Embeds queries, computing all cache misses in a single batch.
+
+        Embeddings are kept in a bounded LRU cache, optionally persisted to
+        ``query_cache.json`` in the data path, so repeated queries skip model
+        inference entirely.
+        """
+        cache = self._get_query_cache()
+        keys = [" ".join(query.split()) for query in queries]
+
+        missing = list(dict.fromkeys(key for key in keys if key not in cache))
+        if missing:
+            vectors = self.get_model().generate_embeddings(missing)
+            for key, vector in zip(missing, vectors):
+                cache[key] = [float(x) for x in vector]
+
+        embeddings = []
+        for key in keys:
+            cache.move_to_end(key)
+            embeddings.append(cache[key])
+
+        while len(cache) > self.query_cache_size:
+            cache.popitem(last=False)
+        if missing and self.query_cache_path is not None:
+            self.save_query_cache()
+        return embeddings
+
+    def save_query_cache(self):
+        """Writes the query embedding cache to disk."""
+        if self.query_cache_path is None or self.query_cache is None:
+            return
+        # Replaced atomically: an interrupted write must not lose the whole cache.
+        atomic_write_text(
+            self.query_cache_path,
+            json.dumps({"model": self.model_key(), "embeddings": self.query_cache}),
+        )
+
+    def _get_query_cache(self) -> OrderedDict:
+        if self.query_cache is None:
+            self.query_cache = OrderedDict()
+            if self.query_cache_path is not None and self.query_cache_path.exists():
+                # A corrupt cache is dropped: it is rebuilt as queries come in.
+                try:
+                    data = json.loads(self.query_cache_path.read_text())
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    data = None
+                if not isinstance(data, dict) or not isinstance(
+                    data.get("embeddings"), dict
+                ):
+                    data = {}
+                # Embeddings from a different model are not comparable.
+                if data.get("model") == self.model_key():
+                    self.query_cache.update(data["embeddings"])
+        return self.query_cache
+
+    def model_key(self) -> str:
+        """Identifies the embedding model: vectors are comparable only under the same key."""
+        return (
+            f"{self.embedding_model_provider}/{self.embedding_model_name}"
+            f"/{self.embedding_backend}/{self.truncate_dim or 'full'}"
+        )
+
+    def embedding_dims(self) -> int:
+        """Returns the embedding dimension of the model.
+
+        Dimensions are remembered in ``models.json`` in the data path, so
+        opening or validating the table does not need the model.
+        """
+        dims = {}
+        if self.models_path.exists():
+            try:
+                dims = json.loads(self.models_path.read_text())
+            except json.JSONDecodeError:
+                dims = {}
+        key = self.model_key()
+        if key not in dims:
+            dims[key] = self.get_model().ndims()
+            self.models_path.parent.mkdir(parents=True, exist_ok=True)
+            self.models_path.write_text(json.dumps(dims, indent=2))
+        return dims[key]
+
     def get_page_schema(self) -> LanceModel:
         if self.Page is None:
-            self.Page = get_page_schema(self.get_model())
+            self.Page = get_page_schema(self.embedding_dims(), self.vector_dtype)
         return self.Page
 
     def create_table(self, clean=False):
@@ -138,25 +296,60 @@ class Index:
             self.tbl = self.db.open_table("pages")
         except FileNotFoundError:
             self.tbl = None
+        except ValueError as exc:
+            # Newer lancedb versions report a missing table as a ValueError.
+            if "not found" not in str(exc):
+                raise
+            self.tbl = None
 
-    def add_pages(self, vault, since_mtime_ns: int | None = None):
-        """Adds or updates pages from the vault to the index."""
+    def is_outdated(self) -> bool:
+        """Returns True if the open table lacks columns of the current schema,
+        or stores vectors of a different type or dimension."""
+        if self.tbl is None:
+            raise ValueError("Table not created or opened yet.")
+        schema = self.get_page_schema().to_arrow_schema()
+        if not set(schema.names) <= set(self.tbl.schema.names):
+            return True
+        return self.tbl.schema.field("vector").type != schema.field("vector").type
+
+    def add_pages(
+        self,
+        vault,
+        since_mtime_ns: int | None = None,
+        batch_size: int = 256,
+    ):
+        """Adds or updates pages from the vault to the index.
+
+        Pages are keyed by their vault-relative path and upserted in batches
+        with ``merge_insert``, so re-indexing a page replaces its row instead
+        of adding a duplicate.
+        """
         if self.tbl is None:
             raise ValueError("Table not created or opened yet.")
 
         print("Adding/updating pages...")
-        pages_to_process = []
+        num_pages = 0
+        batch = []
         for page in vault.walk():
             if page.path.is_dir():
                 continue
 
             if not since_mtime_ns or page.mtime_ns() > since_mtime_ns:
+                info = vault.page_info(page)
                 try:
-                    pages_to_process.append(
+                    batch.append(
                         {
-                            "id": page.name,
+                            "id": page.path.relative_to(vault.path).as_posix(),
                             "path": str(page.path),
                             "mtime_ns": page.mtime_ns(),
+                            "source_date": (
+                                info.source_date.isoformat()
+                                if info.source_date
+                                else None
+                            ),
+                            "kind": info.kind,
+                            "level": info.level.value if info.level else None,
+                            "version": info.version,
                             "frontmatter": json.dumps(page.frontmatter(), default=str),
                             "text": page.content(),
                         }
@@ -164,19 +357,24 @@ class Index:
                 except (TypeError, FileNotFoundError) as e:
                     print(f"Error processing {page.path}: {e}")
 
-        if pages_to_process:
-            ids_to_update = [p["id"] for p in pages_to_process]
-            if since_mtime_ns and ids_to_update:
-                ids_str = ", ".join([f"'{_id}'" for _id in ids_to_update])
-                try:
-                    self.tbl.delete(f"id IN ({ids_str})")
-                except Exception as e:
-                    print(
-                        f"Could not delete old entries for updating, may result in duplicates: {e}"
-                    )
-
-            self.tbl.add(pages_to_process)
-        return len(pages_to_process)
+            if len(batch) >= batch_size:
+                self._upsert(batch)
+                num_pages += len(batch)
+                batch = []
+
+        if batch:
+            self._upsert(batch)
+            num_pages += len(batch)
+        return num_pages
+
+    def _upsert(self, rows: list[dict]):
+        """Inserts new rows and replaces existing rows with the same id."""
+        (
+            self.tbl.merge_insert("id")
+            .when_matched_update_all()
+            .when_not_matched_insert_all()
+            .execute(rows)
+        )
 
     def get_max_mtime_ns(self) -> int | None:
         """Gets the maximum mtime_ns from the index."""
@@ -196,12 +394,15 @@ class Index:
         print("Creating FTS index...")
         self.tbl.create_fts_index("text", replace=replace)
 
-    def create_scalar_index(self, replace: bool = False):
-        """Creates a scalar index on mtime_ns."""
+    def create_scalar_index(self, replace: bool = False, columns=None):
+        """Creates scalar indices on the columns used for pre-filtering."""
         if self.tbl is None:
             raise ValueError("Table not created or opened yet.")
-        print("Creating scalar index on mtime_ns...")
-        self.tbl.create_scalar_index("mtime_ns", replace=replace)
+        for column in columns or SCALAR_INDEXES:
+            print(f"Creating scalar index on {column}...")
+            self.tbl.create_scalar_index(
+                column, replace=replace, index_type=SCALAR_INDEXES[column]
+            )
 
     def create_vector_index(self, replace: bool = False):
         """Creates the vector index."""
@@ -215,33 +416,242 @@ class Index:
             replace=replace,
         )
 
-    def search(self, query, rag=False) -> pd.DataFrame:
-        """Searches the index."""
+    def index_stats(self) -> list[dict]:
+        """Returns the indexed and unindexed row counts for each index."""
+        if self.tbl is None:
+            raise ValueError("Table not created or opened yet.")
+
+        stats = {}
+        for index in self.tbl.list_indices():
+            # Incremental deltas show up as repeated entries of the same index.
+            if index.name in stats:
+                continue
+            index_stats = self.tbl.index_stats(index.name)
+            stats[index.name] = {
+                "name": index.name,
+                "index_type": index_stats.index_type,
+                "columns": list(index.columns),
+                "indexed_rows": index_stats.num_indexed_rows,
+                "unindexed_rows": index_stats.num_unindexed_rows,
+            }
+        return list(stats.values())
+
+    def update_indices(self, retrain_threshold: float = 0.2):
+        """Brings the indices up to date with the rows added since they were built.
+
+        Missing indices are created. The vector index is retrained from
+        scratch only when the fraction of unindexed rows exceeds
+        ``retrain_threshold``; otherwise new rows are merged into the existing
+        indices incrementally with ``optimize``.
+        """
+        if self.tbl is None:
+            raise ValueError("Table not created or opened yet.")
+
+        by_column = {}
+        for stats in self.index_stats():
+            for column in stats["columns"]:
+                by_column[column] = stats
+
+        if "text" not in by_column:
+            self.create_fts_index()
+        missing_scalar = [c for c in SCALAR_INDEXES if c not in by_column]
+        if missing_scalar:
+            self.create_scalar_index(columns=missing_scalar)
+
+        vector_stats = by_column.get("vector")
+        if vector_stats is None:
+            self.create_vector_index()
+        elif unindexed_fraction(vector_stats) > retrain_threshold:
+            print(
+                f"{unindexed_fraction(vector_stats):.0%} of rows are not in the "
+                "RAG index, retraining it..."
+            )
+            self.create_vector_index(replace=True)
+
+        if any(stats["unindexed_rows"] for stats in self.index_stats()):
+            print("Merging new rows into existing indices...")
+            self.tbl.optimize()
+
+    def search(
+        self,
+        query,
+        rag=False,
+        *,
+        start_date=None,
+        end_date=None,
+        kind=None,
+        level=None,
+        latest: bool = False,
+        limit: int = 10,
+    ) -> pd.DataFrame:
+        """Searches the index.
+
+        ``start_date``, ``end_date``, ``kind`` and ``level`` restrict the
+        search to matching pages, and ``latest`` to current pages, without
+        their numbered previous versions; they are pushed down to LanceDB as a
+        prefilter, so only matching rows are scanned. Returns the ``limit``
+        best pages after reranking.
+        """
         if self.tbl is None:
             raise ValueError("Table not opened yet.")
 
         if rag:
-            query_vector = self.get_model().generate_embeddings([query])[0]
-            results = self.tbl.search(query_vector)
+            query_vector = self.embed_queries([query])[0]
+            results = self._vector_search(query_vector)
         else:
             results = self.tbl.search(query, query_type="fts")
-        results = results.limit(20)
-        reranker = LocalCrossEncoderReranker(
-            model_name=self.reranker_model_name,
-            local_files_only=self.local_files_only,
-            cache_folder=self.cache_dir,
-            token=False,
-        )
+        if where := build_filter(start_date, end_date, kind, level, latest):
+            results = results.where(where, prefilter=True)
+        results = results.limit(max(20, 2 * limit))
+        reranker = self.get_reranker()
         if rag:
-            results = results.rerank(reranker, query_string=query).limit(10)
+            results = results.rerank(reranker, query_string=query).limit(limit)
         else:
-            results = results.rerank(reranker).limit(10)
+            results = results.rerank(reranker).limit(limit)
         return results.to_pandas()
 
+    def search_many(
+        self,
+        queries: list[str],
+        rag=False,
+        *,
+        start_date=None,
+        end_date=None,
+        kind=None,
+        level=None,
+        latest: bool = False,
+        limit: int = 10,
+    ) -> list[pd.DataFrame]:
+        """Searches the index for several queries at once.
+
+        Query embeddings are computed in one batch, the Lance lookups run
+        concurrently, and all (query, document) pairs are reranked in a single
+        cross-encoder batch. Returns one DataFrame of the ``limit`` best pages
+        per query. Filters work as in ``search``.
+        """
+        if self.tbl is None:
+            raise ValueError("Table not opened yet.")
+        if not queries:
+            return []
+
+        if rag:
+            builders = [self._vector_search(v) for v in self.embed_queries(queries)]
+        else:
+            builders = [self.tbl.search(q, query_type="fts") for q in queries]
+        if where := build_filter(start_date, end_date, kind, level, latest):
+            builders = [b.where(where, prefilter=True) for b in builders]
+
+        # Same candidate pool as search, so both rerank the same pages.
+        candidate_limit = max(20, 2 * limit)
+        with ThreadPoolExecutor(max_workers=min(len(builders), 8)) as executor:
+            candidates = list(
+                executor.map(
+                    lambda builder: builder.limit(candidate_limit).to_arrow(), builders
+                )
+            )
+
+        reranked = self.get_reranker().rerank_many(queries, candidates)
+        return [results.slice(0, limit).to_pandas() for results in reranked]
+
+    def matching_dates(
+        self,
+        query: str,
+        rag=False,
+        *,
+        start_date=None,
+        end_date=None,
+        kind=None,
+        level=None,
+        latest: bool = False,
+        limit: int = 10,
+    ) -> set[str]:
+        """Returns the source dates of the pages matching the query.
+
+        A cheap relevance check without reranking: with ``rag`` the ``limit``
+        nearest pages, otherwise up to ``limit`` pages containing any of the
+        query terms. Filters work as in ``search``.
+        """
+        if self.tbl is None:
+            raise ValueError("Table not opened yet.")
+
+        if rag:
+            results = self._vector_search(self.embed_queries([query])[0])
+            columns = ["source_date"]
+        else:
+            results = self.tbl.search(query, query_type="fts")
+            # Selected explicitly: lance deprecates adding it to a projection implicitly.
+            columns = ["source_date", "_score"]
+        if where := build_filter(start_date, end_date, kind, level, latest):
+            results = results.where(where, prefilter=True)
+        table = results.select(columns).limit(limit).to_arrow()
+        return {d for d in table["source_date"].to_pylist() if d}
+
+    def _vector_search(self, query_vector):
+        results = self.tbl.search(query_vector)
+        if self.refine_factor:
+            # Re-score refine_factor times more candidates with the stored
+            # vectors instead of the quantized index codes.
+            results = results.refine_factor(self.refine_factor)
+        return results
+
+
+def build_filter(
+    start_date=None, end_date=None, kind=None, level=None, latest: bool = False
+) -> str | None:
+    """Builds a LanceDB filter expression over the page metadata columns.
+
+    Dates may be ``datetime.date`` objects or ISO strings; ``kind`` and
+    ``level`` may be a single value or an iterable of values. ``latest``
+    excludes the numbered previous versions of pages.
+    """
+    clauses = []
+    if start_date:
+        clauses.append(f"source_date >= '{_iso_date(start_date)}'")
+    if end_date:
+        clauses.append(f"source_date <= '{_iso_date(end_date)}'")
+    if kind:
+        clauses.append(_in_clause("kind", kind, PAGE_KINDS))
+    if level:
+        clauses.append(_in_clause("level", level, [l.value for l in Level]))
+    if latest:
+        clauses.append("version IS NULL")
+    return " AND ".join(clauses) or None
+
+
+def _iso_date(value) -> str:
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if not isinstance(value, datetime.date):
+        value = datetime.date.fromisoformat(str(value))
+    return value.isoformat()
+
+
+def _in_clause(column: str, values, allowed: Iterable[str]) -> str:
+    if isinstance(values, (str, Level)):
+        values = [values]
+    values = [v.value if isinstance(v, Level) else str(v).lower() for v in values]
+    allowed = set(allowed)
+    for value in values:
+        if value not in allowed:
+            raise ValueError(
+                f"Invalid {column} '{value}', must be one of {sorted(allowed)}"
+            )
+    return f"{column} IN ({', '.join(repr(v) for v in values)})"
+
+
+def unindexed_fraction(stats: dict) -> float:
+    """Returns the fraction of rows not yet covered by an index."""
+    total = stats["indexed_rows"] + stats["unindexed_rows"]
+    if not total:
+        return 0.0
+    return stats["unindexed_rows"] / total
+
 
 class LocalSentenceTransformerEmbeddings(TextEmbeddingFunction):
     name: str = "all-MiniLM-L6-v2"
     device: str = "cpu"
+    backend: str = "torch"
+    truncate_dim: int | None = None
     normalize: bool = True
     trust_remote_code: bool = True
     local_files_only: bool = True
@@ -258,7 +668,18 @@ class LocalSentenceTransformerEmbeddings(TextEmbeddingFunction):
 
     def ndims(self):
         if self._ndims is None:
-            self._ndims = len(self.generate_embeddings("foo")[0])
+            # Prefer the model config files, which avoids loading the weights.
+            dims = resolve_embedding_dim(
+                self.name,
+                local_files_only=self.local_files_only,
+                token=self.token,
+                cache_folder=self.cache_folder,
+            )
+            if dims is None:
+                dims = len(self.generate_embeddings(["foo"])[0])
+            elif self.truncate_dim:
+                dims = min(dims, self.truncate_dim)
+            self._ndims = dims
         return self._ndims
 
     def generate_embeddings(
@@ -281,6 +702,8 @@ class LocalSentenceTransformerEmbeddings(TextEmbeddingFunction):
             local_files_only=self.local_files_only,
             token=self.token,
             cache_folder=self.cache_folder,
+            backend=self.backend,
+            truncate_dim=self.truncate_dim,
         )
 
 
@@ -318,3 +741,29 @@ class LocalCrossEncoderReranker(CrossEncoderReranker):
             token=self.token,
             cache_folder=self.cache_folder,
         )
+
+    def rerank_many(
+        self, queries: list[str], result_sets: list[pa.Table]
+    ) -> list[pa.Table]:
+        """Reranks the results of several queries with one model call."""
+        pairs = [
+            [query, passage]
+            for query, results in zip(queries, result_sets)
+            for passage in results[self.column].to_pylist()
+        ]
+        scores = self.model.predict(pairs) if pairs else []
+
+        reranked = []
+        offset = 0
+        for results in result_sets:
+            results = results.append_column(
+                "_relevance_score",
+                pa.array(scores[offset : offset + len(results)], type=pa.float32()),
+            )
+            offset += len(results)
+            if self.score == "relevance":
+                results = results.drop_columns(
+                    [c for c in ("_distance", "_score") if c in results.column_names]
+                )
+            reranked.append(results.sort_by([("_relevance_score", "descending")]))
+        return reranked
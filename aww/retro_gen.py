@@ -2,6 +2,7 @@ import asyncio
 import hashlib
 import logging
 import re
+import time
 from dataclasses import dataclass
 from datetime import date, datetime
 
@@ -9,10 +10,12 @@ import yaml
 from pydantic_ai import Agent
 from pydantic_ai.models import Model
 
+from aww.concurrency import AdaptiveLimiter, CallStats, call_with_retries
 from aww.config import Settings
-from aww.obsidian import Level, Page
+from aww.obsidian import Level, Page, VersionedPageWriter
 from aww.prompts import get_prompt_template
 from aww.retro import CachePolicy, Node, Selection
+from aww.tracing import Span, Tracer
 
 
 def md5(s: str) -> str:
@@ -22,6 +25,9 @@ def md5(s: str) -> str:
 
 MARKDOWN_RE = re.compile("```markdown\n(.*?)\n```", re.DOTALL | re.MULTILINE)
 
+# Output of nodes whose content was all filtered out as irrelevant.
+NO_RELEVANT_CONTENT = "No relevant content."
+
 
 @dataclass
 class RecursiveResult:
@@ -30,6 +36,12 @@ class RecursiveResult:
     dates: list[date]
     output: str
     page: Page
+    # True for placeholders of pruned nodes, which were not sent to the model.
+    pruned: bool = False
+    # True for nodes that failed, or whose sources failed: nothing was saved.
+    failed: bool = False
+    # True for outputs built without some pruned content, which are not saved.
+    partial: bool = False
 
 
 logger = logging.getLogger(__name__)
@@ -65,6 +77,12 @@ async def page_content(node) -> str:
     return "\n".join(content)
 
 
+def cached_tokens(usage) -> int:
+    """Prompt tokens served from the provider's prefix cache, if it reports them."""
+    details = usage.details or {}
+    return details.get("cached_tokens") or details.get("cached_content_tokens") or 0
+
+
 async def prepare_output(node, result, target_page) -> str:
     """Prepare the output for a recursive generation, extracting markdown and formatting the title."""
     output = result.output.strip()
@@ -76,6 +94,45 @@ async def prepare_output(node, result, target_page) -> str:
     return output
 
 
+class SourceSnapshot:
+    """
+    The inputs of a selection, read once and shared by several generators.
+    Cached retrospectives are captured up front, so generators running side by side
+    never pick up each other's freshly written pages as cache hits.
+    """
+
+    def __init__(
+        self,
+        sel: Selection,
+        context_levels: list[Level],
+        get_target_page=None,
+    ):
+        get_target_page = get_target_page or (lambda node: node.retro_page)
+        context_levels = set(context_levels)
+        self.cached: dict[Node, str] = {}
+        self.contents: dict[Node, str] = {}
+
+        # Visit the nodes the generators will reach: cached nodes are not expanded.
+        stack = [sel.root]
+        seen = set()
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            target_page = get_target_page(node)
+            if node.use_cache and target_page and target_page.path.exists():
+                self.cached[node] = target_page.content()
+                continue
+            stack.extend(s for s in node.sources if s.level in context_levels)
+
+    async def page_content(self, node: Node) -> str:
+        """Return the page content of a node, reading it only once."""
+        if node not in self.contents:
+            self.contents[node] = await page_content(node)
+        return self.contents[node]
+
+
 class RecursiveGenerator:
     """
     Generates content recursively for a set of dates and a given level using an AI agent.
@@ -89,14 +146,31 @@ class RecursiveGenerator:
         concurrency_limit: int = 10,
         prompt_prefix: str = "",
         extra_vars: dict = None,
+        prompt_suffix: str | None = None,
+        is_relevant=None,
         get_target_page=None,
+        snapshot: SourceSnapshot | None = None,
+        writer: VersionedPageWriter | None = None,
+        tracer: Tracer | None = None,
+        limiter: AdaptiveLimiter | None = None,
+        max_retries: int = 3,
+        retry_base_delay: float = 1.0,
     ):
         """
         Initialize the generator with model, selection, and other parameters.
         Loads system prompts and sets up agents for each level.
+        System prompts should be static, so that they and the sources form a prefix the
+        model server can cache; per-run content such as a question goes in `prompt_suffix`,
+        the last part of every user prompt.
+        `is_relevant(node)`, if given, filters the node pages sent to the model: nodes
+        left without relevant content get a placeholder instead of an LLM call.
+        LLM calls go through `limiter`, by default an adaptive limiter of at most
+        `concurrency_limit` concurrent calls; pass a shared one to share a server's limits.
         """
         self.extra_vars = extra_vars or {}
         self.prompt_prefix = prompt_prefix
+        self.prompt_suffix = prompt_suffix
+        self.is_relevant = is_relevant
         # Default target page is the retro_page from the node
         self.get_target_page = get_target_page or (lambda node: node.retro_page)
 
@@ -130,7 +204,14 @@ class RecursiveGenerator:
             l: Agent(model=model, system_prompt=self.prompts[l]) for l in Level
         }
         self.sel = sel
-        self.semaphore = asyncio.Semaphore(concurrency_limit)
+        self.snapshot = snapshot
+        self.writer = writer or VersionedPageWriter()
+        self.tracer = tracer
+        self.limiter = limiter or AdaptiveLimiter(concurrency_limit)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        # Nodes whose generation failed after all retries, with the error.
+        self.failures: list[tuple[Node, Exception]] = []
 
     async def run(
         self,
@@ -144,7 +225,10 @@ class RecursiveGenerator:
         """
         for policy in cache_policies:
             self.sel.apply_cache_policy(policy)
-        return await self._generate(self.sel.root, set(context_levels), gather)
+        result = await self._generate(self.sel.root, set(context_levels), gather)
+        if result is not None and result.failed:
+            return None
+        return result
 
     async def _generate(
         self, node: Node, context_levels: set[Level], gather=asyncio.gather
@@ -153,37 +237,80 @@ class RecursiveGenerator:
         Recursively generate content for the given node and its sources.
         Returns a RecursiveResult or None if no content is available.
         """
+        start = time.time()
         target_page = self.get_target_page(node)
 
-        if node.use_cache and target_page and target_page.path.exists():
+        cached_output = None
+        if self.snapshot is not None:
+            cached_output = self.snapshot.cached.get(node)
+        elif node.use_cache and target_page and target_page.path.exists():
+            cached_output = target_page.content()
+        if cached_output is not None:
+            self._trace(node, start, cached=True)
             return RecursiveResult(
                 dates=list(node.dates),
-                output=target_page.content(),
+                output=cached_output,
                 page=target_page,
             )
 
         sources = list(sorted(node.sources))
+        context_sources = [s for s in sources if s.level in context_levels]
 
         source_results = await gather(
-            *[
-                self._generate(source, context_levels, gather)
-                for source in sources
-                if source.level in context_levels
-            ]
+            *[self._generate(source, context_levels, gather) for source in context_sources]
         )
 
-        source_content = [result.output for result in source_results if result]
-        if node.page:
-            source_content.insert(0, await page_content(node))
+        traced_sources = [s.retro_page.name for s in context_sources]
+        failed_sources = [
+            s.retro_page.name
+            for s, r in zip(context_sources, source_results)
+            if r and r.failed
+        ]
+        if failed_sources:
+            # Saving a page without some of its sources would be trusted as cache later.
+            exc = RuntimeError(f"Sources failed: {', '.join(failed_sources)}")
+            return self._fail(node, target_page, start, exc, CallStats(), traced_sources)
+
+        source_content = [
+            result.output for result in source_results if result and not result.pruned
+        ]
+        pruned = any(result and result.pruned for result in source_results)
+        partial = any(result and result.partial for result in source_results)
+        if node.page and self.is_relevant is not None and not self.is_relevant(node):
+            pruned = True
+        elif node.page:
+            if self.snapshot is not None:
+                source_content.insert(0, await self.snapshot.page_content(node))
+            else:
+                source_content.insert(0, await page_content(node))
         if not source_content:
+            if pruned:
+                return RecursiveResult(
+                    dates=list(node.dates),
+                    output=NO_RELEVANT_CONTENT,
+                    page=target_page,
+                    pruned=True,
+                )
             return None
+        if self.prompt_suffix:
+            source_content.append(self.prompt_suffix)
 
         agent = self.agents[node.level]
         model_name = agent.model.model_name
         sys_prompt = self.prompts[node.level]
 
-        async with self.semaphore:
-            result = await agent.run(user_prompt=source_content)
+        stats = CallStats()
+        try:
+            result = await call_with_retries(
+                lambda: agent.run(user_prompt=source_content),
+                self.limiter,
+                max_retries=self.max_retries,
+                base_delay=self.retry_base_delay,
+                stats=stats,
+            )
+        except Exception as exc:
+            # Fail the node without raising, so its siblings can still complete.
+            return self._fail(node, target_page, start, exc, stats, traced_sources)
 
         usage = result.usage()
         frontmatter = dict(
@@ -194,57 +321,153 @@ class RecursiveGenerator:
             request_tokens=usage.request_tokens,
             response_tokens=usage.response_tokens,
             total_tokens=usage.total_tokens,
+            cached_tokens=cached_tokens(usage),
             details=usage.details,
             requests=usage.requests,
         )
 
         output = await prepare_output(node, result, target_page)
-        await self.save_page(
-            target_page, output, sources, context_levels, frontmatter, node.page
+        # Outputs built from a subset of the content would be reused as cache by
+        # later runs with other (or no) relevance filters, so they are not saved.
+        partial = partial or pruned
+        if not partial:
+            await self.save_page(
+                target_page, output, sources, context_levels, frontmatter, node.page
+            )
+        self._trace(
+            node,
+            start,
+            cached=False,
+            queue_wait=stats.queue_wait,
+            llm_latency=stats.latency,
+            retries=stats.retries,
+            request_tokens=usage.request_tokens or 0,
+            response_tokens=usage.response_tokens or 0,
+            total_tokens=usage.total_tokens or 0,
+            cached_tokens=cached_tokens(usage),
+            sources=traced_sources,
+        )
+        return RecursiveResult(
+            dates=list(node.dates), output=output, page=target_page, partial=partial
+        )
+
+    def _fail(
+        self,
+        node: Node,
+        target_page: Page,
+        start: float,
+        exc: Exception,
+        stats: CallStats,
+        sources: list[str],
+    ) -> RecursiveResult:
+        """Record the failure of a node, and return a result that fails its parents."""
+        logger.error("Generating %s failed: %s", node.retro_page.name, exc)
+        self.failures.append((node, exc))
+        self._trace(
+            node,
+            start,
+            cached=False,
+            queue_wait=stats.queue_wait,
+            retries=stats.retries,
+            error=str(exc),
+            sources=sources,
         )
         return RecursiveResult(
-            dates=list(node.dates), output=output, page=target_page
+            dates=list(node.dates), output="", page=target_page, failed=True
+        )
+
+    def _trace(self, node: Node, start: float, cached: bool, **kwargs):
+        """Record a span for the node, if tracing is enabled."""
+        if self.tracer is None:
+            return
+        self.tracer.record(
+            Span(
+                name=node.retro_page.name,
+                level=node.level.value,
+                model_name=self.agents[node.level].model.model_name,
+                cached=cached,
+                start=start,
+                end=time.time(),
+                **kwargs,
+            )
         )
 
-    @staticmethod
     async def save_page(
-        target_page, output, sources, levels, frontmatter, source_page=None
+        self, target_page, output, sources, levels, frontmatter, source_page=None
     ):
         """
         Save the generated page to disk, including frontmatter and source references.
-        If the file already exists, it will be renamed with a progressive number.
+        If the file already exists, it is kept as the next numbered version.
         """
-        # ensure parent directory exists
-        target_page.path.parent.mkdir(parents=True, exist_ok=True)
-
-        if target_page.path.exists():
-            # Find the next available progressive number
-            i = 1
-            while True:
-                new_path = target_page.path.with_suffix(
-                    f".{i}{target_page.path.suffix}"
-                )
-                if not new_path.exists():
-                    target_page.path.rename(new_path)
-                    break
-                i += 1
+        source_items = []
+        if source_page:
+            source_items.append(f"[[{source_page.name}]]")
+        for n in sources:
+            if not n.retro_page:
+                continue
+            if n.level in levels:
+                source_items.append(f"[[{n.retro_page.name}]]")
+        frontmatter["sources"] = source_items
 
         logger.info(
             "Writing generated page %s",
             target_page.path,
         )
-        with target_page.path.open("w") as fd:
-            source_items = []
-            if source_page:
-                source_items.append(f"[[{source_page.name}]]")
-            for n in sources:
-                if not n.retro_page:
-                    continue
-                if n.level in levels:
-                    source_items.append(f"[[{n.retro_page.name}]]")
-
-            frontmatter["sources"] = source_items
-            fd.write("---\n")
-            fd.write(yaml.dump(frontmatter, default_flow_style=False))
-            fd.write("---\n")
-            fd.write(output)
+        self.writer.write(
+            target_page.path,
+            "---\n"
+            + yaml.dump(frontmatter, default_flow_style=False)
+            + "---\n"
+            + output,
+        )
+
+
+async def run_models(
+    models: dict[str, Model],
+    sel: Selection,
+    context_levels: list[Level],
+    cache_policies: list[CachePolicy],
+    concurrency_limits: dict[str, int] | None = None,
+    gather=asyncio.gather,
+    tracer: Tracer | None = None,
+    limiters: dict[str, AdaptiveLimiter] | None = None,
+    max_retries: dict[str, int] | None = None,
+    failures: dict[str, list[tuple[Node, Exception]]] | None = None,
+) -> dict[str, RecursiveResult | None]:
+    """
+    Generate the selection with several models concurrently.
+    The selection and its sources are prepared once, then each model runs its own
+    generator with its own concurrency limit (or limiter). Every model writes the
+    same target pages, so earlier outputs end up as numbered alternatives
+    (r<date>.1.md, ...). Failed nodes, and the nodes built on them, are not saved;
+    they are added to `failures`, if given, under the model name. A model whose
+    root failed maps to None.
+    """
+    concurrency_limits = concurrency_limits or {}
+    limiters = limiters or {}
+    max_retries = max_retries or {}
+    for policy in cache_policies:
+        sel.apply_cache_policy(policy)
+    snapshot = SourceSnapshot(sel, context_levels)
+    writer = VersionedPageWriter()
+
+    generators = [
+        RecursiveGenerator(
+            model,
+            sel,
+            concurrency_limits.get(name, 10),
+            snapshot=snapshot,
+            writer=writer,
+            tracer=tracer,
+            limiter=limiters.get(name),
+            max_retries=max_retries.get(name, 3),
+        )
+        for name, model in models.items()
+    ]
+    results = await asyncio.gather(
+        *[g.run(context_levels, cache_policies=[], gather=gather) for g in generators]
+    )
+    if failures is not None:
+        for name, generator in zip(models, generators):
+            failures[name] = generator.failures
+    return dict(zip(models, results))
@@ -7,7 +7,7 @@ from datetime import datetime, timezone
 
 from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter
 
-from aww.database import get_db_path, init_db
+from aww.database import connect, get_db_path, init_db
 
 
 def _utc_now() -> str:
@@ -56,7 +56,7 @@ class SessionManager:
             query += " WHERE channel = ?"
             params = (channel,)
         query += " ORDER BY updated_at DESC, created_at DESC, id ASC"
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             rows = conn.execute(query, params).fetchall()
         return [
             ChatSessionSummary(
@@ -81,7 +81,7 @@ class SessionManager:
             query += " WHERE channel = ?"
             params = (channel,)
         query += " ORDER BY updated_at DESC, created_at DESC, id ASC LIMIT 1"
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             row = conn.execute(query, params).fetchone()
         return self._row_to_session(row) if row else None
 
@@ -110,7 +110,7 @@ class SessionManager:
             updated_at=timestamp,
         )
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect(self.db_path) as conn:
                 conn.execute(
                     """
                     INSERT INTO chat_sessions (
@@ -133,7 +133,7 @@ class SessionManager:
         return session
 
     def load_session(self, session_id: str) -> ChatSession:
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             row = conn.execute(
                 """
                 SELECT id, channel, external_session_id, title, model, messages_json, created_at, updated_at
@@ -149,7 +149,7 @@ class SessionManager:
     def load_session_by_external_id(
         self, channel: str, external_session_id: str
     ) -> ChatSession | None:
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             row = conn.execute(
                 """
                 SELECT id, channel, external_session_id, title, model, messages_json, created_at, updated_at
@@ -169,7 +169,7 @@ class SessionManager:
         )
         updated_at = _utc_now()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with connect(self.db_path) as conn:
                 cursor = conn.execute(
                     """
                     UPDATE chat_sessions
@@ -194,6 +194,34 @@ class SessionManager:
         session.external_session_id = external_session_id
         session.updated_at = updated_at
 
+    def append_messages(
+        self, session_id: str, messages: list[ModelMessage], model: str | None = None
+    ) -> None:
+        """
+        Append messages to a session, without loading or re-encoding its stored history.
+        The JSON arrays are joined in SQL, so the cost depends on the new messages only.
+        """
+        if not messages:
+            return
+        new_json = self._dump_messages(messages)
+        with connect(self.db_path) as conn:
+            cursor = conn.execute(
+                """
+                UPDATE chat_sessions
+                SET messages_json = CASE
+                        WHEN messages_json = '[]' THEN ?1
+                        ELSE substr(messages_json, 1, length(messages_json) - 1)
+                            || ',' || substr(?1, 2)
+                    END,
+                    model = COALESCE(?2, model),
+                    updated_at = ?3
+                WHERE id = ?4
+                """,
+                (new_json, model, _utc_now(), self._normalize_id(session_id)),
+            )
+            if cursor.rowcount == 0:
+                raise ValueError(f"Session '{session_id}' not found")
+
     def rename_session(self, session_id: str, title: str) -> ChatSession:
         session = self.load_session(session_id)
         session.title = title
@@ -201,7 +229,7 @@ class SessionManager:
         return session
 
     def delete_session(self, session_id: str) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             cursor = conn.execute(
                 "DELETE FROM chat_sessions WHERE id = ?",
                 (self._normalize_id(session_id),),
@@ -246,7 +274,7 @@ class SessionManager:
         return "Session could not be persisted because of a uniqueness constraint"
 
     def _session_id_exists(self, session_id: str) -> bool:
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             row = conn.execute(
                 "SELECT 1 FROM chat_sessions WHERE id = ?",
                 (session_id,),
@@ -0,0 +1,306 @@
+"""
+OpenAI-compatible stub LLM server for offline throughput and concurrency tests.
+Point a `local` model at it with `base_url = "http://127.0.0.1:8000/v1"`.
+Latency, token throughput, errors and rate limits are configurable; responses are
+deterministic for a given prompt.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "today reflection progress energy focus rest family work learning habit "
+    "goal mood health walk gratitude plan review insight challenge win"
+).split()
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+@dataclass
+class StubConfig:
+    """Behaviour of the stub server."""
+
+    model: str = "stub-model"
+    # Time to first token, in seconds.
+    latency: float = 0.0
+    latency_distribution: str = "fixed"
+    # Spread of the latency: half-width for uniform, sigma for lognormal.
+    latency_spread: float = 0.0
+    # Output speed; 0 means the whole response is produced instantly.
+    tokens_per_second: float = 0.0
+    output_tokens: int = 50
+    # Fraction of requests failing with a 500 error.
+    error_rate: float = 0.0
+    # Requests per second accepted before answering 429; 0 disables the limit.
+    rate_limit: float = 0.0
+    # Concurrent requests accepted before answering 429; 0 disables the limit.
+    max_concurrency: int = 0
+    seed: int | None = None
+
+
+@dataclass
+class StubStats:
+    requests: int = 0
+    completed: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    max_in_flight: int = 0
+    in_flight: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: StubConfig):
+        if config.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Invalid latency distribution '{config.latency_distribution}', "
+                f"must be one of {LATENCY_DISTRIBUTIONS}"
+            )
+        super().__init__(address, StubLLMHandler)
+        self.config = config
+        self.stats = StubStats()
+        self.rng = random.Random(config.seed)
+        self._rng_lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def sample_latency(self) -> float:
+        config = self.config
+        with self._rng_lock:
+            match config.latency_distribution:
+                case "uniform":
+                    latency = self.rng.uniform(
+                        config.latency - config.latency_spread,
+                        config.latency + config.latency_spread,
+                    )
+                case "lognormal":
+                    # Median of config.latency, with a long tail.
+                    latency = config.latency * self.rng.lognormvariate(
+                        0.0, config.latency_spread
+                    )
+                case _:
+                    latency = config.latency
+        return max(latency, 0.0)
+
+    def should_fail(self) -> bool:
+        with self._rng_lock:
+            return self.rng.random() < self.config.error_rate
+
+    def admit(self) -> bool:
+        """Count the request in-flight, unless it exceeds the rate or concurrency limit."""
+        config = self.config
+        with self.stats.lock:
+            self.stats.requests += 1
+            if config.rate_limit:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_count = 0
+                if self._window_count >= config.rate_limit:
+                    self.stats.rate_limited += 1
+                    return False
+                self._window_count += 1
+            if config.max_concurrency and self.stats.in_flight >= config.max_concurrency:
+                self.stats.rate_limited += 1
+                return False
+            self.stats.in_flight += 1
+            self.stats.max_in_flight = max(self.stats.max_in_flight, self.stats.in_flight)
+            return True
+
+    def release(self, error: bool = False):
+        with self.stats.lock:
+            self.stats.in_flight -= 1
+            if error:
+                self.stats.errors += 1
+            else:
+                self.stats.completed += 1
+
+
+def count_tokens(text: str) -> int:
+    return len(text.split())
+
+
+def stub_reply(messages: list[dict], output_tokens: int) -> list[str]:
+    """Deterministic words for a conversation."""
+    prompt = json.dumps(messages, sort_keys=True)
+    digest = hashlib.sha256(prompt.encode()).digest()
+    rng = random.Random(digest)
+    return [rng.choice(WORDS) for _ in range(output_tokens)]
+
+
+def message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    server: StubLLMServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_json(self, status: int, message: str, error_type: str, headers=None):
+        self.send_json(
+            status,
+            {"error": {"message": message, "type": error_type, "code": status}},
+            headers,
+        )
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self.send_json(
+                200,
+                {
+                    "object": "list",
+                    "data": [
+                        {
+                            "id": self.server.config.model,
+                            "object": "model",
+                            "created": 0,
+                            "owned_by": "aww",
+                        }
+                    ],
+                },
+            )
+        else:
+            self.send_error_json(404, f"Unknown path {self.path}", "not_found")
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_error_json(404, f"Unknown path {self.path}", "not_found")
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self.send_error_json(400, "Invalid JSON body", "invalid_request_error")
+            return
+
+        server = self.server
+        if not server.admit():
+            self.send_error_json(
+                429, "Rate limit exceeded", "rate_limit_error", {"Retry-After": "1"}
+            )
+            return
+
+        time.sleep(server.sample_latency())
+        if server.should_fail():
+            # Count the error before the client can see the response.
+            server.release(error=True)
+            self.send_error_json(500, "Injected server error", "server_error")
+            return
+
+        failed = True
+        try:
+            messages = request.get("messages", [])
+            if request.get("stream"):
+                self.stream_completion(request, messages)
+            else:
+                self.complete(request, messages)
+            failed = False
+        finally:
+            server.release(error=failed)
+
+    def usage(self, messages: list[dict], completion_tokens: int) -> dict:
+        prompt_tokens = sum(count_tokens(message_text(m)) for m in messages)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def complete(self, request: dict, messages: list[dict]):
+        config = self.server.config
+        words = stub_reply(messages, config.output_tokens)
+        if config.tokens_per_second:
+            time.sleep(len(words) / config.tokens_per_second)
+        self.send_json(
+            200,
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", config.model),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": " ".join(words)},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": self.usage(messages, len(words)),
+            },
+        )
+
+    def stream_completion(self, request: dict, messages: list[dict]):
+        config = self.server.config
+        words = stub_reply(messages, config.output_tokens)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = request.get("model", config.model)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta: dict, finish_reason=None, usage=None):
+            body = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+            if usage is not None:
+                body["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(body)}\n\n".encode())
+            self.wfile.flush()
+
+        chunk({"role": "assistant", "content": ""})
+        for i, word in enumerate(words):
+            if config.tokens_per_second:
+                time.sleep(1 / config.tokens_per_second)
+            chunk({"content": word if i == 0 else " " + word})
+        chunk({}, "stop", self.usage(messages, len(words)))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_server(
+    config: StubConfig, host: str = "127.0.0.1", port: int = 0
+) -> StubLLMServer:
+    """Start the stub in a background thread. Port 0 picks a free port."""
+    server = StubLLMServer((host, port), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
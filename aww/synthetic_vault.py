@@ -0,0 +1,210 @@
+"""
+Synthetic vault generator for benchmarks and load tests.
+Writes deterministic daily notes and retrospectives following the Vault page templates.
+"""
+
+import datetime
+import random
+from pathlib import Path
+
+import yaml
+
+from aww.obsidian import Level, Vault
+
+WORDS = (
+    "morning walk coffee meeting project review code garden family dinner book run "
+    "yoga email plan focus tired happy call friend music write read lunch doctor "
+    "budget travel rain sunny idea bug deploy sleep tea park train city home work "
+    "team design test ship learn cook clean bike swim movie game chat rest"
+).split()
+
+EVENTS = ("wake up", "breakfast", "commute", "lunch", "gym", "dinner", "reading")
+
+
+def make_tags(count: int) -> list[str]:
+    """Return `count` distinct tag names, some of them nested."""
+    tags = []
+    for i in range(count):
+        word = WORDS[i % len(WORDS)]
+        round_ = i // len(WORDS)
+        tags.append(word if round_ == 0 else f"{word}/{WORDS[round_ % len(WORDS)]}{round_}")
+    return tags
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def with_frontmatter(frontmatter: dict, lines: list[str]) -> str:
+    header = []
+    if frontmatter:
+        header = ["---", yaml.dump(frontmatter, default_flow_style=False).strip(), "---"]
+    return "\n".join(header + lines) + "\n"
+
+
+def daily_note(
+    rng: random.Random,
+    d: datetime.date,
+    tags: list[str],
+    metrics: bool = True,
+    tasks: int = 2,
+    events: int = 4,
+) -> str:
+    """Return the markdown of a daily journal note, with metrics, tasks and events.
+    `tasks` and `events` are the average number per day."""
+    frontmatter = {}
+    if metrics:
+        frontmatter = {
+            "stress": rng.randint(1, 10),
+            "mood": rng.randint(1, 10),
+            "sleep_score": rng.randint(40, 100),
+            "exercise": rng.choice([True, False]),
+        }
+    lines = [f"# {d.isoformat()}", ""]
+    for _ in range(rng.randint(1, 4)):
+        day_tags = " ".join(f"#{t}" for t in rng.sample(tags, min(2, len(tags))))
+        lines.append(f"{sentence(rng)} {day_tags}")
+        lines.append("")
+
+    for _ in range(rng.randint(0, 2 * tasks)):
+        status = rng.choice([" ", "x"])
+        lines.append(f"- [{status}] {sentence(rng, 5)}")
+    lines += ["", "## Schedule", ""]
+
+    minute = rng.randint(5 * 60, 8 * 60)
+    for _ in range(rng.randint(0, 2 * events)):
+        if minute >= 23 * 60:
+            break
+        event = rng.choice(EVENTS)
+        hour, start = divmod(minute, 60)
+        if rng.random() < 0.5:
+            end_hour, end = divmod(min(minute + 60, 23 * 60 + 59), 60)
+            lines.append(f"{hour:02d}:{start:02d}-{end_hour:02d}:{end:02d} {event}")
+        else:
+            lines.append(f"{hour:02d}:{start:02d} {event}")
+        minute += rng.randint(15, 180)
+    return with_frontmatter(frontmatter, lines)
+
+
+def free_note(rng: random.Random, name: str, tags: list[str]) -> str:
+    """Return a free-form note, linking back to its daily note."""
+    lines = [f"# {name}", ""]
+    for _ in range(rng.randint(1, 6)):
+        lines.append(f"{sentence(rng, 20)} #{rng.choice(tags)}")
+    lines += ["", f"[[{name[:10]}]]"]
+    return with_frontmatter({"tags": rng.sample(tags, min(2, len(tags)))}, lines)
+
+
+def retro_page(
+    rng: random.Random, name: str, sources: list[str], tags: list[str]
+) -> str:
+    """Return the markdown of a generated retrospective, with the usual frontmatter."""
+    request_tokens = rng.randint(200, 3000)
+    response_tokens = rng.randint(200, 1500)
+    frontmatter = {
+        "model_name": "synthetic",
+        "request_tokens": request_tokens,
+        "response_tokens": response_tokens,
+        "total_tokens": request_tokens + response_tokens,
+        "requests": 1,
+        "sources": [f"[[{s}]]" for s in sources],
+    }
+    lines = [f"# {name}", "", "1. **Key Events**"]
+    for _ in range(rng.randint(2, 5)):
+        lines.append(f"   - {sentence(rng)} #{rng.choice(tags)}")
+    lines += ["", "2. **Insights**", f"   - {sentence(rng, 20)}"]
+    return with_frontmatter(frontmatter, lines)
+
+
+def write_retro(
+    rng: random.Random,
+    vault: Vault,
+    d: datetime.date,
+    level: Level,
+    sources: list[str],
+    tags: list[str],
+    versions: int,
+):
+    """Write `versions` versions of a retrospective: older ones numbered, the latest
+    with the plain name, as RecursiveGenerator leaves them."""
+    page = vault.retrospective_page(d, level)
+    page.path.parent.mkdir(parents=True, exist_ok=True)
+    for version in range(1, versions):
+        page.path.with_suffix(f".{version}.md").write_text(
+            retro_page(rng, page.name, sources, tags)
+        )
+    if versions:
+        page.path.write_text(retro_page(rng, page.name, sources, tags))
+
+
+def period_end(d: datetime.date, level: Level) -> bool:
+    """Whether d is the last day of its week, month or year."""
+    tomorrow = d + datetime.timedelta(days=1)
+    match level:
+        case Level.weekly:
+            return d.isoweekday() == 7
+        case Level.monthly:
+            return tomorrow.month != d.month
+        case Level.yearly:
+            return tomorrow.year != d.year
+        case _:
+            return True
+
+
+def generate_vault(
+    path: Path | str,
+    years: int = 10,
+    end_year: int | None = None,
+    retro_versions: int = 1,
+    tag_count: int = 50,
+    seed: int = 0,
+    notes_per_day: int = 0,
+    metrics: bool = True,
+    tasks: int = 2,
+    events: int = 4,
+    periodic: bool = False,
+) -> Vault:
+    """
+    Write a synthetic vault with `years` of daily notes ending with `end_year`,
+    plus `retro_versions` versions of each daily retrospective.
+    `notes_per_day` free-form notes are added under notes/, and with `periodic`
+    weekly, monthly and yearly notes and retrospectives are written too.
+    Output is deterministic for a given seed.
+    """
+    rng = random.Random(seed)
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    vault = Vault(path, "journal", "retrospectives", "retrospectives/queries")
+    tags = make_tags(tag_count)
+
+    end_year = end_year or datetime.date.today().year - 1
+    d = datetime.date(end_year - years + 1, 1, 1)
+    end = datetime.date(end_year, 12, 31)
+    sources = {level: [] for level in Level}
+    while d <= end:
+        note = vault.page(d, Level.daily)
+        note.path.parent.mkdir(parents=True, exist_ok=True)
+        note.path.write_text(daily_note(rng, d, tags, metrics, tasks, events))
+        write_retro(rng, vault, d, Level.daily, [note.name], tags, retro_versions)
+
+        for i in range(notes_per_day):
+            name = f"{d.isoformat()} {rng.choice(WORDS)} {i}"
+            note_path = path / "notes" / f"{d.year}" / f"{name}.md"
+            note_path.parent.mkdir(parents=True, exist_ok=True)
+            note_path.write_text(free_note(rng, name, tags))
+
+        if periodic:
+            # Periodic retrospectives list the daily retrospectives they cover.
+            for level in (Level.weekly, Level.monthly, Level.yearly):
+                sources[level].append(vault.retrospective_page(d, Level.daily).name)
+                if not period_end(d, level):
+                    continue
+                page = vault.page(d, level)
+                page.path.parent.mkdir(parents=True, exist_ok=True)
+                page.path.write_text(
+                    with_frontmatter({}, [f"# {page.name}", "", sentence(rng, 30)])
+                )
+                write_retro(rng, vault, d, level, sources[level], tags, retro_versions)
+                sources[level] = []
+        d += datetime.timedelta(days=1)
+    return vault
@@ -0,0 +1,119 @@
+"""
+Fuzzy matching of tags to the canonical ones, and renaming of tags across the vault.
+Tags are compared as character n-gram TF-IDF vectors, so a batch of thousands of tags
+is matched with one sparse matrix product instead of pairwise string comparisons.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from aww.obsidian import CODEBLOCKS_RE, FRONTMATTER_RE, atomic_write_text
+
+LIST_ITEM_RE = re.compile(r"^(\s*-\s+)(['\"]?)(.*?)\2(\s*)$")
+
+
+class TagMatcher:
+    """Nearest canonical tags by cosine similarity of character n-gram TF-IDF vectors."""
+
+    def __init__(self, canonical_tags, ngram_range: tuple[int, int] = (2, 3)):
+        self.canonical = sorted(canonical_tags)
+        self.vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=ngram_range)
+        self.matrix = self.vectorizer.fit_transform(self.canonical)
+
+    def match(
+        self, tags: list[str], n: int = 3, cutoff: float = 0.6, batch_size: int = 1024
+    ) -> list[list[tuple[str, float]]]:
+        """For each tag, up to n (canonical tag, score) pairs scoring at least cutoff, best first."""
+        matches = []
+        for start in range(0, len(tags), batch_size):
+            batch = self.vectorizer.transform(tags[start : start + batch_size])
+            # Rows are L2-normalized, so the product is the cosine similarity.
+            scores = (batch @ self.matrix.T).toarray()
+            top = np.argsort(-scores, axis=1, kind="stable")[:, :n]
+            for row, columns in zip(scores, top):
+                matches.append(
+                    [(self.canonical[c], float(row[c])) for c in columns if row[c] >= cutoff]
+                )
+        return matches
+
+
+def _names_pattern(mapping: dict[str, str]) -> str:
+    # Longest first, so that a tag is not matched by a prefix of its name.
+    return "|".join(re.escape(t) for t in sorted(mapping, key=len, reverse=True))
+
+
+def rename_tags(text: str, mapping: dict[str, str]) -> str:
+    """
+    Rename the tags of a page: hashtags in the body (outside code blocks) and the
+    entries of the `tags` frontmatter field. Nested tags (#old/child) are untouched.
+    """
+    if not mapping:
+        return text
+    names = _names_pattern(mapping)
+    hashtag_re = re.compile(rf"(?<!\S)#({names})(?![a-zA-Z0-9_/-])")
+
+    def replace_hashtag(m):
+        return "#" + mapping[m.group(1)]
+
+    frontmatter = ""
+    if m := FRONTMATTER_RE.match(text):
+        frontmatter = _rename_frontmatter_tags(m.group(0), mapping)
+        text = text[m.end() :]
+
+    parts, last = [], 0
+    for block in CODEBLOCKS_RE.finditer(text):
+        parts.append(hashtag_re.sub(replace_hashtag, text[last : block.start()]))
+        parts.append(block.group(0))
+        last = block.end()
+    parts.append(hashtag_re.sub(replace_hashtag, text[last:]))
+    return frontmatter + "".join(parts)
+
+
+def _rename_frontmatter_tags(frontmatter: str, mapping: dict[str, str]) -> str:
+    """Rename the tags in a `tags:` field, either inline or as a list of items."""
+    name_re = re.compile(rf"(?<![^\s\[,'\"])({_names_pattern(mapping)})(?![a-zA-Z0-9_/-])")
+
+    def replace_name(m):
+        return mapping[m.group(1)]
+
+    lines = frontmatter.splitlines(keepends=True)
+    in_tags = False
+    for i, line in enumerate(lines):
+        if key := re.match(r"^(\w[\w-]*):(.*)$", line):
+            in_tags = key.group(1) == "tags"
+            if in_tags:
+                value = name_re.sub(replace_name, key.group(2))
+                lines[i] = "tags:" + value + line[key.end() :]
+        elif in_tags and (item := LIST_ITEM_RE.match(line)):
+            indent, quote, name, end = item.groups()
+            if name in mapping:
+                lines[i] = indent + quote + mapping[name] + quote + end
+    return "".join(lines)
+
+
+def rewrite_pages(
+    paths: list[Path], mapping: dict[str, str], max_workers: int = 8
+) -> list[Path]:
+    """
+    Rename the tags in the pages, in parallel. All pages are read and rewritten in
+    memory before any is written, and each is replaced atomically; only the pages
+    whose content changes are written. Returns the changed paths.
+    """
+    paths = [p for p in dict.fromkeys(paths) if p.exists()]
+
+    def transform(path: Path):
+        text = path.read_text()
+        return path, rename_tags(text, mapping), text
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        changes = [
+            (path, new)
+            for path, new, old in executor.map(transform, paths)
+            if new != old
+        ]
+        list(executor.map(lambda change: atomic_write_text(*change), changes))
+    return [path for path, _ in changes]
@@ -0,0 +1,101 @@
+"""
+Batch cleanup of daily pages: the tasks copied from the daily template and left
+unchecked are marked as cancelled ("- [-]"). Days are processed in a thread pool,
+and only pages that change are rewritten, atomically.
+"""
+
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from aww.obsidian import TASK_RE, Level, Page, Vault, atomic_write_text
+
+
+@dataclass
+class PageCleanup:
+    date: datetime.date
+    page: Page
+    # Descriptions of the tasks marked as cancelled.
+    cancelled: list[str]
+
+
+@dataclass
+class CleanupReport:
+    changed: list[PageCleanup] = field(default_factory=list)
+    unchanged: int = 0
+    missing: list[datetime.date] = field(default_factory=list)
+
+    @property
+    def cancelled(self) -> int:
+        return sum(len(c.cancelled) for c in self.changed)
+
+
+def template_tasks(page: Page) -> frozenset[str]:
+    """Descriptions of the tasks in the template page."""
+    return frozenset(
+        m.group(2)
+        for _, line in page.enumerate_content_lines()
+        if (m := TASK_RE.match(line))
+    )
+
+
+def cleanup_text(text: str, tasks: frozenset[str]) -> tuple[str, list[str]]:
+    """Mark the unchecked tasks in `tasks` as cancelled; returns the new text and their descriptions."""
+    lines = text.splitlines(keepends=True)
+    cancelled = []
+    in_frontmatter = False
+    for n, line in enumerate(lines):
+        # Same frontmatter handling as Page.enumerate_content_lines
+        if n == 0 and line == "---\n":
+            in_frontmatter = True
+            continue
+        if in_frontmatter:
+            if line == "---\n":
+                in_frontmatter = False
+            continue
+        m = TASK_RE.match(line.strip())
+        if m and m.group(1) == " " and m.group(2) in tasks:
+            lines[n] = line.replace("[ ]", "[-]", 1)
+            cancelled.append(m.group(2))
+    return "".join(lines), cancelled
+
+
+def cleanup_page(
+    vault: Vault, date: datetime.date, tasks: frozenset[str], dry_run: bool = False
+) -> PageCleanup | None:
+    """Clean up the daily page of a date; None if the page does not exist."""
+    page = vault.page(date, Level.daily)
+    try:
+        text = page.path.read_text()
+    except FileNotFoundError:
+        return None
+    new_text, cancelled = cleanup_text(text, tasks)
+    if new_text != text and not dry_run:
+        atomic_write_text(page.path, new_text)
+    return PageCleanup(date, page, cancelled)
+
+
+def cleanup(
+    vault: Vault,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    tasks: frozenset[str],
+    max_workers: int = 8,
+    dry_run: bool = False,
+) -> CleanupReport:
+    """Clean up the daily pages from start_date up to, excluding, end_date."""
+    dates = [
+        start_date + datetime.timedelta(days=i)
+        for i in range((end_date - start_date).days)
+    ]
+    report = CleanupReport()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda d: cleanup_page(vault, d, tasks, dry_run), dates)
+        for date, result in zip(dates, results):
+            if result is None:
+                report.missing.append(date)
+            elif result.cancelled:
+                report.changed.append(result)
+            else:
+                report.unchanged += 1
+    return report
@@ -1,10 +1,20 @@
 import datetime
-import hashlib
+
+import pytest
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
 from pydantic_ai.models.test import TestModel
-from aww import retro, ask
+from aww import retro, ask, queries
 from aww.obsidian import Level
 from aww.test_retro import tmp_vault
 
+
+@pytest.fixture(autouse=True)
+def data_path(tmp_path, monkeypatch):
+    """Keep the queries index out of the user's data path."""
+    monkeypatch.setenv("AWW_DATA_PATH", str(tmp_path / "data"))
+    return tmp_path / "data"
+
 def test_recursive_ask_logic(tmp_vault):
     """
     Test the recursive ask logic using a TestModel.
@@ -33,7 +43,7 @@ def test_recursive_ask_logic(tmp_vault):
     assert result is not None
     
     # Check if a query page was created for the root level
-    query_id = hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8]
+    query_id = queries.fingerprint(prompt)
     query_page = tmp_vault.query_page(query_id, date_val, Level.weekly)
     assert query_page.path.exists(), f"Query page {query_page.path} should exist"
 
@@ -55,7 +65,7 @@ def test_recursive_ask_caching(tmp_vault):
     model = TestModel()
     date_val = datetime.date(2025, 4, 1)
     prompt = "Cached question?"
-    query_id = hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8]
+    query_id = queries.fingerprint(prompt)
     
     # Run once to populate cache
     ask.ask_question(
@@ -89,3 +99,93 @@ def test_recursive_ask_caching(tmp_vault):
     )
     
     assert "CACHED_MARKER" in result
+
+
+def test_recursive_ask_keeps_system_prompt_static(tmp_vault):
+    """The question is the last user prompt part, so system prompts are cacheable prefixes."""
+    requests = []
+
+    def respond(messages, info):
+        requests.append(messages[-1].parts)
+        return ModelResponse(parts=[TextPart("answer")])
+
+    for prompt in ("First question?", "Second question?"):
+        ask.ask_question(
+            vault=tmp_vault,
+            llm_model=FunctionModel(respond),
+            date=datetime.date(2025, 4, 1),
+            level=Level.daily,
+            prompt=prompt,
+            context_levels=[Level.daily],
+            recursive=True,
+        )
+
+    first, second = requests
+    assert first[0].content == second[0].content
+    assert "question?" not in first[0].content
+    assert first[-1].content[-1] == "**Question:** First question?"
+    assert second[-1].content[-1] == "**Question:** Second question?"
+    assert first[-1].content[:-1] == second[-1].content[:-1]
+
+
+def test_recursive_ask_reuses_respelled_question(tmp_vault, data_path):
+    calls = []
+
+    def respond(messages, info):
+        calls.append(messages[-1].parts[-1].content[-1])
+        return ModelResponse(parts=[TextPart("answer")])
+
+    def run(prompt):
+        calls.clear()
+        return ask.ask_question(
+            vault=tmp_vault,
+            llm_model=FunctionModel(respond),
+            date=datetime.date(2025, 4, 1),
+            level=Level.weekly,
+            prompt=prompt,
+            context_levels=[Level.daily, Level.weekly],
+            recursive=True,
+        )
+
+    run("What did I do this week?")
+    first_calls = len(calls)
+    run("what did I do this week")
+
+    # Only the weekly root is regenerated, for the new spelling.
+    assert first_calls > 1
+    assert calls == ["**Question:** what did I do this week"]
+    index = queries.QueryIndex(data_path / "queries.json")
+    (entry,) = index.entries.values()
+    assert entry.questions == ["What did I do this week?", "what did I do this week"]
+
+
+def test_prefiltered_aggregates_are_not_saved(tmp_vault, monkeypatch):
+    extra = tmp_vault.page(datetime.date(2025, 4, 2), Level.daily)
+    extra.path.write_text("# April 2\nGardening.")
+    monkeypatch.setattr(ask, "relevant_dates", lambda *args: {"2025-04-01"})
+    date_val = datetime.date(2025, 4, 1)
+    prompt = "What did I do this week?"
+
+    def run(prefilter):
+        return ask.ask_question(
+            vault=tmp_vault,
+            llm_model=TestModel(),
+            date=date_val,
+            level=Level.weekly,
+            prompt=prompt,
+            context_levels=[Level.daily, Level.weekly],
+            recursive=True,
+            prefilter=prefilter,
+        )
+
+    query_id = queries.fingerprint(prompt)
+    weekly = tmp_vault.query_page(query_id, date_val, Level.weekly)
+    run("fts")
+    # The relevant day can be reused by any run, the weekly built without April 2 not.
+    assert tmp_vault.query_page(query_id, date_val, Level.daily).path.exists()
+    assert not tmp_vault.query_page(query_id, datetime.date(2025, 4, 2), Level.daily).path.exists()
+    assert not weekly.path.exists()
+
+    run("none")
+    assert weekly.path.exists()
+    assert tmp_vault.query_page(query_id, datetime.date(2025, 4, 2), Level.daily).path.exists()
@@ -1,4 +1,10 @@
-from aww.chat import render_chat_system_prompt
+import asyncio
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
+
+from aww.chat import render_chat_system_prompt, stream_response
 from aww.obsidian import Page, Vault
 
 
@@ -32,3 +38,30 @@ def test_render_chat_system_prompt_omits_optional_sections_when_empty(tmp_path):
     assert "Available skills" not in prompt
     assert "aww-scratchpad" not in prompt
     assert "restricted\nsubset of Python expressions" in prompt
+
+
+def test_stream_response_completes_tool_calls_after_preamble():
+    async def stream(messages, info):
+        if not any(isinstance(p, ToolReturnPart) for m in messages for p in m.parts):
+            yield "Let me check your journal. "
+            yield {0: DeltaToolCall(name="journal", json_args='{"day": "monday"}')}
+        else:
+            yield "You went "
+            yield "running."
+
+    agent = Agent(FunctionModel(stream_function=stream))
+    looked_up = []
+
+    @agent.tool_plain
+    def journal(day: str) -> str:
+        looked_up.append(day)
+        return "Went running."
+
+    texts = []
+    messages = asyncio.run(stream_response(agent, "What did I do?", None, None, texts.append))
+
+    assert looked_up == ["monday"]
+    assert texts[-1] == "You went running."
+    assert isinstance(messages[-1], ModelResponse)
+    assert messages[-1].parts == [TextPart("You went running.")]
+    assert any(isinstance(p, ToolCallPart) for m in messages for p in m.parts)
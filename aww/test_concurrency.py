@@ -0,0 +1,154 @@
+import asyncio
+
+import httpx
+import pytest
+from pydantic_ai.exceptions import ModelHTTPError
+
+from aww import concurrency
+from aww.concurrency import AdaptiveLimiter, CallStats, call_with_retries
+
+
+def test_limiter_grows_on_success_and_halves_on_errors():
+    limiter = AdaptiveLimiter(max_limit=8, initial=2)
+
+    async def run():
+        for _ in range(10):
+            await limiter.acquire()
+            await limiter.release(latency=0.1)
+        grown = limiter.limit
+        await limiter.acquire()
+        await limiter.release(error=True)
+        return grown
+
+    grown = asyncio.run(run())
+    assert grown > 4
+    assert limiter.limit == pytest.approx(grown / 2)
+
+
+def test_limiter_backs_off_on_latency_spikes():
+    limiter = AdaptiveLimiter(max_limit=4, latency_tolerance=2.0)
+
+    async def run():
+        await limiter.acquire()
+        await limiter.release(latency=0.1)
+        await limiter.acquire()
+        await limiter.release(latency=1.0)
+
+    asyncio.run(run())
+    assert limiter.limit < 4
+
+
+def test_limiter_bounds_in_flight_calls():
+    limiter = AdaptiveLimiter(max_limit=3)
+    in_flight = []
+
+    async def call():
+        in_flight.append(limiter.in_flight)
+        await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*[call_with_retries(call, limiter) for _ in range(10)])
+
+    asyncio.run(run())
+    assert max(in_flight) == 3
+    assert limiter.in_flight == 0
+
+
+def test_call_with_retries_retries_rate_limits():
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ModelHTTPError(429, "test")
+        return "ok"
+
+    stats = CallStats()
+    result = asyncio.run(
+        call_with_retries(call, AdaptiveLimiter(2), base_delay=0, stats=stats)
+    )
+    assert result == "ok"
+    assert stats.retries == 2
+
+
+def test_call_with_retries_honours_retry_after(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(concurrency.asyncio, "sleep", sleep)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            response = httpx.Response(
+                429,
+                headers={"Retry-After": "7"},
+                request=httpx.Request("POST", "http://test"),
+            )
+            cause = httpx.HTTPStatusError(
+                "rate limited", request=response.request, response=response
+            )
+            raise ModelHTTPError(429, "test") from cause
+        return "ok"
+
+    assert asyncio.run(call_with_retries(call, AdaptiveLimiter(2), base_delay=0)) == "ok"
+    assert delays == [7.0]
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"Retry-After": "2"}, 2.0),
+        ({"retry-after-ms": "1500", "Retry-After": "2"}, 1.5),
+        ({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 0.0),
+        ({"Retry-After": "soon"}, None),
+        ({}, None),
+    ],
+)
+def test_retry_after(headers, expected):
+    response = httpx.Response(429, headers=headers)
+    request = httpx.Request("GET", "http://test")
+    error = httpx.HTTPStatusError("", request=request, response=response)
+    assert concurrency.retry_after(error) == expected
+    assert concurrency.retry_after(TimeoutError()) is None
+
+
+def test_call_with_retries_gives_up():
+    async def call():
+        raise ModelHTTPError(503, "test")
+
+    with pytest.raises(ModelHTTPError):
+        asyncio.run(call_with_retries(call, AdaptiveLimiter(2), max_retries=1, base_delay=0))
+
+
+def test_call_with_retries_does_not_retry_client_errors():
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise ModelHTTPError(400, "test")
+
+    limiter = AdaptiveLimiter(2)
+    with pytest.raises(ModelHTTPError):
+        asyncio.run(call_with_retries(call, limiter, base_delay=0))
+    assert len(attempts) == 1
+    assert limiter.limit == 2
+
+
+def test_get_limiter_is_shared_per_provider(monkeypatch):
+    monkeypatch.setattr(concurrency, "_limiters", {})
+    limiter = concurrency.get_limiter("local:http://localhost:8000/v1", 4)
+    assert concurrency.get_limiter("local:http://localhost:8000/v1", 8) is limiter
+    assert concurrency.get_limiter("openai", 8) is not limiter
+
+
+def test_get_limiter_uses_largest_limit(monkeypatch, caplog):
+    monkeypatch.setattr(concurrency, "_limiters", {})
+    limiter = concurrency.get_limiter("local", 4)
+    assert concurrency.get_limiter("local", 8).max_limit == 8
+    assert concurrency.get_limiter("local", 2).max_limit == 8
+    assert limiter.max_limit == 8
+    assert "limit 2 requested for local, which shares a limit of 8" in caplog.text
@@ -0,0 +1,40 @@
+import numpy as np
+
+from aww.embedding_benchmark import benchmark_backends, make_queries, recall_at_k
+
+
+class FakeModel:
+    def __init__(self, noise=0.0):
+        self.noise = noise
+
+    def encode(self, texts, **kwargs):
+        vectors = np.array(
+            [[text.count(c) + 0.1 for c in "aeiou"] for text in texts], dtype=np.float32
+        )
+        vectors += self.noise
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_recall_at_k():
+    assert recall_at_k(np.array([[0, 1], [2, 3]]), np.array([[1, 0], [2, 4]])) == 0.75
+
+
+def test_benchmark_backends_compares_against_reference():
+    texts = ["alpha", "echo", "india", "oscar", "uniform", "aeiou", "banana"]
+    models = {"torch": FakeModel(), "torch-int8": FakeModel(noise=0.01)}
+
+    def load_model(backend):
+        if backend not in models:
+            raise RuntimeError(f"{backend} is not installed")
+        return models[backend]
+
+    reports = benchmark_backends(
+        texts, make_queries(texts, 3), load_model, ["torch", "torch-int8", "onnx"], k=3
+    )
+
+    by_backend = {report.backend: report for report in reports}
+    assert by_backend["torch"].recall_at_k == 1.0
+    assert by_backend["torch-int8"].docs_per_second > 0
+    assert by_backend["torch-int8"].mean_cosine > 0.99
+    assert 0.0 <= by_backend["torch-int8"].recall_at_k <= 1.0
+    assert by_backend["onnx"].error == "onnx is not installed"
@@ -1,10 +1,16 @@
+import json
+
 import pandas as pd
 import pyarrow as pa
 import pytest
 from lancedb.rerankers.base import Reranker
 
 from aww.config import Settings
-from aww.huggingface import load_cross_encoder, load_sentence_transformer
+from aww.huggingface import (
+    load_cross_encoder,
+    load_sentence_transformer,
+    resolve_embedding_dim,
+)
 from aww.rag import Index, LocalCrossEncoderReranker, LocalSentenceTransformerEmbeddings
 
 
@@ -193,3 +199,106 @@ def test_local_cross_encoder_reranker_uses_local_cache(monkeypatch):
     assert kwargs["local_files_only"] is True
     assert kwargs["token"] is False
     assert kwargs["cache_folder"] == "/tmp/hf-cache"
+
+
+def test_load_sentence_transformer_quantizes_torch_int8(monkeypatch):
+    import torch
+
+    calls = []
+
+    class TinyModel(torch.nn.Module):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            calls.append(kwargs)
+            self.linear = torch.nn.Linear(4, 4)
+
+    monkeypatch.setattr("aww.huggingface.SentenceTransformer", TinyModel)
+
+    model = load_sentence_transformer("all-MiniLM-L6-v2", backend="torch-int8")
+
+    assert calls[0]["backend"] == "torch"
+    assert isinstance(model.linear, torch.ao.nn.quantized.dynamic.Linear)
+
+
+def test_load_sentence_transformer_reports_missing_backend_extras(monkeypatch):
+    monkeypatch.setattr("aww.huggingface.importlib.util.find_spec", lambda name: None)
+
+    with pytest.raises(RuntimeError, match=r"sentence-transformers\[onnx\]"):
+        load_sentence_transformer("all-MiniLM-L6-v2", backend="onnx")
+
+
+def test_load_sentence_transformer_rejects_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        load_sentence_transformer("all-MiniLM-L6-v2", backend="tpu")
+
+
+def test_load_sentence_transformer_passes_truncate_dim(monkeypatch):
+    calls = []
+
+    class FakeSentenceTransformer:
+        def __init__(self, *args, **kwargs):
+            calls.append(kwargs)
+
+    monkeypatch.setattr("aww.huggingface.SentenceTransformer", FakeSentenceTransformer)
+
+    load_sentence_transformer("nomic-ai/nomic-embed-text-v1.5", truncate_dim=256)
+
+    assert calls[0]["truncate_dim"] == 256
+
+
+@pytest.mark.parametrize(
+    "files, expected",
+    [
+        (
+            {
+                "modules.json": [
+                    {"path": "", "type": "sentence_transformers.models.Transformer"},
+                    {"path": "1_Pooling", "type": "sentence_transformers.models.Pooling"},
+                    {"path": "2_Dense", "type": "sentence_transformers.models.Dense"},
+                ],
+                "1_Pooling/config.json": {
+                    "word_embedding_dimension": 768,
+                    "pooling_mode_mean_tokens": True,
+                },
+                "2_Dense/config.json": {"in_features": 768, "out_features": 512},
+            },
+            512,
+        ),
+        (
+            {
+                "modules.json": [
+                    {"path": "1_Pooling", "type": "sentence_transformers.models.Pooling"},
+                ],
+                "1_Pooling/config.json": {
+                    "word_embedding_dimension": 384,
+                    "pooling_mode_cls_token": True,
+                    "pooling_mode_max_tokens": True,
+                },
+            },
+            768,
+        ),
+        ({"config.json": {"hidden_size": 1024}}, 1024),
+        ({}, None),
+    ],
+)
+def test_resolve_embedding_dim_reads_config(tmp_path, files, expected):
+    for name, content in files.items():
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(json.dumps(content))
+
+    assert resolve_embedding_dim(str(tmp_path)) == expected
+
+
+def test_ndims_does_not_load_weights(monkeypatch):
+    monkeypatch.setattr("aww.rag.resolve_embedding_dim", lambda *args, **kwargs: 768)
+
+    def fail_load(*args, **kwargs):
+        raise AssertionError("ndims should not load the model")
+
+    monkeypatch.setattr("aww.rag.load_sentence_transformer", fail_load)
+
+    assert LocalSentenceTransformerEmbeddings.create(name="m").ndims() == 768
+    assert (
+        LocalSentenceTransformerEmbeddings.create(name="m", truncate_dim=256).ndims()
+        == 256
+    )
@@ -31,6 +31,27 @@ def test_daily_page():
     assert page
 
 
+@pytest.mark.parametrize(
+    "rel_path, kind, level, source_date, version",
+    [
+        ("journal/2025/03/2025-03-30.md", "journal", Level.daily, date(2025, 3, 30), None),
+        ("journal/2025/weeks/2025-W14.md", "journal", Level.weekly, date(2025, 3, 31), None),
+        ("journal/2025/months/2025-04.md", "journal", Level.monthly, date(2025, 4, 1), None),
+        ("journal/2025/Y2025.md", "journal", Level.yearly, date(2025, 1, 1), None),
+        ("retrospectives/2025/03/r2025-03-30.md", "retrospective", Level.daily, date(2025, 3, 30), None),
+        ("retrospectives/2025/03/r2025-03-30.2.md", "retrospective", Level.daily, date(2025, 3, 30), 2),
+        ("retrospectives/2025/weeks/r2025-W14.1.md", "retrospective", Level.weekly, date(2025, 3, 31), 1),
+        ("retrospectives/queries/abcd1234/2025/r2025.md", "query", Level.yearly, date(2025, 1, 1), None),
+        ("retrospectives/notes.md", "retrospective", None, None, None),
+        ("index.md", "other", None, None, None),
+    ],
+)
+def test_page_info(rel_path, kind, level, source_date, version):
+    vault = obsidian.Vault(test_vault_path, "journal", "retrospectives", "retrospectives/queries")
+    info = vault.page_info(obsidian.Page(test_vault_path / rel_path))
+    assert info == obsidian.PageInfo(kind, level, source_date, version)
+
+
 def test_page():
     page1 = obsidian.Page(
         test_vault_path / "journal/2025/03/2025-03-30.md", Level.daily
@@ -198,3 +219,34 @@ def test_page_tags_frontmatter():
     finally:
         if temp_file.exists():
             temp_file.unlink()
+
+
+def test_versioned_page_writer(tmp_path):
+    target = tmp_path / "r2025-04-01.md"
+    (tmp_path / "r2025-04-01.3.md").write_text("old version")
+    (tmp_path / "r2025-04-02.7.md").write_text("other page")
+
+    writer = obsidian.VersionedPageWriter()
+    assert writer.write(target, "first") is None
+    assert writer.write(target, "second") == tmp_path / "r2025-04-01.4.md"
+    assert writer.write(target, "third") == tmp_path / "r2025-04-01.5.md"
+
+    assert target.read_text() == "third"
+    assert (tmp_path / "r2025-04-01.4.md").read_text() == "first"
+    assert (tmp_path / "r2025-04-01.5.md").read_text() == "second"
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_atomic_write_text_keeps_old_content_on_failure(tmp_path, monkeypatch):
+    target = tmp_path / "page.md"
+    target.write_text("old")
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(obsidian.os, "replace", fail_replace)
+    with pytest.raises(OSError):
+        obsidian.atomic_write_text(target, "new")
+
+    assert target.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [target]
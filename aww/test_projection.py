@@ -0,0 +1,94 @@
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from aww import projection
+from aww.obsidian import Level, Vault
+from aww.projection import EmbeddingCache, index_vectors, page_embeddings
+from aww.rag import Index
+from aww.test_rag import offline_embedding_stubs, temp_db_path  # keep
+
+
+@pytest.fixture
+def vault_copy(tmp_path) -> Vault:
+    shutil.copytree(Path.cwd() / "test_vault", tmp_path / "vault")
+    return Vault(tmp_path / "vault", "journal", "retrospectives", "queries")
+
+
+def test_index_vectors_skips_outdated_rows(temp_db_path, vault_copy):
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(vault_copy)
+    pages = [p for p in vault_copy.walk() if p.path.suffix == ".md"]
+
+    vectors = index_vectors(idx, vault_copy, pages)
+    assert set(vectors) == {p.path for p in pages}
+    assert all(len(v) == 3 for v in vectors.values())
+
+    changed = pages[0].path
+    os.utime(changed, ns=(0, changed.stat().st_mtime_ns + 1))
+    assert changed not in index_vectors(idx, vault_copy, pages)
+
+
+def test_index_vectors_reads_only_filtered_rows(temp_db_path, vault_copy):
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(vault_copy)
+    pages = [p for p in vault_copy.walk() if p.path.suffix == ".md"]
+
+    vectors = index_vectors(
+        idx, vault_copy, pages, start_date="2025-04-01", kind="journal", level=Level.daily
+    )
+    assert [p.name for p in vectors] == ["2025-04-01.md"]
+    assert index_vectors(idx, vault_copy, pages, kind="retrospective") == {}
+
+
+def test_page_embeddings_encode_each_content_once(tmp_path, vault_copy):
+    pages = [p for p in vault_copy.walk() if p.path.suffix == ".md"][:3]
+    contents = ["one", "two", "one"]
+    batches = []
+
+    def encode(texts):
+        batches.append(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    cache = EmbeddingCache(tmp_path / "embeddings", "sentence-transformers/model/torch/full")
+    stored = {pages[1].path: np.array([0.0, 2.0])}
+    vectors = page_embeddings(pages, contents, encode, cache, stored)
+
+    assert batches == [["one"]]
+    assert vectors.shape == (3, 2)
+    np.testing.assert_allclose(vectors[1], [0.0, 1.0])
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+
+    reloaded = EmbeddingCache(tmp_path / "embeddings", "sentence-transformers/model/torch/full")
+    page_embeddings(pages, contents, encode, reloaded)
+    assert batches == [["one"], ["two"]]
+    assert reloaded.path.name == "sentence-transformers_model_torch_full.npz"
+
+
+@pytest.mark.parametrize("method", ["pca", "tsne"])
+def test_project(method):
+    vectors = np.random.default_rng(0).normal(size=(20, 8)).astype(np.float32)
+    result = projection.project(vectors, method, perplexity=5)
+    assert result.shape == (20, 2)
+    np.testing.assert_allclose(result, projection.project(vectors, method, perplexity=5))
+
+
+def test_project_rejects_unknown_method():
+    with pytest.raises(ValueError, match="Invalid projection"):
+        projection.project(np.zeros((5, 2)), "mds")
+
+
+def test_index_vectors_handles_quotes_in_ids(temp_db_path, vault_copy):
+    quoted = vault_copy.path / "journal" / "it's a 'note'.md"
+    quoted.write_text("# Quotes\nSome text.")
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(vault_copy)
+    pages = [p for p in vault_copy.walk() if p.path == quoted]
+
+    assert list(index_vectors(idx, vault_copy, pages)) == [quoted]
@@ -0,0 +1,94 @@
+import datetime
+import json
+
+from aww.obsidian import Vault
+from aww.queries import QueryIndex, Resolution, fingerprint, legacy_id, normalize_question
+
+
+def test_fingerprint_ignores_case_and_punctuation():
+    assert normalize_question("  What did I do   this week?") == "what did i do this week"
+    assert fingerprint("What did I do this week?") == fingerprint("what did I do this week")
+
+
+def test_distinct_questions_have_distinct_fingerprints():
+    questions = [
+        "Did I exercise?",
+        "Who did I exercise with?",
+        "When did I exercise?",
+        "Why did I skip the gym?",
+        "How did I skip the gym?",
+        "Where was I in May?",
+        "Who was I with in May?",
+        "What is it?",
+        "Who is it?",
+    ]
+    assert len({fingerprint(q) for q in questions}) == len(questions)
+
+
+def test_resolve_by_fingerprint(tmp_path):
+    index = QueryIndex(tmp_path / "queries.json")
+    first = index.resolve("How was my sleep?")
+    second = index.resolve("how was my sleep")
+
+    assert first.match == "new"
+    assert second.match == "fingerprint"
+    assert second.query_id == first.query_id
+    assert index.entries[first.query_id].questions == ["How was my sleep?", "how was my sleep"]
+    assert QueryIndex(tmp_path / "queries.json").entries.keys() == {first.query_id}
+
+
+def test_resolve_by_similarity(tmp_path):
+    vectors = {
+        "sleep quality": [1.0, 0.0],
+        "sleep score": [0.95, 0.1],
+        "mood": [0.0, 1.0],
+    }
+    index = QueryIndex(tmp_path / "queries.json")
+    first = index.resolve("Sleep quality?", vectors.get, "model")
+    similar = index.resolve("Sleep score?", vectors.get, "model")
+    other = index.resolve("Mood?", vectors.get, "model")
+    other_model = index.resolve("Sleep score?", vectors.get, "other-model")
+
+    assert similar.match == "similar" and similar.query_id == first.query_id
+    assert other.match == "new"
+    assert other_model.match == "fingerprint" and other_model.query_id == first.query_id
+
+
+def test_prune(tmp_path):
+    (tmp_path / "vault").mkdir()
+    vault = Vault(tmp_path / "vault", "journal", "retrospectives", "retrospectives/queries")
+    index = QueryIndex(tmp_path / "queries.json")
+    old = index.resolve("Old question?").query_id
+    recent = index.resolve("Recent question?").query_id
+    index.entries[old].last_used = "2020-01-01T00:00:00"
+    for query_id in (old, recent, "orphan"):
+        query_dir = vault.path / vault.queries_dir / query_id
+        query_dir.mkdir(parents=True)
+        (query_dir / "query.md").write_text("?")
+
+    stale = index.stale(datetime.timedelta(days=30))
+    assert stale == [old]
+    assert index.orphans(vault) == ["orphan"]
+
+    assert index.prune(vault, stale + index.orphans(vault)) == 2
+    assert sorted(p.name for p in (vault.path / vault.queries_dir).iterdir()) == [recent]
+    assert json.loads((tmp_path / "queries.json").read_text()).keys() == {recent}
+
+
+def test_adopt_legacy_query_trees(tmp_path):
+    (tmp_path / "vault").mkdir()
+    vault = Vault(tmp_path / "vault", "journal", "retrospectives", "retrospectives/queries")
+    queries_dir = vault.path / vault.queries_dir
+    prompt = "How did I sleep in March?"
+    for query_id, text in ((legacy_id(prompt), prompt), ("0badc0de", "Other question?")):
+        (queries_dir / query_id).mkdir(parents=True)
+        (queries_dir / query_id / "query.md").write_text(text)
+    index = QueryIndex(tmp_path / "queries.json")
+
+    assert index.adopt_legacy(vault) == [legacy_id(prompt)]
+    assert index.orphans(vault) == ["0badc0de"]
+    assert QueryIndex(tmp_path / "queries.json").entries.keys() == {legacy_id(prompt)}
+
+    resolution = index.resolve("how did I sleep in march")
+    assert resolution == Resolution(legacy_id(prompt), "fingerprint")
+    assert index.adopt_legacy(vault) == []
@@ -1,15 +1,17 @@
+import datetime
 import shutil
 import tempfile
 import time
 from pathlib import Path
 
+import pandas as pd
 import pytest
 import pyarrow as pa
 from lancedb.embeddings import TextEmbeddingFunction
 from lancedb.embeddings.registry import register
 from lancedb.rerankers.base import Reranker
 
-from aww.obsidian import Vault
+from aww.obsidian import Level, Vault
 from aww.rag import Index
 
 
@@ -78,6 +80,15 @@ class FakeReranker(Reranker):
         )
 
 
+class FakeCrossEncoder:
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs):
+        self.batches.append(pairs)
+        return [float(query.lower() in text.lower()) for query, text in pairs]
+
+
 @pytest.fixture(autouse=True)
 def offline_embedding_stubs(monkeypatch):
     monkeypatch.setattr(
@@ -86,6 +97,9 @@ def offline_embedding_stubs(monkeypatch):
         lambda self: FakeEmbeddings.create(),
     )
     monkeypatch.setattr("aww.rag.CrossEncoderReranker", FakeReranker)
+    monkeypatch.setattr(
+        "aww.rag.load_cross_encoder", lambda *args, **kwargs: FakeCrossEncoder()
+    )
 
 
 def test_index_creation_and_full_rebuild(temp_db_path: Path, test_vault: Vault):
@@ -109,9 +123,9 @@ def test_index_creation_and_full_rebuild(temp_db_path: Path, test_vault: Vault):
 
     # 4. Verify content
     df = idx.tbl.to_pandas()
-    assert "index" in df["id"].values
-    assert "2025-03-30" in df["id"].values
-    assert "2025-04-01" in df["id"].values
+    assert "index.md" in df["id"].values
+    assert "journal/2025/03/2025-03-30.md" in df["id"].values
+    assert "journal/2025/04/2025-04-01.md" in df["id"].values
 
 
 def test_fts_search(temp_db_path: Path, test_vault: Vault):
@@ -126,16 +140,17 @@ def test_fts_search(temp_db_path: Path, test_vault: Vault):
     assert not results.empty
     assert len(results) == 3
     ids = results["id"].tolist()
-    assert "index" in ids
-    assert "2025-03-30" in ids
-    assert "2025-04-01" in ids
+    assert "index.md" in ids
+    assert "journal/2025/03/2025-03-30.md" in ids
+    assert "journal/2025/04/2025-04-01.md" in ids
+    assert len(idx.search("frontmatter", limit=2)) == 2
 
     # Search for a term that only exists in one document
 
     results = idx.search("yoga")
     assert not results.empty
     assert len(results) == 1
-    assert results["id"].iloc[0] == "2025-03-30"
+    assert results["id"].iloc[0] == "journal/2025/03/2025-03-30.md"
 
 
 def test_rag_search(temp_db_path: Path, test_vault: Vault):
@@ -149,7 +164,7 @@ def test_rag_search(temp_db_path: Path, test_vault: Vault):
     assert not results.empty
     assert len(results) > 0
     # The top result should be the page mentioning yoga
-    assert results["id"].iloc[0] == "2025-03-30"
+    assert results["id"].iloc[0] == "journal/2025/03/2025-03-30.md"
 
 
 def test_incremental_indexing(temp_db_path: Path, test_vault: Vault):
@@ -191,9 +206,316 @@ def test_incremental_indexing(temp_db_path: Path, test_vault: Vault):
 
         # Verify the new file is there
         df = idx.tbl.to_pandas()
-        assert "new_test_file" in df["id"].values
+        assert "new_test_file.md" in df["id"].values
 
     finally:
         # 4. Clean up the created file
         if new_file_path.exists():
             new_file_path.unlink()
+
+
+def test_reindexing_does_not_duplicate_pages(temp_db_path: Path, test_vault: Vault):
+    """Test that a full re-run upserts pages instead of appending duplicates."""
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(test_vault)
+    idx.add_pages(test_vault, batch_size=1)
+
+    assert idx.tbl.count_rows() == 3
+
+
+def test_same_name_in_different_folders(tmp_path: Path, temp_db_path: Path):
+    """Test that pages are keyed by vault-relative path, not by name."""
+    vault_path = tmp_path / "vault"
+    (vault_path / "a").mkdir(parents=True)
+    (vault_path / "b").mkdir(parents=True)
+    (vault_path / "a" / "notes.md").write_text("first")
+    (vault_path / "b" / "notes.md").write_text("second")
+    (vault_path / "it's.md").write_text("quoted")
+    vault = Vault(vault_path, "journal", "retrospectives", "queries")
+
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(vault)
+    max_mtime = idx.get_max_mtime_ns()
+
+    time.sleep(0.01)
+    (vault_path / "b" / "notes.md").write_text("second, updated")
+    (vault_path / "it's.md").write_text("quoted, updated")
+    assert idx.add_pages(vault, since_mtime_ns=max_mtime) == 2
+
+    df = idx.tbl.to_pandas().set_index("id")
+    assert len(df) == 3
+    assert df.loc["a/notes.md", "text"] == "first"
+    assert df.loc["b/notes.md", "text"] == "second, updated"
+    assert df.loc["it's.md", "text"] == "quoted, updated"
+
+
+def test_update_indices_creates_missing_indices(temp_db_path: Path, test_vault: Vault):
+    """Test that update_indices builds every index on a fresh table."""
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(test_vault)
+
+    idx.update_indices()
+
+    stats = {s["columns"][0]: s for s in idx.index_stats()}
+    assert set(stats) == {
+        "text",
+        "mtime_ns",
+        "source_date",
+        "kind",
+        "level",
+        "vector",
+    }
+    assert all(s["indexed_rows"] == 3 for s in stats.values())
+    assert all(s["unindexed_rows"] == 0 for s in stats.values())
+
+
+@pytest.mark.parametrize("threshold, retrained", [(0.5, False), (0.1, True)])
+def test_update_indices_retrains_only_past_threshold(
+    temp_db_path: Path, test_vault: Vault, monkeypatch, threshold, retrained
+):
+    """Test that small deltas are merged instead of retraining the vector index."""
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(test_vault)
+    idx.update_indices()
+    max_mtime = idx.get_max_mtime_ns()
+
+    calls = []
+    original = Index.create_vector_index
+    monkeypatch.setattr(
+        Index,
+        "create_vector_index",
+        lambda self, replace=False: calls.append(replace) or original(self, replace),
+    )
+
+    time.sleep(0.01)
+    new_file_path = test_vault.path / "new_test_file.md"
+    try:
+        new_file_path.write_text("This is a new file for incremental test.")
+        idx.add_pages(test_vault, since_mtime_ns=max_mtime)
+        idx.update_indices(retrain_threshold=threshold)
+    finally:
+        new_file_path.unlink()
+
+    assert calls == ([True] if retrained else [])
+    assert all(s["unindexed_rows"] == 0 for s in idx.index_stats())
+    assert idx.tbl.count_rows() == 4
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.batches = []
+
+    def generate_embeddings(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0, 0.0] for text in texts]
+
+
+def test_embed_queries_caches_and_batches(temp_db_path: Path):
+    """Test that query embeddings are computed once, in one batch."""
+    idx = Index(data_path=temp_db_path, query_cache_size=2)
+    idx.model = CountingEmbeddings()
+
+    vectors = idx.embed_queries(["yoga", "sleep", "yoga"])
+    assert vectors == [[4.0, 1.0, 0.0], [5.0, 1.0, 0.0], [4.0, 1.0, 0.0]]
+    assert idx.model.batches == [["yoga", "sleep"]]
+
+    assert idx.embed_queries(["  yoga "]) == [[4.0, 1.0, 0.0]]
+    assert len(idx.model.batches) == 1
+
+    # "sleep" is the least recently used entry and gets evicted.
+    idx.embed_queries(["running"])
+    idx.embed_queries(["sleep"])
+    assert idx.model.batches[1:] == [["running"], ["sleep"]]
+
+
+def test_embed_queries_persists_cache(temp_db_path: Path):
+    """Test that the query cache can be reloaded from the data path."""
+    idx = Index(data_path=temp_db_path, persist_query_cache=True)
+    idx.model = CountingEmbeddings()
+    idx.embed_queries(["yoga"])
+    assert (temp_db_path / "query_cache.json").exists()
+
+    reloaded = Index(data_path=temp_db_path, persist_query_cache=True)
+    reloaded.model = CountingEmbeddings()
+    assert reloaded.embed_queries(["yoga"]) == [[4.0, 1.0, 0.0]]
+    assert reloaded.model.batches == []
+
+    other_model = Index(
+        data_path=temp_db_path,
+        embedding_model_name="other-model",
+        persist_query_cache=True,
+    )
+    other_model.model = CountingEmbeddings()
+    other_model.embed_queries(["yoga"])
+    assert other_model.model.batches == [["yoga"]]
+
+
+@pytest.mark.parametrize("content", ['{"model": "x", "embed', "[1, 2]", '{"embeddings": 3}'])
+def test_corrupt_query_cache_starts_empty(temp_db_path: Path, content):
+    (temp_db_path / "query_cache.json").write_text(content)
+    idx = Index(data_path=temp_db_path, persist_query_cache=True)
+    idx.model = CountingEmbeddings()
+    assert idx.embed_queries(["yoga"]) == [[4.0, 1.0, 0.0]]
+    assert idx.model.batches == [["yoga"]]
+    assert list(temp_db_path.glob(".query_cache.json.*")) == []
+
+    reloaded = Index(data_path=temp_db_path, persist_query_cache=True)
+    reloaded.model = CountingEmbeddings()
+    reloaded.embed_queries(["yoga"])
+    assert reloaded.model.batches == []
+
+
+def test_search_many(temp_db_path: Path, test_vault: Vault):
+    """Test that search_many answers every query with one rerank batch."""
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(test_vault)
+    idx.update_indices()
+
+    fts_results = idx.search_many(["yoga", "frontmatter"])
+    assert [len(r) for r in fts_results] == [1, 3]
+    assert fts_results[0]["id"].iloc[0] == "journal/2025/03/2025-03-30.md"
+    assert "_relevance_score" in fts_results[0].columns
+    assert len(idx.get_reranker().model.batches) == 1
+
+    rag_results = idx.search_many(["yoga", "frontmatter"], rag=True)
+    assert rag_results[0]["id"].iloc[0] == "journal/2025/03/2025-03-30.md"
+    assert len(idx.get_reranker().model.batches) == 2
+
+    limited = idx.search_many(["yoga", "frontmatter"], limit=2)
+    assert [len(r) for r in limited] == [1, 2]
+    filtered = idx.search_many(["frontmatter"], kind="journal", level=Level.daily, limit=1)
+    assert filtered[0]["id"].tolist() == [
+        idx.search("frontmatter", kind="journal", level=Level.daily, limit=1)["id"].iloc[0]
+    ]
+
+    assert idx.search_many([]) == []
+
+
+def test_page_metadata_columns(temp_db_path: Path, test_vault: Vault):
+    """Test that kind, level and source_date are derived from the vault layout."""
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(test_vault)
+
+    df = idx.tbl.to_pandas().set_index("id")
+    daily = df.loc["journal/2025/03/2025-03-30.md"]
+    assert (daily["kind"], daily["level"], daily["source_date"]) == (
+        "journal",
+        "daily",
+        "2025-03-30",
+    )
+    assert pd.isna(daily["version"])
+    other = df.loc["index.md"]
+    assert other["kind"] == "other"
+    assert other["level"] is None
+    assert other["source_date"] is None
+
+
+def test_previous_versions_are_marked(temp_db_path: Path, tmp_path: Path):
+    vault = Vault(tmp_path, "journal", "retrospectives", "queries")
+    directory = tmp_path / "retrospectives/2025/03"
+    directory.mkdir(parents=True)
+    (directory / "r2025-03-30.md").write_text("Current retrospective.")
+    (directory / "r2025-03-30.1.md").write_text("Previous retrospective.")
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(vault)
+
+    df = idx.tbl.to_pandas().set_index("id")
+    current = df.loc["retrospectives/2025/03/r2025-03-30.md"]
+    previous = df.loc["retrospectives/2025/03/r2025-03-30.1.md"]
+    assert pd.isna(current["version"])
+    assert previous["version"] == 1
+    assert current["source_date"] == previous["source_date"] == "2025-03-30"
+
+
+@pytest.mark.parametrize("rag", [False, True])
+def test_search_filters(temp_db_path: Path, test_vault: Vault, rag):
+    """Test that date, kind and level filters restrict the results."""
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(test_vault)
+    idx.update_indices()
+
+    results = idx.search("frontmatter", rag=rag, start_date="2025-04-01")
+    assert results["id"].tolist() == ["journal/2025/04/2025-04-01.md"]
+
+    results = idx.search(
+        "frontmatter",
+        rag=rag,
+        start_date=datetime.date(2025, 1, 1),
+        end_date=datetime.date(2025, 3, 31),
+        kind="journal",
+        level=[Level.daily],
+    )
+    assert results["id"].tolist() == ["journal/2025/03/2025-03-30.md"]
+
+    results = idx.search_many(["frontmatter"], rag=rag, kind="other")
+    assert results[0]["id"].tolist() == ["index.md"]
+
+    with pytest.raises(ValueError, match="Invalid kind"):
+        idx.search("frontmatter", rag=rag, kind="journal' OR 1=1 --")
+
+
+@pytest.mark.parametrize("rag", [False, True])
+def test_matching_dates(temp_db_path: Path, test_vault: Vault, rag):
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(test_vault)
+    idx.update_indices()
+
+    dates = idx.matching_dates(
+        "yoga", rag=rag, kind="journal", level=Level.daily, limit=1
+    )
+    if rag:
+        assert len(dates) == 1
+    else:
+        assert dates == {"2025-03-30"}
+    assert idx.matching_dates("yoga", rag=rag, start_date="2025-04-01", limit=5) <= {
+        "2025-04-01"
+    }
+
+
+def test_float16_vectors_with_refine(temp_db_path: Path, test_vault: Vault):
+    idx = Index(data_path=temp_db_path, vector_dtype="float16", refine_factor=5)
+    idx.create_table(clean=True)
+    idx.add_pages(test_vault)
+    idx.create_vector_index()
+
+    assert idx.tbl.schema.field("vector").type == pa.list_(pa.float16(), 3)
+    results = idx.search("yoga", rag=True)
+    assert results["id"].iloc[0] == "journal/2025/03/2025-03-30.md"
+
+
+def test_vector_dtype_change_outdates_table(temp_db_path: Path, test_vault: Vault):
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    assert not idx.is_outdated()
+
+    idx = Index(data_path=temp_db_path, vector_dtype="float16")
+    idx.open_table()
+    assert idx.is_outdated()
+
+
+def test_open_and_validate_table_without_model(
+    temp_db_path: Path, test_vault: Vault, monkeypatch
+):
+    idx = Index(data_path=temp_db_path)
+    idx.create_table(clean=True)
+    idx.add_pages(test_vault)
+    idx.create_fts_index()
+    assert (temp_db_path / "models.json").exists()
+
+    def fail_build(self):
+        raise AssertionError("the embedding model should not be needed")
+
+    monkeypatch.setattr(Index, "_build_embedding_model", fail_build)
+    idx = Index(data_path=temp_db_path)
+    idx.open_table()
+    assert not idx.is_outdated()
+    assert idx.search("yoga")["id"].iloc[0] == "journal/2025/03/2025-03-30.md"
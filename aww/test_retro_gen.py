@@ -1,9 +1,13 @@
 import asyncio
 import datetime
 
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
 from pydantic_ai.models.test import TestModel
+from pydantic_ai.usage import Usage
 
-from aww import retro, retro_gen
+from aww import retro, retro_gen, tracing
 from aww.obsidian import Level
 from aww.retro_gen import RecursiveGenerator
 from aww.test_retro import tmp_vault  # keep
@@ -114,3 +118,207 @@ def test_retro_prompt_includes_canonical_tags(tmp_vault, monkeypatch):
     assert "#work" in prompt
     assert "Career/work tasks and outcomes" in prompt
     assert "#mental_health" in prompt
+
+
+def test_run_models_shares_snapshot(tmp_vault, monkeypatch):
+    reads = []
+    original_page_content = retro_gen.page_content
+
+    async def counting_page_content(node):
+        reads.append(node.page)
+        return await original_page_content(node)
+
+    monkeypatch.setattr(retro_gen, "page_content", counting_page_content)
+
+    sel = retro.Selection(tmp_vault, datetime.date(2025, 3, 30), Level.weekly)
+    results = asyncio.run(
+        retro_gen.run_models(
+            {
+                "a": TestModel(custom_output_text="from model a"),
+                "b": TestModel(custom_output_text="from model b"),
+            },
+            sel,
+            context_levels=[Level.daily],
+            cache_policies=[
+                retro.NoRootCachePolicy(),
+                retro.NoLevelsCachePolicy(list(Level)),
+            ],
+            concurrency_limits={"a": 1, "b": 2},
+        )
+    )
+
+    assert "from model a" in results["a"].output
+    assert "from model b" in results["b"].output
+    assert len(reads) == len(set(reads))
+
+    weekly = sel.root.retro_page
+    alternatives = [weekly.path, weekly.path.with_suffix(".1.md")]
+    outputs = {path.read_text().split("---\n")[-1] for path in alternatives}
+    assert outputs == {results["a"].output, results["b"].output}
+
+
+def test_run_models_reports_failures_per_model(tmp_vault):
+    def fail(messages, info):
+        raise ModelHTTPError(503, "test", "unavailable")
+
+    sel = retro.Selection(tmp_vault, datetime.date(2025, 3, 30), Level.weekly)
+    failures = {}
+    results = asyncio.run(
+        retro_gen.run_models(
+            {"good": TestModel(custom_output_text="fine"), "bad": FunctionModel(fail)},
+            sel,
+            context_levels=[Level.daily],
+            cache_policies=[
+                retro.NoRootCachePolicy(),
+                retro.NoLevelsCachePolicy(list(Level)),
+            ],
+            max_retries={"bad": 0},
+            failures=failures,
+        )
+    )
+
+    assert "fine" in results["good"].output
+    assert results["bad"] is None
+    assert failures["good"] == []
+    assert sel.root in [node for node, _ in failures["bad"]]
+
+
+def test_recursive_generator_tracing(tmp_vault, tmp_path):
+    trace_file = tmp_path / "trace.jsonl"
+    tracer = tracing.Tracer([tracing.JsonlExporter(trace_file)])
+    sel = retro.Selection(tmp_vault, datetime.date(2025, 3, 30), Level.weekly)
+    g = RecursiveGenerator(TestModel(), sel, tracer=tracer)
+    asyncio.run(
+        g.run(
+            context_levels=[Level.daily],
+            cache_policies=[retro.NoRootCachePolicy(), retro.NoLevelsCachePolicy(list(Level))],
+        )
+    )
+
+    spans = {span.name: span for span in tracer.spans}
+    weekly = spans[sel.root.retro_page.name]
+    assert not weekly.cached
+    assert weekly.total_tokens > 0
+    assert len(weekly.sources) == 7
+
+    rows = tracing.summarize(tracer.spans)
+    assert {row["level"] for row in rows} == {"daily", "weekly"}
+    path = tracing.critical_path(tracer.spans, weekly.name, weekly.model_name)
+    assert path[0] is weekly
+    assert len(trace_file.read_text().splitlines()) == len(tracer.spans)
+
+
+def test_recursive_generator_retries_and_isolates_failures(tmp_vault):
+    for day in (24, 25):
+        journal_page = tmp_vault.page(datetime.date(2025, 3, day), Level.daily)
+        journal_page.path.parent.mkdir(parents=True, exist_ok=True)
+        journal_page.path.write_text(f"# March {day}")
+    sel = retro.Selection(tmp_vault, datetime.date(2025, 3, 30), Level.weekly)
+    daily = sorted(s for s in sel.root.sources if s.level == Level.daily and s.page)
+    flaky, broken = daily[0], daily[1]
+    calls = []
+
+    def respond(messages, info):
+        prompt = str(messages[-1].parts[-1].content)
+        calls.append(prompt)
+        if f"[[{broken.page.name}]]" in prompt:
+            raise ModelHTTPError(500, "test", "boom")
+        if f"[[{flaky.page.name}]]" in prompt and len(calls) == 1:
+            raise ModelHTTPError(429, "test", "slow down")
+        return ModelResponse(parts=[TextPart("summary")])
+
+    tracer = tracing.Tracer()
+    g = RecursiveGenerator(
+        FunctionModel(respond), sel, tracer=tracer, max_retries=2, retry_base_delay=0
+    )
+    result = asyncio.run(
+        g.run(
+            context_levels=[Level.daily],
+            cache_policies=[retro.NoRootCachePolicy(), retro.NoLevelsCachePolicy(list(Level))],
+        )
+    )
+
+    assert [node for node, _ in g.failures][0] == broken
+    spans = {span.name: span for span in tracer.spans}
+    assert spans[flaky.retro_page.name].retries == 1
+    assert spans[flaky.retro_page.name].error is None
+    assert spans[broken.retro_page.name].retries == 2
+    assert "boom" in spans[broken.retro_page.name].error
+    assert flaky.retro_page.path.exists()
+    assert not broken.retro_page.path.exists()
+
+
+def test_recursive_generator_does_not_save_parents_of_failed_nodes(tmp_vault):
+    for day in (24, 25):
+        journal_page = tmp_vault.page(datetime.date(2025, 3, day), Level.daily)
+        journal_page.path.parent.mkdir(parents=True, exist_ok=True)
+        journal_page.path.write_text(f"# March {day}")
+    sel = retro.Selection(tmp_vault, datetime.date(2025, 3, 30), Level.weekly)
+    broken = max(s for s in sel.root.sources if s.level == Level.daily and s.page)
+    weekly = sel.root.retro_page
+    weekly_content = weekly.path.read_text() if weekly.path.exists() else None
+
+    def respond(messages, info):
+        if f"[[{broken.page.name}]]" in str(messages[-1].parts[-1].content):
+            raise ModelHTTPError(503, "test", "unavailable")
+        return ModelResponse(parts=[TextPart("summary")])
+
+    g = RecursiveGenerator(FunctionModel(respond), sel, max_retries=0)
+    result = asyncio.run(
+        g.run(
+            context_levels=[Level.daily, Level.weekly],
+            cache_policies=[retro.NoRootCachePolicy(), retro.NoLevelsCachePolicy(list(Level))],
+        )
+    )
+
+    assert result is None
+    assert [node for node, _ in g.failures] == [broken, sel.root]
+    assert "Sources failed" in str(g.failures[-1][1])
+    if weekly_content is None:
+        assert not weekly.path.exists()
+    else:
+        assert weekly.path.read_text() == weekly_content
+        assert not weekly.path.with_suffix(".1.md").exists()
+
+
+def test_cached_tokens():
+    assert retro_gen.cached_tokens(Usage(details={"cached_tokens": 1024})) == 1024
+    assert retro_gen.cached_tokens(Usage(details={"cached_content_tokens": 64})) == 64
+    assert retro_gen.cached_tokens(Usage()) == 0
+
+
+def test_recursive_generator_prunes_irrelevant_nodes(tmp_vault):
+    for day in (24, 25):
+        journal_page = tmp_vault.page(datetime.date(2025, 3, day), Level.daily)
+        journal_page.path.parent.mkdir(parents=True, exist_ok=True)
+        journal_page.path.write_text(f"# March {day}")
+    policies = [retro.NoRootCachePolicy(), retro.NoLevelsCachePolicy(list(Level))]
+    calls = []
+
+    def respond(messages, info):
+        calls.append(messages[-1].parts[-1].content)
+        return ModelResponse(parts=[TextPart("summary")])
+
+    relevant = datetime.date(2025, 3, 24)
+    sel = retro.Selection(tmp_vault, datetime.date(2025, 3, 30), Level.weekly)
+    g = RecursiveGenerator(
+        FunctionModel(respond), sel, is_relevant=lambda node: relevant in node.dates
+    )
+    result = asyncio.run(g.run(context_levels=[Level.daily], cache_policies=policies))
+
+    assert not result.pruned
+    assert result.partial
+    assert len(calls) == 2
+    assert retro_gen.NO_RELEVANT_CONTENT not in str(calls[-1])
+    assert tmp_vault.retrospective_page(relevant, Level.daily).path.exists()
+    pruned = tmp_vault.retrospective_page(datetime.date(2025, 3, 25), Level.daily)
+    assert not pruned.path.exists()
+
+    calls.clear()
+    sel = retro.Selection(tmp_vault, datetime.date(2025, 3, 30), Level.weekly)
+    g = RecursiveGenerator(FunctionModel(respond), sel, is_relevant=lambda node: False)
+    result = asyncio.run(g.run(context_levels=[Level.daily], cache_policies=policies))
+
+    assert result.pruned
+    assert result.output == retro_gen.NO_RELEVANT_CONTENT
+    assert calls == []
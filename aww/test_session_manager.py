@@ -82,6 +82,28 @@ def test_save_session_round_trips_message_history(session_manager: SessionManage
     assert loaded.messages[1].parts[0].content == "Hi there"
 
 
+def test_append_messages(session_manager: SessionManager):
+    session = session_manager.create_session(title="Thread", model="local")
+    session_manager.append_messages(
+        session.id,
+        [
+            ModelRequest(parts=[UserPromptPart(content="Hello")]),
+            ModelResponse(parts=[TextPart(content="Hi there")]),
+        ],
+    )
+    session_manager.append_messages(
+        session.id, [ModelRequest(parts=[UserPromptPart(content="Again")])], model="gpt"
+    )
+    session_manager.append_messages(session.id, [])
+
+    loaded = session_manager.load_session(session.id)
+    assert [m.parts[0].content for m in loaded.messages] == ["Hello", "Hi there", "Again"]
+    assert loaded.model == "gpt"
+    assert loaded.updated_at > session.updated_at
+    with pytest.raises(ValueError, match="not found"):
+        session_manager.append_messages("missing", loaded.messages)
+
+
 def test_latest_and_channel_filtered_listing(session_manager: SessionManager):
     first = session_manager.create_session(title="First", channel="telegram")
     time.sleep(0.01)
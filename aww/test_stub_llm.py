@@ -0,0 +1,103 @@
+import asyncio
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.models.openai import OpenAIModel
+from pydantic_ai.providers.openai import OpenAIProvider
+
+from aww.concurrency import retry_after
+from aww.config import openai_provider
+from aww.stub_llm import StubConfig, start_server
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        server = start_server(StubConfig(**kwargs))
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def post(server, body):
+    request = urllib.request.Request(
+        server.base_url + "/chat/completions",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    return urllib.request.urlopen(request)
+
+
+def agent_for(server):
+    model = OpenAIModel(
+        "stub-model",
+        provider=OpenAIProvider(base_url=server.base_url, api_key="stub"),
+    )
+    return Agent(model, system_prompt="You are a stub.")
+
+
+def test_chat_completion_is_deterministic(stub):
+    server = stub(output_tokens=7)
+    agent = agent_for(server)
+
+    first = agent.run_sync("How was my week?")
+    second = agent.run_sync("How was my week?")
+
+    assert len(first.output.split()) == 7
+    assert first.output == second.output
+    assert first.usage().response_tokens == 7
+    assert server.stats.completed == 2
+
+
+def test_streaming(stub):
+    server = stub(output_tokens=5, tokens_per_second=1000)
+    agent = agent_for(server)
+
+    async def run():
+        async with agent.run_stream("Summarize") as result:
+            return await result.get_output()
+
+    assert len(asyncio.run(run()).split()) == 5
+
+
+def test_models_endpoint(stub):
+    server = stub(model="tiny")
+    with urllib.request.urlopen(server.base_url + "/models") as response:
+        assert json.load(response)["data"][0]["id"] == "tiny"
+
+
+def test_rate_limit_and_errors(stub):
+    server = stub(rate_limit=1)
+    post(server, {"messages": []}).close()
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        post(server, {"messages": []})
+    assert exc_info.value.code == 429
+    assert exc_info.value.headers["Retry-After"] == "1"
+
+    server = stub(error_rate=1.0)
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        post(server, {"messages": []})
+    assert exc_info.value.code == 500
+    assert server.stats.errors == 1
+
+
+def test_client_leaves_retries_to_call_with_retries(stub):
+    server = stub(rate_limit=1)
+    post(server, {"messages": []}).close()
+    agent = Agent(OpenAIModel("stub-model", provider=openai_provider(server.base_url)))
+
+    with pytest.raises(ModelHTTPError) as exc_info:
+        agent.run_sync("How was my week?")
+    assert exc_info.value.status_code == 429
+    assert server.stats.requests == 2
+    assert retry_after(exc_info.value) == 1
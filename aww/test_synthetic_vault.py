@@ -0,0 +1,71 @@
+import datetime
+
+from click.testing import CliRunner
+
+from aww.cli.dev import gen_vault
+from aww.obsidian import Level
+from aww.synthetic_vault import generate_vault, make_tags
+
+
+def test_generate_vault(tmp_path):
+    vault = generate_vault(tmp_path / "vault", years=1, end_year=2024, retro_versions=3)
+
+    d = datetime.date(2024, 2, 29)
+    page = vault.page(d, Level.daily)
+    assert page.path.exists()
+    assert {"stress", "mood", "sleep_score"} <= set(page.frontmatter())
+    assert not page.events().empty
+    assert page.tags()
+
+    retro_page = vault.retrospective_page(d, Level.daily)
+    assert retro_page.frontmatter()["sources"] == ["[[2024-02-29]]"]
+    assert retro_page.path.with_suffix(".2.md").exists()
+    assert vault.page_info(retro_page).source_date == d
+
+    assert sum(1 for _ in vault.walk()) == 366 * 4
+
+
+def test_generate_vault_is_deterministic(tmp_path):
+    a = generate_vault(tmp_path / "a", years=1, end_year=2024, seed=7)
+    b = generate_vault(tmp_path / "b", years=1, end_year=2024, seed=7)
+    d = datetime.date(2024, 6, 1)
+    assert a.page(d, Level.daily).full_content() == b.page(d, Level.daily).full_content()
+
+
+def test_make_tags_are_distinct():
+    tags = make_tags(200)
+    assert len(set(tags)) == 200
+
+
+def test_generate_vault_periodic_and_notes(tmp_path):
+    vault = generate_vault(
+        tmp_path / "vault",
+        years=1,
+        end_year=2024,
+        notes_per_day=2,
+        periodic=True,
+        metrics=False,
+        tasks=0,
+    )
+
+    d = datetime.date(2024, 12, 31)
+    assert vault.page(d, Level.monthly).path.exists()
+    yearly = vault.retrospective_page(d, Level.yearly)
+    assert len(yearly.frontmatter()["sources"]) == 366
+    weekly = vault.retrospective_page(datetime.date(2024, 4, 7), Level.weekly)
+    assert len(weekly.frontmatter()["sources"]) == 7
+    assert vault.page(d, Level.daily).tasks().empty
+    assert vault.page(d, Level.daily).frontmatter() == {}
+    assert len(list((vault.path / "notes" / "2024").glob("*.md"))) == 366 * 2
+
+
+def test_gen_vault_command(tmp_path):
+    result = CliRunner().invoke(
+        gen_vault, [str(tmp_path / "vault"), "--years", "1", "--end-year", "2024"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "Generated" in result.output
+
+    result = CliRunner().invoke(gen_vault, [str(tmp_path / "vault"), "--years", "1"])
+    assert result.exit_code != 0
+    assert "not empty" in result.output
@@ -1,4 +1,9 @@
+from click.testing import CliRunner
+
+from aww import database
 from aww.cli import tags as tags_cli
+from aww.config import Settings
+from aww.tag_mapping import TagMatcher, rename_tags, rewrite_pages
 
 
 def test_normalize_tag():
@@ -14,3 +19,75 @@ def test_suggest_canonical_tag():
     assert tags_cli.suggest_canonical_tag("Mental-Health", canonical) == "mental_health"
     assert tags_cli.suggest_canonical_tag("health/mental", canonical) == "health/mental"
     assert tags_cli.suggest_canonical_tag("unknown", canonical) is None
+
+
+def test_tag_matcher():
+    matcher = TagMatcher({"mental_health", "deep_work", "sleep"})
+    matches = matcher.match(["mental_helth", "deepwork", "zzz"], cutoff=0.5)
+    assert matches[0][0][0] == "mental_health"
+    assert matches[1][0][0] == "deep_work"
+    assert matches[2] == []
+    assert all(score <= 1.0 + 1e-9 for _, score in matches[0])
+
+
+def test_rename_tags():
+    text = (
+        "---\n"
+        "tags: [Mental-Health, other]\n"
+        "aliases:\n"
+        "  - Mental-Health\n"
+        "---\n"
+        "Felt #Mental-Health today, #Mental-Health/child and #Mental-Healthy.\n"
+        "Mental-Health without hash.\n"
+        "\n```python\n#Mental-Health\n```\n"
+    )
+    renamed = rename_tags(text, {"Mental-Health": "mental_health"})
+    assert renamed == (
+        "---\n"
+        "tags: [mental_health, other]\n"
+        "aliases:\n"
+        "  - Mental-Health\n"
+        "---\n"
+        "Felt #mental_health today, #Mental-Health/child and #Mental-Healthy.\n"
+        "Mental-Health without hash.\n"
+        "\n```python\n#Mental-Health\n```\n"
+    )
+
+    listed = "---\ntags:\n  - DeepWork\n  - 'sleep'\n---\n"
+    assert rename_tags(listed, {"DeepWork": "deep_work"}) == (
+        "---\ntags:\n  - deep_work\n  - 'sleep'\n---\n"
+    )
+
+
+def test_rewrite_pages_writes_only_changed(tmp_path):
+    changed = tmp_path / "a.md"
+    changed.write_text("#DeepWork all day\n")
+    unchanged = tmp_path / "b.md"
+    unchanged.write_text("#deep_work already\n")
+    mtime = unchanged.stat().st_mtime_ns
+
+    paths = [changed, unchanged, changed, tmp_path / "missing.md"]
+    assert rewrite_pages(paths, {"DeepWork": "deep_work"}) == [changed]
+    assert changed.read_text() == "#deep_work all day\n"
+    assert unchanged.stat().st_mtime_ns == mtime
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_map_apply(tmp_path):
+    settings = Settings(data_path=str(tmp_path / "data"), tags={"deep_work": "Focused work"})
+    db_path = database.get_db_path(settings)
+    database.init_db(db_path)
+    page_a = tmp_path / "a.md"
+    page_a.write_text("#DeepWork and #deep_work\n")
+    page_b = tmp_path / "b.md"
+    page_b.write_text("---\ntags: DeepWork\n---\nbody\n")
+    database.save_page_tags(db_path, "2026-01-01", "journal", "daily", page_a, None, None, ["DeepWork", "deep_work"])
+    database.save_page_tags(db_path, "2026-01-02", "journal", "daily", page_b, None, None, ["DeepWork"])
+
+    result = CliRunner().invoke(tags_cli.map, ["--apply"], obj={"settings": settings})
+    assert result.exit_code == 0, result.output
+    assert "DeepWork -> deep_work" in result.output
+    assert "Renamed 1 tag(s) in 2 page(s)." in result.output
+    assert page_a.read_text() == "#deep_work and #deep_work\n"
+    assert page_b.read_text() == "---\ntags: deep_work\n---\nbody\n"
+    assert database.get_tags_frequency(db_path) == [("deep_work", 2)]
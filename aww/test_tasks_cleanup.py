@@ -0,0 +1,52 @@
+import datetime
+
+from click.testing import CliRunner
+
+from aww.cli.taskscleanup import tasks_cleanup
+from aww.obsidian import Level, Page, Vault
+from aww.tasks_cleanup import cleanup, cleanup_text, template_tasks
+
+TEMPLATE = "---\ntags: daily\n---\n- [ ] Exercise\n- [ ] Read\n"
+
+
+def test_cleanup_text():
+    text = "---\nnote: - [ ] Exercise\n---\n- [ ] Exercise\n  - [x] Read\n- [ ] Read more\n"
+    new_text, cancelled = cleanup_text(text, frozenset({"Exercise", "Read"}))
+    assert new_text == "---\nnote: - [ ] Exercise\n---\n- [-] Exercise\n  - [x] Read\n- [ ] Read more\n"
+    assert cancelled == ["Exercise"]
+
+
+def test_cleanup(tmp_path):
+    vault = Vault(tmp_path, "journal", "retrospectives", "retrospectives/queries")
+    template = tmp_path / "templates" / "daily.md"
+    template.parent.mkdir()
+    template.write_text(TEMPLATE)
+    tasks = template_tasks(Page(template))
+    assert tasks == {"Exercise", "Read"}
+
+    day1, day2 = datetime.date(2026, 1, 5), datetime.date(2026, 1, 6)
+    page1, page2 = vault.page(day1, Level.daily), vault.page(day2, Level.daily)
+    page1.path.parent.mkdir(parents=True, exist_ok=True)
+    page2.path.parent.mkdir(parents=True, exist_ok=True)
+    page1.path.write_text("- [ ] Exercise\n- [x] Read\n")
+    page2.path.write_text("- [x] Exercise\n")
+    mtime = page2.path.stat().st_mtime_ns
+
+    end = datetime.date(2026, 1, 8)
+    dry = cleanup(vault, day1, end, tasks, dry_run=True)
+    assert [c.date for c in dry.changed] == [day1]
+    assert page1.path.read_text() == "- [ ] Exercise\n- [x] Read\n"
+
+    report = cleanup(vault, day1, end, tasks)
+    assert report.cancelled == 1 and report.unchanged == 1
+    assert report.missing == [datetime.date(2026, 1, 7)]
+    assert page1.path.read_text() == "- [-] Exercise\n- [x] Read\n"
+    assert page2.path.stat().st_mtime_ns == mtime
+
+    result = CliRunner().invoke(
+        tasks_cleanup,
+        ["-s", "2026-01-05", "-e", "2026-01-07", "-v"],
+        obj={"vault": vault},
+    )
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines()[-1] == "0 task(s) cancelled in 0 page(s), 2 unchanged, 0 missing."
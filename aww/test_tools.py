@@ -19,6 +19,7 @@ from aww.tools import (
     remember_tool,
     save_page_tool,
     search_tool,
+    search_many_tool,
     list_dates_tool,
 )
 import pandas as pd
@@ -257,6 +258,34 @@ def test_search_tool(mock_ctx):
     mock_ctx.deps.index.search.assert_called_with("Found")
 
 
+def test_search_tool_passes_filters(mock_ctx):
+    mock_ctx.deps.index.search.return_value = pd.DataFrame(
+        {"id": ["FoundPage"], "text": ["Content 1"]}
+    )
+    mock_ctx.deps.index.tbl = MagicMock()
+
+    search_tool(mock_ctx, "Found", start="2025-01-01", kind="retrospective")
+
+    mock_ctx.deps.index.search.assert_called_with(
+        "Found", start_date="2025-01-01", kind="retrospective"
+    )
+
+
+def test_search_many_tool(mock_ctx):
+    mock_ctx.deps.index.search_many.return_value = [
+        pd.DataFrame({"id": ["FoundPage"], "text": ["Content 1"]}),
+        pd.DataFrame({"id": [], "text": []}),
+    ]
+    mock_ctx.deps.index.tbl = MagicMock()
+
+    result = search_many_tool(mock_ctx, ["Found", "Missing"])
+
+    assert "## Results for: Found" in result
+    assert "# FoundPage\nContent 1" in result
+    assert "## Results for: Missing\n\nNo pages found matching this query." in result
+    mock_ctx.deps.index.search_many.assert_called_once_with(["Found", "Missing"])
+
+
 def test_remember_tool(mock_ctx):
     mock_page = MagicMock(spec=Page)
     mock_page.path = "dummy_path"
@@ -322,7 +322,14 @@ def add_to_daily_journal_tool(ctx: RunContext[ChatDeps], content: str) -> str:
     return f"Created ## AWW section in '{page.name}'."
 
 
-def search_tool(ctx: RunContext[ChatDeps], query: str) -> str:
+def search_tool(
+    ctx: RunContext[ChatDeps],
+    query: str,
+    start: str = None,
+    end: str = None,
+    kind: str = None,
+    level: str = None,
+) -> str:
     """
     Search for pages in the vault using RAG (Retrieval Augmented Generation).
     This performs a deep archival search across the full archive with semantic depth,
@@ -331,6 +338,10 @@ def search_tool(ctx: RunContext[ChatDeps], query: str) -> str:
 
     Args:
         query: The query to search for.
+        start: Only return pages dated on or after this date (YYYY-MM-DD).
+        end: Only return pages dated on or before this date (YYYY-MM-DD).
+        kind: Only return pages of this kind: journal, retrospective, query or other.
+        level: Only return pages of this level: daily, weekly, monthly or yearly.
     """
     if not ctx.deps.index:
         return "Search is not available (index not initialized)."
@@ -343,14 +354,58 @@ def search_tool(ctx: RunContext[ChatDeps], query: str) -> str:
         if ctx.deps.index.tbl is None:
              return "Search index not found. Please run 'aww index' first."
 
-        results_df = ctx.deps.index.search(query)
+        filters = _search_filters(start, end, kind, level)
+        results_df = ctx.deps.index.search(query, **filters)
 
         if results_df.empty:
             return "No pages found matching your search query."
 
+        return _format_search_results(results_df)
+
+    except Exception as e:
+        return f"Error performing search: {str(e)}"
+
+
+def search_many_tool(
+    ctx: RunContext[ChatDeps],
+    queries: List[str],
+    start: str = None,
+    end: str = None,
+    kind: str = None,
+    level: str = None,
+) -> str:
+    """
+    Search for pages in the vault for several queries at once.
+    Prefer this over calling `search_tool` repeatedly when you need to explore
+    multiple themes or phrasings: all queries are answered in a single batch.
+
+    Args:
+        queries: The queries to search for.
+        start: Only return pages dated on or after this date (YYYY-MM-DD).
+        end: Only return pages dated on or before this date (YYYY-MM-DD).
+        kind: Only return pages of this kind: journal, retrospective, query or other.
+        level: Only return pages of this level: daily, weekly, monthly or yearly.
+    """
+    if not ctx.deps.index:
+        return "Search is not available (index not initialized)."
+
+    try:
+        if ctx.deps.index.tbl is None:
+            ctx.deps.index.open_table()
+
+        if ctx.deps.index.tbl is None:
+            return "Search index not found. Please run 'aww index' first."
+
+        filters = _search_filters(start, end, kind, level)
         output = []
-        for _, row in results_df.iterrows():
-            output.append(f"# {row['id']}\n{row['text']}\n")
+        for query, results_df in zip(
+            queries, ctx.deps.index.search_many(queries, **filters)
+        ):
+            output.append(f"## Results for: {query}\n")
+            if results_df.empty:
+                output.append("No pages found matching this query.\n")
+            else:
+                output.append(_format_search_results(results_df))
 
         return "\n".join(output)
 
@@ -358,6 +413,18 @@ def search_tool(ctx: RunContext[ChatDeps], query: str) -> str:
         return f"Error performing search: {str(e)}"
 
 
+def _search_filters(start, end, kind, level) -> dict:
+    filters = dict(start_date=start, end_date=end, kind=kind, level=level)
+    return {key: value for key, value in filters.items() if value}
+
+
+def _format_search_results(results_df) -> str:
+    output = []
+    for _, row in results_df.iterrows():
+        output.append(f"# {row['id']}\n{row['text']}\n")
+    return "\n".join(output)
+
+
 def list_dates_tool(
     ctx: RunContext[ChatDeps],
     start: str = None,
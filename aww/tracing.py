@@ -0,0 +1,141 @@
+"""
+Lightweight tracing for retrospective generation.
+Each generated or cached node produces a Span; spans are kept in memory for
+summaries and can be exported to a JSONL file or to OpenTelemetry.
+"""
+
+import json
+import statistics
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+
+@dataclass
+class Span:
+    """Timing and usage of a single node of the retrospective tree."""
+
+    name: str
+    level: str
+    model_name: str | None
+    cached: bool
+    start: float
+    end: float
+    queue_wait: float = 0.0
+    llm_latency: float = 0.0
+    retries: int = 0
+    error: str | None = None
+    request_tokens: int = 0
+    response_tokens: int = 0
+    total_tokens: int = 0
+    cached_tokens: int = 0
+    sources: list[str] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class JsonlExporter:
+    """Appends each span as one JSON object per line."""
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, span: Span):
+        with self.path.open("a") as f:
+            f.write(json.dumps(asdict(span)) + "\n")
+
+
+class OpenTelemetryExporter:
+    """Forwards spans to the globally configured OpenTelemetry tracer provider."""
+
+    def __init__(self, instrumentation_name: str = "aww.retro"):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise RuntimeError(
+                "OpenTelemetry export requires the opentelemetry-api package."
+            ) from e
+        self.tracer = trace.get_tracer(instrumentation_name)
+
+    def export(self, span: Span):
+        otel_span = self.tracer.start_span(
+            span.name,
+            start_time=int(span.start * 1e9),
+            attributes={
+                "aww.level": span.level,
+                "aww.model_name": span.model_name or "",
+                "aww.cached": span.cached,
+                "aww.queue_wait": span.queue_wait,
+                "aww.llm_latency": span.llm_latency,
+                "aww.retries": span.retries,
+                "aww.error": span.error or "",
+                "aww.request_tokens": span.request_tokens,
+                "aww.response_tokens": span.response_tokens,
+                "aww.total_tokens": span.total_tokens,
+                "aww.cached_tokens": span.cached_tokens,
+            },
+        )
+        otel_span.end(end_time=int(span.end * 1e9))
+
+
+class Tracer:
+    """Collects spans and passes them on to the configured exporters."""
+
+    def __init__(self, exporters=None):
+        self.spans: list[Span] = []
+        self.exporters = list(exporters or [])
+        self._lock = threading.Lock()
+
+    def record(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+        for exporter in self.exporters:
+            exporter.export(span)
+
+
+def summarize(spans: list[Span]) -> list[dict]:
+    """Aggregate spans per (model, level): node counts, cache hits, latencies and tokens."""
+    groups: dict[tuple, list[Span]] = {}
+    for span in spans:
+        groups.setdefault((span.model_name, span.level), []).append(span)
+
+    rows = []
+    for (model_name, level), group in groups.items():
+        generated = [s for s in group if not s.cached]
+        rows.append(
+            {
+                "model_name": model_name,
+                "level": level,
+                "nodes": len(group),
+                "cached": len(group) - len(generated),
+                "mean_queue_wait": (
+                    statistics.mean(s.queue_wait for s in generated) if generated else 0.0
+                ),
+                "mean_llm_latency": (
+                    statistics.mean(s.llm_latency for s in generated)
+                    if generated
+                    else 0.0
+                ),
+                "total_tokens": sum(s.total_tokens for s in group),
+                "cached_tokens": sum(s.cached_tokens for s in group),
+            }
+        )
+    return rows
+
+
+def critical_path(spans: list[Span], root: str, model_name: str | None = None) -> list[Span]:
+    """
+    Return the chain of spans that determined when the root finished: starting at
+    the root, repeatedly follow the source that finished last.
+    """
+    by_name = {s.name: s for s in spans if s.model_name == model_name}
+    path = []
+    span = by_name.get(root)
+    while span is not None:
+        path.append(span)
+        sources = [by_name[name] for name in span.sources if name in by_name]
+        span = max(sources, key=lambda s: s.end) if sources else None
+    return path
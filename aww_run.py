@@ -1,9 +1,13 @@
 from aww.cli import main
 from aww.cli import (
     ask,
+    bench,
     chat,
     compare,
+    db,
+    dev,
     motd,
+    queries,
     retro,
     rewrite_prompt,
     index,
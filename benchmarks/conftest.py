@@ -0,0 +1,131 @@
+"""
+Shared fixtures for the benchmark suite.
+
+Benchmarks run offline: the vault is synthetic, embeddings come from a
+deterministic hashing model and LLM calls go to pydantic-ai's TestModel.
+Set AWW_BENCH_YEARS to change the size of the synthetic vault.
+"""
+
+import hashlib
+import os
+import tracemalloc
+
+import pyarrow as pa
+import pytest
+from lancedb.embeddings import TextEmbeddingFunction
+from lancedb.embeddings.registry import register
+from lancedb.rerankers.base import Reranker
+
+from aww.rag import Index
+from aww.synthetic_vault import generate_vault
+
+BENCH_YEARS = int(os.environ.get("AWW_BENCH_YEARS", "2"))
+
+# Peak memory of each benchmark in KiB, by test name, for the terminal summary.
+PEAK_MEMORY: dict[str, float] = {}
+
+
+@register("BenchEmbeddings")
+class BenchEmbeddings(TextEmbeddingFunction):
+    """Hashes words into a fixed number of buckets, so similar texts get similar vectors."""
+
+    dims: int = 64
+
+    def ndims(self):
+        return self.dims
+
+    def generate_embeddings(self, texts):
+        vectors = []
+        for text in self.sanitize_input(texts):
+            vector = [0.0] * self.dims
+            for word in text.lower().split():
+                bucket = int(hashlib.md5(word.encode()).hexdigest()[:8], 16) % self.dims
+                vector[bucket] += 1.0
+            norm = sum(x * x for x in vector) ** 0.5 or 1.0
+            vectors.append([x / norm for x in vector])
+        return vectors
+
+
+class NoopReranker(Reranker):
+    """Keeps the retrieval order, so searches measure LanceDB only."""
+
+    def _score(self, results):
+        return results.append_column(
+            "_relevance_score", pa.array([1.0] * len(results), type=pa.float32())
+        )
+
+    def rerank_vector(self, query, vector_results):
+        return self._score(vector_results)
+
+    def rerank_fts(self, query, fts_results):
+        return self._score(fts_results)
+
+    def rerank_hybrid(self, query, vector_results, fts_results):
+        return self._score(fts_results)
+
+    def rerank_many(self, queries, result_sets):
+        return [self._score(results) for results in result_sets]
+
+
+@pytest.fixture(scope="session")
+def vault(tmp_path_factory):
+    return generate_vault(
+        tmp_path_factory.mktemp("vault"), years=BENCH_YEARS, end_year=2024, retro_versions=2
+    )
+
+
+@pytest.fixture(autouse=True)
+def offline_models(monkeypatch):
+    monkeypatch.setattr(
+        Index, "_build_embedding_model", lambda self: BenchEmbeddings.create()
+    )
+
+
+@pytest.fixture(scope="session")
+def index(vault, tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Index, "_build_embedding_model", lambda self: BenchEmbeddings.create())
+        idx = Index(tmp_path_factory.mktemp("data"))
+        idx.create_table(clean=True)
+        idx.add_pages(vault)
+        idx.update_indices()
+        idx.get_model()
+    idx.reranker = NoopReranker()
+    return idx
+
+
+@pytest.fixture
+def bench(benchmark, request):
+    """
+    Benchmark a function, recording its peak traced memory from one extra run
+    in extra_info (tracemalloc would distort the timings). With `setup`, each
+    round gets fresh arguments from it.
+    """
+
+    def run(fn, *args, setup=None, rounds=3, **kwargs):
+        tracemalloc.start()
+        try:
+            if setup is not None:
+                fn(*setup()[0])
+            else:
+                fn(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_kib = round(peak / 1024, 1)
+        benchmark.extra_info["peak_memory_kib"] = peak_kib
+        PEAK_MEMORY[request.node.name] = peak_kib
+        if setup is not None:
+            # Pedantic mode for benchmarks that need fresh state every round.
+            return benchmark.pedantic(fn, setup=setup, rounds=rounds)
+        return benchmark(fn, *args, **kwargs)
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not PEAK_MEMORY:
+        return
+    terminalreporter.section("peak memory")
+    for name, peak in PEAK_MEMORY.items():
+        terminalreporter.write_line(f"{name}: {peak} KiB")
@@ -0,0 +1,26 @@
+from aww.rag import Index
+
+
+def test_add_pages(bench, vault, tmp_path):
+    def setup():
+        idx = Index(tmp_path)
+        idx.create_table(clean=True)
+        return (idx,), {}
+
+    bench(lambda idx: idx.add_pages(vault), setup=setup)
+
+
+def test_fts_search(bench, index):
+    bench(index.search, "coffee meeting")
+
+
+def test_rag_search(bench, index):
+    bench(index.search, "coffee meeting", rag=True)
+
+
+def test_filtered_search(bench, index):
+    bench(index.search, "coffee", start_date="2024-03-01", end_date="2024-03-31", kind="journal")
+
+
+def test_search_many(bench, index):
+    bench(index.search_many, ["coffee", "garden family", "deploy bug", "rain"], rag=True)
@@ -0,0 +1,29 @@
+import asyncio
+import datetime
+
+from pydantic_ai.models.test import TestModel
+
+from aww import retro
+from aww.obsidian import Level
+from aww.retro_gen import RecursiveGenerator
+
+
+def test_monthly_retro_generation(bench, vault):
+    """Measures scheduling, prompt assembly and page writes around a stub LLM."""
+
+    def setup():
+        sel = retro.Selection(vault, datetime.date(2024, 5, 1), Level.monthly)
+        return (RecursiveGenerator(TestModel(), sel),), {}
+
+    def run(generator):
+        return asyncio.run(
+            generator.run(
+                context_levels=[Level.daily, Level.weekly],
+                cache_policies=[
+                    retro.NoRootCachePolicy(),
+                    retro.NoLevelsCachePolicy([Level.weekly]),
+                ],
+            )
+        )
+
+    bench(run, setup=setup)
@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic_ai import RunContext
+
+from aww.deps import ChatDeps
+from aww.tools import extract_metric_tool, list_dates_tool, read_tasks_tool, search_tool
+
+
+@pytest.fixture
+def ctx(vault, index):
+    ctx = MagicMock(spec=RunContext)
+    ctx.deps = ChatDeps(vault=vault, index=index)
+    return ctx
+
+
+def test_list_dates_tool(bench, ctx):
+    bench(list_dates_tool, ctx, "2024-01-01", "2024-03-31")
+
+
+def test_extract_metric_tool(bench, ctx):
+    bench(extract_metric_tool, ctx, "stress", "2024-01-01", "2024-12-31")
+
+
+def test_read_tasks_tool(bench, ctx):
+    bench(read_tasks_tool, ctx, "2024-01-01", "2024-03-31", "true")
+
+
+def test_search_tool(bench, ctx):
+    bench(search_tool, ctx, "coffee", start="2024-01-01", end="2024-06-30")
@@ -0,0 +1,23 @@
+import datetime
+
+from aww import retro
+from aww.obsidian import Level
+
+
+def test_walk(bench, vault):
+    bench(lambda: sum(1 for _ in vault.walk()))
+
+
+def test_frontmatter(bench, vault):
+    pages = [vault.page(d, Level.daily) for d in retro.whole_year(datetime.date(2024, 1, 1))]
+    bench(lambda: [page.frontmatter() for page in pages])
+
+
+def test_page_tags_and_tasks(bench, vault):
+    pages = [vault.page(d, Level.daily) for d in retro.whole_month(datetime.date(2024, 6, 1))]
+    bench(lambda: [(page.tags(), page.tasks()) for page in pages])
+
+
+def test_build_retrospective_tree(bench, vault):
+    dates = retro.whole_year(datetime.date(2024, 1, 1))
+    bench(retro.build_retrospective_tree, vault, dates)
@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 import streamlit as st
@@ -8,7 +9,7 @@ from pydantic_ai.messages import (
 )
 
 from aww import obsidian
-from aww.chat import get_chat_agent
+from aww.chat import get_chat_agent, stream_response
 from aww.config import Settings, create_model
 from aww.deps import ChatDeps
 from aww.rag import Index
@@ -17,6 +18,27 @@ from aww.session_manager import ChatSessionSummary, SessionManager
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 
+# Reruns happen on every widget interaction: keep the expensive objects across them.
+@st.cache_resource
+def get_resources():
+    settings = Settings()
+    vault = obsidian.Vault.from_settings(settings)
+    index = Index.from_settings(settings)
+    deps = ChatDeps(vault=vault, index=index)
+    return settings, vault, deps, SessionManager(settings)
+
+
+@st.cache_resource
+def get_agent(model_name: str) -> Agent:
+    return get_chat_agent(create_model(model_name), get_resources()[1])
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def list_sessions() -> list[ChatSessionSummary]:
+    """Session list, reloaded after changes made here or at most once a minute."""
+    return get_resources()[3].list_sessions()
+
+
 def render_messages(messages, show_tool_calls):
     for message in messages:
         for part in message.parts:
@@ -33,6 +55,14 @@ def render_messages(messages, show_tool_calls):
                             st.write(part)
 
 
+def render_tool_calls(messages):
+    for message in messages:
+        for part in message.parts:
+            if not isinstance(part, (UserPromptPart, TextPart)):
+                with st.chat_message("assistant"):
+                    st.write(part)
+
+
 def format_session_label(session: ChatSessionSummary) -> str:
     external = (
         f" | ext:{session.external_session_id}" if session.external_session_id else ""
@@ -70,21 +100,15 @@ def ensure_active_session(manager: SessionManager, model_name: str) -> None:
     st.session_state["chat_history"] = session.messages
 
 
-def save_active_session(manager: SessionManager, model_name: str) -> None:
-    session = manager.load_session(st.session_state["active_chat_session_id"])
-    session.title = st.session_state.get("chat_title", session.title)
-    session.model = model_name
-    session.messages = st.session_state.get("chat_history", [])
-    manager.save_session(session)
+def rename_active_session(manager: SessionManager) -> None:
+    manager.rename_session(
+        st.session_state["active_chat_session_id"], st.session_state["chat_title"]
+    )
+    list_sessions.clear()
 
 
-settings = Settings()
-vault = obsidian.Vault.from_settings(settings)
-index = Index.from_settings(settings)
-deps = ChatDeps(vault=vault, index=index)
-session_manager = SessionManager(settings)
+settings, vault, deps, session_manager = get_resources()
 
-model = None
 agent = None
 ensure_active_session(session_manager, settings.model)
 
@@ -95,14 +119,13 @@ with st.sidebar:
         index=list(settings.models.keys()).index(settings.model),
     )
     if model_name in settings.models.keys():
-        model = create_model(model_name)
-        agent = get_chat_agent(model, vault)
+        agent = get_agent(model_name)
 
     show_tool_calls = st.checkbox("Show tool calls", value=False)
 
     st.divider()
     st.subheader("Sessions")
-    all_sessions = session_manager.list_sessions()
+    all_sessions = list_sessions()
     channels = ["All"] + sorted({session.channel for session in all_sessions})
     selected_channel = st.selectbox(
         "Channel Filter",
@@ -137,10 +160,12 @@ with st.sidebar:
     col_new, col_delete = st.columns(2)
     if col_new.button("New Session"):
         new_session = session_manager.create_session(model=model_name, channel="streamlit")
+        list_sessions.clear()
         load_session_into_state(session_manager, new_session.id)
         st.rerun()
     if col_delete.button("Delete Session", disabled=selected_session_id is None):
         session_manager.delete_session(st.session_state["active_chat_session_id"])
+        list_sessions.clear()
         st.session_state.pop("active_chat_session_id", None)
         st.session_state.pop("chat_history", None)
         st.session_state.pop("chat_title", None)
@@ -148,10 +173,12 @@ with st.sidebar:
         st.rerun()
 
     st.subheader("Rename Session")
-    chat_title = st.text_input("Session Title", key="chat_title")
-    current_session = session_manager.load_session(st.session_state["active_chat_session_id"])
-    if chat_title != current_session.title:
-        session_manager.rename_session(current_session.id, chat_title)
+    chat_title = st.text_input(
+        "Session Title",
+        key="chat_title",
+        on_change=rename_active_session,
+        args=(session_manager,),
+    )
 
     st.subheader("Save to Obsidian")
     if st.button("Save to Obsidian", disabled=not st.session_state.get("chat_history")):
@@ -195,9 +222,19 @@ if agent:
         with st.chat_message("user"):
             st.write(prompt)
 
-        with st.spinner("Waiting for response..."):
-            response = agent.run_sync(prompt, message_history=chat_history, deps=deps)
-            render_messages((response.new_messages()), show_tool_calls)
-
-            st.session_state["chat_history"] = response.all_messages()
-            save_active_session(session_manager, model_name)
+        with st.chat_message("ai"):
+            placeholder = st.empty()
+            with st.spinner("Waiting for response..."):
+                new_messages = asyncio.run(
+                    stream_response(
+                        agent, prompt, chat_history, deps, placeholder.markdown
+                    )
+                )
+        if show_tool_calls:
+            render_tool_calls(new_messages)
+
+        st.session_state["chat_history"] = (chat_history or []) + new_messages
+        session_manager.append_messages(
+            st.session_state["active_chat_session_id"], new_messages, model=model_name
+        )
+        list_sessions.clear()
@@ -2,30 +2,55 @@ import streamlit as st
 import datetime
 import re
 from pathlib import Path
-from collections import defaultdict
 import pandas
 import numpy as np
-from sklearn.manifold import TSNE
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 
-from aww import obsidian
+from aww import database, obsidian, projection
 from aww.config import Settings
-from aww.huggingface import load_sentence_transformer
 from aww.obsidian import Vault
+from aww.rag import Index
 
 
-# It's good practice to cache the model loading
+# The index and the embedding cache outlive reruns; the model loads on first use.
 @st.cache_resource
-def load_st_model(model_name, local_files_only=True, cache_folder=None):
-    return load_sentence_transformer(
-        model_name,
-        local_files_only=local_files_only,
-        token=False,
-        cache_folder=cache_folder,
+def load_index(_settings: Settings) -> Index:
+    index = Index.from_settings(_settings)
+    index.open_table()
+    if index.tbl is not None and index.is_outdated():
+        index.tbl = None  # Stored vectors come from another model.
+    return index
+
+
+@st.cache_resource
+def load_embedding_cache(cache_dir: str, model_key: str) -> projection.EmbeddingCache:
+    return projection.EmbeddingCache(cache_dir, model_key)
+
+
+@st.cache_data(show_spinner=False)
+def load_tag_trends(db_path: str, mtime_ns: int, level: str, window: int):
+    """Weekly counts and rolling means over the whole database; mtime_ns keys the cache."""
+    weeks = database.get_tag_weeks(db_path, level=level)
+    index = pandas.to_datetime(weeks.weeks)
+    counts = pandas.DataFrame(weeks.counts.T, index=index, columns=weeks.tags)
+    rolling = pandas.DataFrame(weeks.rolling_mean(window).T, index=index, columns=weeks.tags)
+    return counts, rolling
+
+
+@st.cache_data(show_spinner=False)
+def load_tag_pairs(db_path: str, mtime_ns: int, start: str, end: str, level: str):
+    cooccurrence = database.get_tag_cooccurrence(db_path, start, end, level)
+    return pandas.DataFrame(
+        cooccurrence.pairs(), columns=["tag", "with", "pages", "lift", "pmi"]
     )
 
 
+@st.cache_data(show_spinner=False)
+def project_vectors(vectors: np.ndarray, method: str, perplexity: int) -> np.ndarray:
+    return projection.project(vectors, method, perplexity)
+
+
 def build_palette(size: int, cmap_name: str) -> list[str]:
     cmap = plt.get_cmap(cmap_name)
     return [mcolors.to_hex(cmap(0.2 + 0.8 * i / max(size - 1, 1))) for i in range(size)]
@@ -67,40 +92,61 @@ HASHTAG_RE = re.compile("#[a-zA-Z0-9_/]+")
 def extract_tags_and_content(vault, date, level):
     retro_page = vault.retrospective_page(date, level)
     if not retro_page or not retro_page.path.exists():
-        return (date, [], "")
+        return (date, [], "", retro_page)
     content = retro_page.content()
     tags = HASHTAG_RE.findall(content)
     tags = [tag[1:] for tag in tags]
-    return (date, tags, content)
+    return (date, tags, content, retro_page)
 
 
-with st.spinner("Loading retrospectives..."):
-    dated_tags_content = [
-        extract_tags_and_content(vault, date, obsidian.Level.daily)
-        for date in date_range
+def retrospective_mtimes(vault, dates, level) -> tuple:
+    """Modification times of the retrospectives of the dates, None for missing pages."""
+    mtimes = []
+    for date in dates:
+        retro_page = vault.retrospective_page(date, level)
+        exists = retro_page and retro_page.path.exists()
+        mtimes.append(retro_page.mtime_ns() if exists else None)
+    return tuple(mtimes)
+
+
+@st.cache_data(show_spinner=False)
+def load_retrospectives(
+    _vault: Vault, vault_path: str, dates: tuple, mtimes: tuple, level: str
+):
+    """Dates, tags and contents of the non-empty retrospectives; mtimes key the cache."""
+    items = [
+        extract_tags_and_content(_vault, date, obsidian.Level(level))
+        for date, mtime in zip(dates, mtimes)
+        if mtime is not None
     ]
-    dated_tags_content = [
-        item for item in dated_tags_content if item[2]
-    ]  # Filter out empty content
+    return [(date, tags, content) for date, tags, content, _ in items if content]
+
+
+with st.spinner("Loading retrospectives..."):
+    level = obsidian.Level.daily
+    dated_tags_content = load_retrospectives(
+        vault,
+        str(vault.path),
+        tuple(date_range),
+        retrospective_mtimes(vault, date_range, level),
+        level.value,
+    )
 
     if dated_tags_content:
         # Unzip the data
         dates, tags_list, contents = zip(*dated_tags_content)
+        retro_pages = [vault.retrospective_page(date, level) for date in dates]
 
         st.header("Tags Analysis")
         # Convert dated_tags to a pandas.DataFrame
         df1 = pandas.DataFrame({"date": dates, "tags": map(set, tags_list)})
         st.write(df1)
 
-        # Convert dated_tags to a histogram count of tags, as a pandas.DataFrame
-        tag_counts = defaultdict(int)
-        for tags in tags_list:
-            for tag in tags:
-                tag_counts[tag] += 1
+        # Histogram count of tags, as a pandas.DataFrame
+        tag_counts = pandas.Series(tags_list, dtype=object).explode().dropna().value_counts()
 
-        if tag_counts:
-            df2 = pandas.DataFrame(list(tag_counts.items()), columns=["tag", "count"])
-            df2 = df2.sort_values(by="count", ascending=False)
+        if not tag_counts.empty:
+            df2 = tag_counts.rename_axis("tag").reset_index(name="count")
             st.write(df2)
 
             st.text("Pick a tag to show in which days it was mentioned")
@@ -110,7 +156,39 @@ with st.spinner("Loading retrospectives..."):
         else:
             st.write("No tags found in the selected date range.")
 
+        st.header("Tag Trends")
+        db_path = database.get_db_path(settings)
+        if db_path.exists():
+            mtime_ns = db_path.stat().st_mtime_ns
+            window = st.slider("Rolling weeks", min_value=1, max_value=12, value=4)
+            counts, rolling = load_tag_trends(str(db_path), mtime_ns, "daily", window)
+            if counts.empty:
+                st.write("No tags collected yet.")
+            else:
+                trend_tags = st.multiselect(
+                    "Tags", list(counts.columns), default=list(counts.columns[:5])
+                )
+                if trend_tags:
+                    st.line_chart(rolling[trend_tags])
+                pairs = load_tag_pairs(
+                    str(db_path),
+                    mtime_ns,
+                    date_start.isoformat(),
+                    date_end.isoformat(),
+                    "daily",
+                )
+                st.text("Tags mentioned together in the selected date range")
+                st.dataframe(pairs, hide_index=True)
+        else:
+            st.write("Run 'aww tags collect' to see tag trends.")
+
         st.header("Content-based Clustering")
+        method = st.selectbox(
+            "Projection",
+            projection.available_projections(),
+            index=1,
+            help="PCA is instant; t-SNE variants start from the PCA layout.",
+        )
         default_perplexity = min(30, len(contents) - 1)
         max_slider_value = min(50, len(contents) - 1)
         min_slider_value = min(3, max_slider_value - 1)
@@ -123,34 +201,38 @@ with st.spinner("Loading retrospectives..."):
 
         if st.button("Cluster Retrospectives"):
             with st.spinner("Embedding and clustering..."):
-                try:
-                    model = load_st_model(
-                        "all-MiniLM-L6-v2",
-                        local_files_only=settings.rag.local_files_only,
-                        cache_folder=settings.rag.cache_dir,
-                    )
-                except RuntimeError as exc:
-                    st.error(str(exc))
-                    st.stop()
-                embeddings = model.encode(
-                    contents, convert_to_tensor=True, normalize_embeddings=True
-                )
-
-                if len(embeddings) <= 3:
+                if len(contents) <= 3:
                     st.warning(
-                        f"Not enough documents to cluster. Need at least 4, but found {len(embeddings)}."
+                        f"Not enough documents to cluster. Need at least 4, but found {len(contents)}."
                     )
                     st.stop()
 
-                tsne = TSNE(
-                    n_components=2,
-                    perplexity=perplexity,
-                    random_state=42,
-                    init="random",
-                    learning_rate=200,
+                index = load_index(settings)
+                cache = load_embedding_cache(
+                    str(Path(settings.data_path).expanduser() / "embeddings"),
+                    index.model_key(),
                 )
+                try:
+                    embeddings = projection.page_embeddings(
+                        list(retro_pages),
+                        list(contents),
+                        lambda texts: index.get_model().generate_embeddings(texts),
+                        cache,
+                        projection.index_vectors(
+                            index,
+                            vault,
+                            list(retro_pages),
+                            start_date=date_start,
+                            end_date=date_end,
+                            kind="retrospective",
+                            level=level,
+                        ),
+                    )
+                except RuntimeError as exc:
+                    st.error(str(exc))
+                    st.stop()
 
-                tsne_results = tsne.fit_transform(embeddings.cpu().numpy())
+                tsne_results = project_vectors(embeddings, method, perplexity)
 
                 df_tsne = pandas.DataFrame(
                     {
@@ -195,9 +277,15 @@ with st.spinner("Loading retrospectives..."):
                     )
 
                 ax.legend()
-                plt.title("t-SNE Clustering of Retrospectives by Content")
-                plt.xlabel("t-SNE Dimension 1")
-                plt.ylabel("t-SNE Dimension 2")
+                method_label = {
+                    "pca": "PCA",
+                    "tsne": "t-SNE",
+                    "opentsne": "openTSNE",
+                    "umap": "UMAP",
+                }[method]
+                plt.title(f"{method_label} Clustering of Retrospectives by Content")
+                plt.xlabel(f"{method_label} Dimension 1")
+                plt.ylabel(f"{method_label} Dimension 2")
                 st.pyplot(fig)
     else:
         st.write("No retrospectives found in the selected date range.")
@@ -1,11 +1,18 @@
 import datetime
 from unittest.mock import MagicMock, patch
 
+import pandas as pd
 import pytest
+from pydantic_ai.messages import ModelResponse, TextPart
 from pydantic_ai.models import Model
+from pydantic_ai.models.function import FunctionModel
 
-from aww.ask import ask_question
+from aww import database, retro
+from aww.ask import ask_question, relevant_dates, retrieve_sources
+from aww.config import Settings
 from aww.obsidian import Level, Vault
+from aww.rag import Index
+from aww.test_rag import offline_embedding_stubs, temp_db_path  # keep
 
 
 @pytest.fixture
@@ -55,3 +62,113 @@ def test_ask_question(mock_vault, mock_model):
             assert result == "Nothing happened."
             MockAgent.assert_called_once()
             mock_agent.run_sync.assert_called_once()
+
+
+def test_ask_question_retrieve(tmp_path):
+    vault = Vault(tmp_path, "journal", "retrospectives", "retrospectives/queries")
+    index = MagicMock()
+    index.search.return_value = pd.DataFrame(
+        {
+            "id": ["retrospectives/2025/03/r2025-03-30.md", "journal/2025/03/2025-03-29.md"],
+            "text": ["Went to yoga.", "x" * 10_000],
+        }
+    )
+    prompts = []
+
+    def respond(messages, info):
+        prompts.append(messages[-1].parts[-1].content)
+        return ModelResponse(parts=[TextPart("Yoga twice [1][2].")])
+
+    result = ask_question(
+        vault=vault,
+        llm_model=FunctionModel(respond),
+        date=datetime.date(2025, 3, 30),
+        level=Level.monthly,
+        prompt="How often did I do yoga?",
+        context_levels=list(Level),
+        retrieve=True,
+        top_k=2,
+        index=index,
+    )
+
+    _, kwargs = index.search.call_args
+    assert kwargs["start_date"] == datetime.date(2025, 3, 1)
+    assert kwargs["end_date"] == datetime.date(2025, 3, 31)
+    assert kwargs["level"] == [Level.daily, Level.weekly]
+    assert kwargs["latest"]
+    assert kwargs["limit"] == 2
+
+    (prompt,) = prompts
+    assert prompt[0] == "[1] [[r2025-03-30]]\nWent to yoga."
+    assert len(prompt[1]) < 4100
+    assert prompt[-1] == "**Question:** How often did I do yoga?"
+    assert result.startswith("Yoga twice [1][2].")
+    assert "1. [[r2025-03-30]]\n2. [[2025-03-29]]" in result
+
+
+def test_retrieve_sources_skips_previous_versions(tmp_path, temp_db_path):
+    vault = Vault(tmp_path, "journal", "retrospectives", "retrospectives/queries")
+    directory = tmp_path / "retrospectives/2025/03"
+    directory.mkdir(parents=True)
+    for name in ("r2025-03-30.md", "r2025-03-30.1.md", "r2025-03-30.2.md"):
+        (directory / name).write_text("Went to yoga.")
+    index = Index(data_path=temp_db_path)
+    index.create_table(clean=True)
+    index.add_pages(vault)
+
+    sel = retro.Selection(vault, datetime.date(2025, 3, 30), Level.weekly)
+    results = retrieve_sources(index, sel, "yoga", [Level.daily], top_k=3)
+    assert results["id"].tolist() == ["retrospectives/2025/03/r2025-03-30.md"]
+
+
+def test_tags_prefilter(tmp_path, monkeypatch):
+    monkeypatch.setenv("AWW_DATA_PATH", str(tmp_path))
+    db_path = database.get_db_path(Settings())
+    database.init_db(db_path)
+    for day, tags in (("2025-03-01", ["health/yoga"]), ("2025-03-02", ["work"])):
+        database.save_page_tags(db_path, day, "journal", "daily", f"{day}.md", None, None, tags)
+    database.save_page_tags(
+        db_path, "2025-03-03", "journal", "weekly", "2025-W10.md", None, None, ["yoga"]
+    )
+
+    vault = Vault(tmp_path, "journal", "retrospectives", "retrospectives/queries")
+    sel = retro.Selection(vault, datetime.date(2025, 3, 1), Level.monthly)
+    assert relevant_dates("tags", sel, "How was my #yoga practice?") == {"2025-03-01"}
+    assert relevant_dates("tags", sel, "What about sleep?") == set()
+
+
+def test_fts_prefilter_ignores_stop_words(tmp_path, temp_db_path):
+    vault = Vault(tmp_path, "journal", "retrospectives", "retrospectives/queries")
+    for day, text in (
+        ("01", "Went to yoga in the morning."),
+        ("02", "What a day, it was raining the whole time."),
+        ("03", "Long meeting about the budget."),
+    ):
+        page = vault.page(datetime.date(2025, 3, int(day)), Level.daily)
+        page.path.parent.mkdir(parents=True, exist_ok=True)
+        page.path.write_text(text)
+    index = Index(data_path=temp_db_path)
+    index.create_table(clean=True)
+    index.add_pages(vault)
+    index.update_indices()
+
+    sel = retro.Selection(vault, datetime.date(2025, 3, 1), Level.monthly)
+    assert relevant_dates("fts", sel, "What did I do at yoga?", index) == {"2025-03-01"}
+    assert relevant_dates("fts", sel, "What was it about?", index) == set()
+    assert len(relevant_dates("fts", sel, "the yoga budget", index, limit=1)) == 1
+
+
+def test_ask_retrieve_without_index(tmp_path):
+    from click.testing import CliRunner
+
+    from aww.cli.ask import ask
+
+    settings = Settings(data_path=str(tmp_path / "data"))
+    vault = Vault(tmp_path, "journal", "retrospectives", "retrospectives/queries")
+    result = CliRunner().invoke(
+        ask,
+        ["--retrieve", "weekly", "What did I do?"],
+        obj={"vault": vault, "llm_model": None, "settings": settings},
+    )
+    assert result.exit_code == 1
+    assert "Run 'aww index' first." in result.output
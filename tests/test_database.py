@@ -100,3 +100,116 @@ def test_get_tags_references(init_db_conn):
     assert refs[0][0] == "tag1"
     assert refs[0][1] == "2026-01-01"
     assert refs[0][4] == "p1.md"
+
+
+def test_analytics_indexes(init_db_conn):
+    indexes = {
+        row[0]
+        for row in init_db_conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    }
+    assert {"idx_pages_date_level", "idx_tag_occurrences_page"} <= indexes
+
+
+def test_get_tag_weeks(init_db_conn):
+    conn = init_db_conn
+    # 2026-01-05 is a Monday
+    database.save_page_tags(conn, "2026-01-05", "journal", "daily", "a.md", None, None, ["run", "work"])
+    database.save_page_tags(conn, "2026-01-11", "journal", "daily", "b.md", None, None, ["run"])
+    database.save_page_tags(conn, "2026-01-26", "journal", "daily", "c.md", None, None, ["work"])
+    database.save_page_tags(conn, "2026-01-26", "journal", "weekly", "w.md", None, None, ["run"])
+
+    weeks = database.get_tag_weeks(conn, level="daily")
+    assert weeks.tags == ["run", "work"]
+    assert weeks.weeks == ["2026-01-05", "2026-01-12", "2026-01-19", "2026-01-26"]
+    assert weeks.counts.tolist() == [[2, 0, 0, 0], [1, 0, 0, 1]]
+    assert weeks.rolling_mean(2).tolist() == [[2, 1, 0, 0], [1, 0.5, 0, 0.5]]
+    recent, previous = weeks.change(2)
+    assert recent.tolist() == [0, 0.5] and previous.tolist() == [1, 0.5]
+
+    padded = database.get_tag_weeks(conn, "2025-12-31", "2026-01-20", "daily")
+    assert padded.weeks == ["2025-12-29", "2026-01-05", "2026-01-12", "2026-01-19"]
+    assert padded.counts.tolist() == [[0, 2, 0, 0], [0, 1, 0, 0]]
+
+    assert database.get_tag_weeks(conn, level="monthly").tags == []
+
+
+def test_get_tag_cooccurrence(init_db_conn):
+    conn = init_db_conn
+    database.save_page_tags(conn, "2026-01-01", "journal", "daily", "1.md", None, None, ["a", "b"])
+    database.save_page_tags(conn, "2026-01-02", "journal", "daily", "2.md", None, None, ["a", "b", "c"])
+    database.save_page_tags(conn, "2026-01-03", "journal", "daily", "3.md", None, None, ["c"])
+    database.save_page_tags(conn, "2026-01-04", "journal", "daily", "4.md", None, None, [])
+
+    cooc = database.get_tag_cooccurrence(conn, level="daily")
+    assert cooc.tags == ["a", "b", "c"]
+    assert cooc.n_pages == 4
+    assert cooc.counts.tolist() == [[2, 2, 1], [2, 2, 1], [1, 1, 2]]
+    # P(a,b) = 2/4, P(a) = P(b) = 2/4
+    assert cooc.lift()[0, 1] == pytest.approx(2.0)
+    assert cooc.pmi()[0, 1] == pytest.approx(1.0)
+
+    pairs = cooc.pairs(min_count=1)
+    assert [(a, b, n) for a, b, n, _, _ in pairs] == [("a", "b", 2), ("a", "c", 1), ("b", "c", 1)]
+    assert cooc.pairs() == pairs[:1]
+
+
+def test_tags_trends_command(tmp_path):
+    from click.testing import CliRunner
+
+    from aww.cli.tags import trends
+    from aww.config import Settings
+
+    settings = Settings(data_path=str(tmp_path))
+    db_path = database.get_db_path(settings)
+    database.init_db(db_path)
+    database.save_page_tags(db_path, "2026-01-05", "journal", "daily", "a.md", None, None, ["run", "work"])
+    database.save_page_tags(db_path, "2026-01-06", "journal", "daily", "b.md", None, None, ["run", "work"])
+    database.save_page_tags(db_path, "2026-01-20", "journal", "daily", "c.md", None, None, ["work"])
+
+    result = CliRunner().invoke(trends, ["-w", "1", "--sort", "change"], obj={"settings": settings})
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert lines[0] == "Weeks 2026-01-05 to 2026-01-19, change over the last 1 week(s):"
+    assert lines[1].split()[-1] == "work" and "+1.00/wk" in lines[1]
+    assert "█▁▅" in lines[1]
+    assert lines[-1].endswith("run + work")
+
+
+def test_migrations_upgrade_unversioned_db(db_conn):
+    # A database created before versioning: the tables, without the indexes
+    database._create_tables(db_conn)
+    assert database.schema_version(db_conn) == 0
+
+    database.init_db(db_conn)
+    assert database.schema_version(db_conn) == database.SCHEMA_VERSION
+    database.init_db(db_conn)
+    assert database.schema_version(db_conn) == database.SCHEMA_VERSION
+
+    plan = database.query_plan(db_conn, "DELETE FROM tag_occurrences WHERE page_id = ?", [1])
+    assert any("idx_tag_occurrences_page" in step for step in plan)
+
+
+def test_connect_uses_wal(tmp_path):
+    with database.connect(tmp_path / "aww.db") as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_db_explain_command(tmp_path):
+    from click.testing import CliRunner
+
+    from aww.cli.db import explain, migrate
+    from aww.config import Settings
+
+    settings = Settings(data_path=str(tmp_path))
+    runner = CliRunner()
+    result = runner.invoke(migrate, obj={"settings": settings})
+    assert f"to {database.SCHEMA_VERSION}" in result.output
+    database.save_page_tags(database.get_db_path(settings), "2026-01-01", "journal", "daily", "p.md", None, None, ["a"])
+
+    result = runner.invoke(explain, ["--time", "2"], obj={"settings": settings})
+    assert result.exit_code == 0, result.output
+    assert f"(schema version {database.SCHEMA_VERSION} of {database.SCHEMA_VERSION})" in result.output
+    assert "tags frequency (period, level) [" in result.output
+    assert "USING COVERING INDEX idx_pages_" in result.output
+    assert database.get_tags_frequency(database.get_db_path(settings)) == [("a", 1)]
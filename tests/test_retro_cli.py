@@ -1,10 +1,11 @@
 import datetime
 from unittest.mock import MagicMock
 
+import click
 import pytest
 
 from aww import retro
-from aww.cli.retro import NoCachePolicyChoice, get_cache_policies
+from aww.cli.retro import NoCachePolicyChoice, get_cache_policies, parse_models
 from aww.obsidian import Level
 
 
@@ -29,3 +30,14 @@ def test_get_cache_policies_mixed():
     assert any(isinstance(p, retro.NoRootCachePolicy) for p in policies)
     assert any(isinstance(p, retro.ModificationTimeCachePolicy) for p in policies)
     assert any(isinstance(p, retro.NoLevelsCachePolicy) for p in policies)
+
+
+def test_parse_models():
+    assert parse_models("openai, local:2", 10) == {"openai": 10, "local": 2}
+    assert parse_models("openai,local", None) == {"openai": None, "local": None}
+
+
+@pytest.mark.parametrize("spec", ["openai:x", "openai:0", ","])
+def test_parse_models_rejects_invalid(spec):
+    with pytest.raises(click.BadParameter):
+        parse_models(spec, 10)